@@ -0,0 +1 @@
+"""Render / parse benchmarks and synthetic SP-API data. Run with `python -m benchmarks.run`."""
@@ -0,0 +1,288 @@
+"""
+Render and parse benchmarks.
+
+    python -m benchmarks.run                          # print results
+    python -m benchmarks.run --out bench.json         # save results as JSON
+    python -m benchmarks.run --compare bench.json     # fail if anything got slower
+
+Rendering runs on the headless null backend; the emulator push runs under the
+SDL dummy video driver, so no window or Pi is needed. Startup benchmarks run
+in fresh interpreters so module imports are not already cached.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .synthetic import order_metrics_payload
+
+PAYLOAD_DAYS = (30, 63, 365, 1095, 3650)
+# Panel walls rendered in addition to the configured one (NullDisplay geometry keywords)
+WALLS = {
+    '128x64': dict(panel_rows=32, panel_cols=64, chain_length=2, parallel=2),
+    '256x32': dict(panel_rows=32, panel_cols=64, chain_length=4, parallel=1),
+}
+STARTUP_REPEAT = 5
+
+# Prints seconds from the first project import to the restored frame being pushed
+FIRST_FRAME_SCRIPT = """
+import time
+start = time.perf_counter()
+from led_sales_tracker.main import _boot_display
+disp, restored = _boot_display()
+assert restored is not None, "no restored frame"
+print(time.perf_counter() - start)
+"""
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import led_sales_tracker.main
+print(time.perf_counter() - start)
+"""
+
+
+def measure(fn, repeat=5, min_time=0.2):
+    """Time fn() and return per-call statistics in microseconds."""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    runs = [t / number * 1e6 for t in timer.repeat(repeat=repeat, number=number)]
+    return summarize(runs, number)
+
+
+def summarize(runs_us, calls_per_run=1):
+    return {
+        'min_us': round(min(runs_us), 3),
+        'median_us': round(statistics.median(runs_us), 3),
+        'mean_us': round(statistics.fmean(runs_us), 3),
+        'calls_per_run': calls_per_run,
+    }
+
+
+def startup_benchmarks():
+    """Import time of the entry point and time to the first (restored) frame, each in a fresh interpreter."""
+    with tempfile.TemporaryDirectory() as tmp:
+        frame_path = os.path.join(tmp, "last_frame.npy")
+        np.save(frame_path, np.random.default_rng(0).integers(0, 256, (32, 64, 3), dtype=np.uint8))
+        env = dict(os.environ, DISPLAY_BACKEND="null", LAST_FRAME_PATH=frame_path, METRICS_DB_PATH="")
+
+        def run(script):
+            wall_start = time.perf_counter()
+            out = subprocess.run([sys.executable, "-c", script], env=env, check=True, capture_output=True, text=True)
+            return float(out.stdout.strip().splitlines()[-1]) * 1e6, (time.perf_counter() - wall_start) * 1e6
+
+        imports = [run(IMPORT_SCRIPT)[0] for _ in range(STARTUP_REPEAT)]
+        first_frames = [run(FIRST_FRAME_SCRIPT) for _ in range(STARTUP_REPEAT)]
+    return {
+        'startup_import_main': summarize(imports),
+        'startup_first_frame': summarize([in_process for in_process, _ in first_frames]),
+        'startup_process_to_first_frame': summarize([wall for _, wall in first_frames]),
+    }
+
+
+def render_benchmarks():
+    from led_sales_tracker.display.null import NullDisplay
+    from led_sales_tracker.fetcher import SalesSnapshot
+    from led_sales_tracker.main import _build_compositor
+    from led_sales_tracker.api.order_metrics import OrderMetrics, MarketplaceMetrics
+
+    disp = NullDisplay(max_frames=1)
+    rng = np.random.default_rng(0)
+    results = {}
+
+    results['clear'] = measure(disp.clear)
+    results['draw_text'] = measure(lambda: disp.draw_text("1234   12:34", x=1, y=1, colour=(0, 255, 0)))
+    series = [(i, -int(u)) for i, u in enumerate(rng.integers(0, 32, 64))]
+    results['draw_series'] = measure(lambda: disp.draw_series(series, x=0, y=32, colour=(0, 255, 0)))
+    for days in (63, 365, 3650):
+        values = rng.integers(0, 60, days)
+        results[f'draw_chart_{days}d'] = measure(lambda: disp.draw_chart(values, x=0, y=9, colour=(0, 255, 0)))
+
+    # Full frame: every layer re-rasterized and flattened, then pushed
+    metrics = OrderMetrics.from_payload(order_metrics_payload(64))
+    data = MarketplaceMetrics(merged=metrics, by_marketplace={'US': metrics}, errors={})
+    view = {
+        'snapshot': SalesSnapshot(sequence=1, data=data, fetched_at=time.monotonic()),
+        'clock': "12:34", 'segments': 32, 'banner': ("ERR", (255, 0, 0)),
+    }
+    compositor = _build_compositor(disp, view)
+    compositor.set_visible("banner", False)
+
+    def full_frame(compositor=compositor, disp=disp):
+        compositor.invalidate("chart", "totals", "clock", "progress")
+        compositor.compose()
+        disp.push()
+    results['render_full_frame'] = measure(full_frame)
+    for name, geometry in WALLS.items():
+        wall = NullDisplay(max_frames=1, **geometry)
+        wall_compositor = _build_compositor(wall, view)
+        wall_compositor.set_visible("banner", False)
+        results[f'render_full_frame_{name}'] = measure(lambda: full_frame(wall_compositor, wall))
+
+    def steady_frame():
+        compositor.invalidate("progress")
+        compositor.compose()
+        disp.push()
+    results['render_progress_frame'] = measure(steady_frame)
+
+    # Long-history page: drawn from the precomputed weekly buckets, this year over the last
+    from led_sales_tracker.api.rollups import RollupIndex, Rollups
+    index = RollupIndex()
+    index.update(OrderMetrics.from_payload(order_metrics_payload(1095)))
+    view['snapshot'] = SalesSnapshot(sequence=2, data=MarketplaceMetrics(
+        merged=metrics, by_marketplace={'US': metrics}, errors={}, rollups=Rollups.from_indexes([index], 52, 24),
+    ), fetched_at=time.monotonic())
+    view['page'] = "weeks"
+    results['render_weeks_page'] = measure(full_frame)
+    view['page'] = "history"
+
+    # Push-time colour stage: every LUT swap remaps the frame, a progress tick only its changed rows
+    from led_sales_tracker.display.colour import ColourStage
+    stage = ColourStage(gamma=2.2, white_balance=(1.0, 0.9, 0.8), brightness=0.5)
+    frame = rng.integers(0, 256, disp.buffer.shape, dtype=np.uint8)
+    stage.apply(frame)
+
+    def new_lut():
+        stage._input_lut = None
+        stage.apply(frame)
+
+    def progress_tick():
+        frame[0, 0, 0] ^= 1
+        stage.apply(frame)
+    results['colour_stage_full'] = measure(new_lut)
+    results['colour_stage_row'] = measure(progress_tick)
+    results['colour_stage_unchanged'] = measure(lambda: stage.apply(frame))
+    return results
+
+
+def emulator_benchmarks():
+    try:
+        from led_sales_tracker.display.emulator import EmulatedMatrixDisplay
+    except ImportError as e:
+        print(f"Skipping emulator benchmarks: {e}", file=sys.stderr)
+        return {}
+    disp = EmulatedMatrixDisplay()
+    frames = np.random.default_rng(0).integers(0, 256, (2,) + disp.buffer.shape, dtype=np.uint8)
+    state = {'i': 0}
+
+    def push_changed():
+        state['i'] ^= 1
+        disp.buffer[:] = frames[state['i']]
+        disp.push()
+
+    results = {'emulator_push': measure(push_changed), 'emulator_push_unchanged': measure(disp.push)}
+    disp.cleanup()
+    return results
+
+
+def parse_benchmarks():
+    from led_sales_tracker.api.amazon_client import AmazonClient
+    from led_sales_tracker.api.metrics_store import MetricsStore
+    from led_sales_tracker.api.order_metrics import OrderMetrics
+
+    client = AmazonClient(store=MetricsStore(":memory:"))
+    results = {}
+    for days in PAYLOAD_DAYS:
+        payload = order_metrics_payload(days)
+        results[f'process_units_{days}d'] = measure(lambda: client._process_units_metrics(payload))
+        results[f'process_sales_{days}d'] = measure(lambda: client._process_sales_metrics(payload))
+        results[f'parse_columnar_{days}d'] = measure(lambda: OrderMetrics.from_payload(payload))
+
+    # Rollup index: seeded once with three years, then fed each poll's window (today changed)
+    from led_sales_tracker.api.rollups import RollupIndex, Rollups, rollup_days
+    history = OrderMetrics.from_payload(order_metrics_payload(1095))
+    index = RollupIndex(max_days=rollup_days(52, 24) + 31)
+    results['rollup_seed_1095d'] = measure(lambda: RollupIndex().update(history))
+    index.update(history)
+    window = history.between(start=history.dates[-63])
+
+    def poll():
+        window.units[-1] += 1  # a new order today
+        index.update(window)
+    results['rollup_update_63d'] = measure(poll)
+    results['rollup_pages_52w_24m'] = measure(lambda: Rollups.from_indexes([index], 52, 24))
+
+    # What the pages would cost without the index: three years loaded from the store and summed
+    today = datetime.fromisoformat(history.iso_dates()[-1]).date()
+    client.store.upsert('US', order_metrics_payload(1095), closed_before=today)
+    first_day = datetime.fromisoformat(history.iso_dates()[0]).date()
+
+    def reaggregate():
+        daily = client.store.load_metrics('US', first_day, today)
+        return daily.resample("W"), daily.resample("M")
+    results['reaggregate_pages_1095d'] = measure(reaggregate)
+    return results
+
+
+def compare(results, baseline_path, threshold):
+    """Print the ratio against a baseline file; return the names that regressed beyond threshold."""
+    with open(baseline_path) as fp:
+        baseline = json.load(fp)['results']
+    regressions = []
+    for name, stats in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = stats['min_us'] / max(baseline[name]['min_us'], 1e-9)
+        flag = "  REGRESSION" if ratio > threshold else ""
+        print(f"{name:32s} {baseline[name]['min_us']:12.2f} -> {stats['min_us']:12.2f} us  x{ratio:5.2f}{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare against a previous JSON result")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio counted as a regression")
+    parser.add_argument("--only", choices=("render", "emulator", "parse", "startup"), help="run a single group")
+    args = parser.parse_args(argv)
+
+    groups = {
+        'render': render_benchmarks, 'emulator': emulator_benchmarks, 'parse': parse_benchmarks,
+        'startup': startup_benchmarks,
+    }
+    results = {}
+    for name, run in groups.items():
+        if args.only in (None, name):
+            results.update(run())
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'node': platform.node(),
+            'numpy': np.__version__,
+        },
+        'results': results,
+    }
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump(report, fp, indent=2)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    else:
+        for name, stats in results.items():
+            print(f"{name:32s} {stats['min_us']:12.2f} us  (median {stats['median_us']:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+"""
+Soak test of the fetch path against the local SP-API stand-in.
+
+    python -m benchmarks.soak --duration 3h --rate 0.2 --marketplaces US,CA
+    python -m benchmarks.soak --duration 30m --token-ttl 300 --throttle-prob 0.05 --out soak.json
+    python -m benchmarks.soak --duration 1h --days 3650 --store none      # multi-year payloads every call
+
+Drives AmazonClient.get_order_metrics_multi at --rate calls per second (one
+call at a time; a call that overruns its slot delays the next one) against
+benchmarks.standin, started as a subprocess unless --url points at a running
+one. Every --report-every seconds, and at the end, it reports:
+
+* latency percentiles of whole calls and of single marketplace fetches (both
+  include retries and backoff), and of single attempts (from the
+  SP_API_REQUEST_SECONDS histogram, so interpolated within its buckets)
+* retry amplification: upstream getOrderMetrics attempts per fetch, by error
+* memory: RSS and live objects, plus their growth after --warmup (tracemalloc
+  allocation sites with --tracemalloc)
+
+Retry counts and backoff follow the tracker's FETCH_* settings.
+"""
+import os
+import re
+import gc
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import platform
+import subprocess
+import statistics
+import threading
+import tracemalloc
+import urllib.request
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+
+from .standin import add_fault_arguments, fault_argv, STATS_PATH, TOKEN_PATH
+
+logger = logging.getLogger(__name__)
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhd]?)$")
+_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_duration(text):
+    """Seconds from '90', '90s', '30m', '3h' or '1d'."""
+    match = _DURATION.match(text.strip())
+    if not match:
+        raise argparse.ArgumentTypeError(f"Bad duration {text!r}: expected e.g. 90s, 30m or 3h")
+    return float(match[1]) * _UNITS[match[2]]
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """{'p50': ..., ...} in seconds, or {} without values."""
+    if len(values) < 2:
+        return {f"p{p}": values[0] for p in points} if values else {}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {f"p{p}": cuts[p - 1] for p in points} | {'max': max(values)}
+
+
+def histogram_percentiles(metric, points=(50, 95, 99)):
+    """Percentiles of all of a Histogram's children together, interpolated linearly within buckets."""
+    counts = None
+    for child in metric.children().values():
+        child_counts, _ = child.snapshot()
+        counts = child_counts if counts is None else [a + b for a, b in zip(counts, child_counts)]
+    total = sum(counts or ())
+    if not total:
+        return {}
+    bounds = (0.0,) + metric.buckets
+    result = {}
+    for p in points:
+        rank, cumulative = total * p / 100, 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                if i >= len(metric.buckets):
+                    result[f"p{p}"] = metric.buckets[-1]  # in +Inf: only a lower bound is known
+                else:
+                    result[f"p{p}"] = bounds[i] + (bounds[i + 1] - bounds[i]) * (rank - cumulative) / count
+                break
+            cumulative += count
+    return result
+
+
+def rss_bytes():
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as fp:
+            return int(fp.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # peak only; KiB on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def growth_per_hour(samples):
+    """Least-squares slope of (seconds, value) samples, per hour."""
+    if len(samples) < 2:
+        return 0.0
+    xs, ys = zip(*samples)
+    mean_x, mean_y = statistics.fmean(xs), statistics.fmean(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if not spread:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread * 3600
+
+
+def _counter_total(metric):
+    return sum(child.value for child in metric.children().values())
+
+
+def _histogram_count(metric):
+    return sum(sum(child.snapshot()[0]) for child in metric.children().values())
+
+
+class Standin:
+    """A stand-in subprocess on a free port; its URL is read from the first line it prints."""
+
+    def __init__(self, args):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.standin", "--port", "0"] + fault_argv(args),
+            stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"The stand-in exited with code {self.process.wait()}")
+        self.url = line.split()[-1]
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def standin_stats(url):
+    with urllib.request.urlopen(f"{url}{STATS_PATH}", timeout=10) as response:
+        return json.load(response)
+
+
+class Soak:
+    def __init__(self, client, args, url):
+        self.client = client
+        self.args = args
+        self.url = url
+        self.marketplaces = args.marketplaces.split(",")
+        self.call_seconds = array("d")    # whole get_order_metrics_multi calls
+        self.fetch_seconds = array("d")   # single-marketplace fetches, retries included
+        self.fetch_errors = Counter()     # fetches that gave up, by exception
+        self.call_errors = Counter()      # calls where every marketplace failed
+        self.late_calls = 0
+        self.rotations = 0                # refresh tokens rotated by LWA (and handed to on_refresh_token)
+        self.memory = []                  # (elapsed, rss bytes, live objects)
+        self._lock = threading.Lock()
+        self._time_fetches()
+
+    def _time_fetches(self):
+        """Wrap the client's single-fetch method (retry loop included) to time it."""
+        fetch = self.client._fetch_order_metrics
+
+        def timed_fetch(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fetch(*args, **kwargs)
+            except Exception as e:
+                with self._lock:
+                    self.fetch_errors[type(e).__name__] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.fetch_seconds.append(time.perf_counter() - start)
+
+        self.client._fetch_order_metrics = timed_fetch
+
+    def count_rotation(self, token):
+        with self._lock:
+            self.rotations += 1
+
+    def call(self):
+        start = time.perf_counter()
+        try:
+            self.client.get_order_metrics_multi(self.marketplaces, days=self.args.days)
+        except Exception as e:
+            self.call_errors[type(e).__name__] += 1
+        self.call_seconds.append(time.perf_counter() - start)
+
+    def sample_memory(self, elapsed):
+        gc.collect()
+        self.memory.append((elapsed, rss_bytes(), len(gc.get_objects())))
+
+    def report(self, elapsed, since_calls=0, since_fetches=0):
+        """Stats over everything so far; latency percentiles also over calls since the given indices."""
+        from led_sales_tracker.instrumentation import SP_API_REQUEST_SECONDS, SP_API_RETRIES
+
+        with self._lock:
+            fetch_seconds = list(self.fetch_seconds)
+            fetch_errors = dict(self.fetch_errors)
+        attempts = _histogram_count(SP_API_REQUEST_SECONDS)
+        retries = _counter_total(SP_API_RETRIES)
+        fetches = len(fetch_seconds)
+        retry_reasons = Counter()
+        for (_, reason), child in SP_API_RETRIES.children().items():
+            retry_reasons[reason] += child.value
+        upstream = standin_stats(self.url)
+        upstream_attempts = sum(v for k, v in upstream.items() if k.startswith("order_metrics_"))
+
+        warm = [(t, rss, objects) for t, rss, objects in self.memory if t >= self.args.warmup] or self.memory[-1:]
+        rss_now, objects_now = self.memory[-1][1:]
+        return {
+            'elapsed': elapsed,
+            'calls': len(self.call_seconds),
+            'call_rate': len(self.call_seconds) / elapsed if elapsed else 0.0,
+            'late_calls': self.late_calls,
+            'call_errors': dict(self.call_errors),
+            'call_seconds': percentiles(self.call_seconds),
+            'call_seconds_recent': percentiles(self.call_seconds[since_calls:]),
+            'fetches': fetches,
+            'fetch_errors': fetch_errors,
+            'fetch_seconds': percentiles(fetch_seconds),
+            'fetch_seconds_recent': percentiles(fetch_seconds[since_fetches:]),
+            'attempt_seconds': histogram_percentiles(SP_API_REQUEST_SECONDS),
+            'attempts': attempts,
+            'retries': retries,
+            'retry_reasons': dict(retry_reasons),
+            'retry_amplification': attempts / fetches if fetches else 0.0,
+            'upstream': upstream,
+            'upstream_amplification': upstream_attempts / fetches if fetches else 0.0,
+            'token_refreshes_per_hour': upstream.get('token_200', 0) / elapsed * 3600 if elapsed else 0.0,
+            'refresh_token_rotations': self.rotations,
+            'rss_mb': rss_now / 2**20,
+            'rss_growth_mb': (rss_now - warm[0][1]) / 2**20,
+            'rss_growth_mb_per_hour': growth_per_hour([(t, rss / 2**20) for t, rss, _ in warm]),
+            'objects': objects_now,
+            'objects_growth': objects_now - warm[0][2],
+            'objects_growth_per_hour': growth_per_hour([(t, objects) for t, _, objects in warm]),
+        }
+
+
+def _format_interval(stats):
+    recent = stats['call_seconds_recent']
+    latency = " ".join(f"{k}={v:.2f}s" for k, v in recent.items() if k != "max") or "no calls"
+    return (
+        f"[{stats['elapsed'] / 60:7.1f} min] calls={stats['calls']} ({stats['call_rate']:.3f}/s) {latency} "
+        f"attempts/fetch={stats['retry_amplification']:.2f} retries={stats['retry_reasons'] or 0} "
+        f"failed_calls={sum(stats['call_errors'].values())} rss={stats['rss_mb']:.1f}MB "
+        f"(+{stats['rss_growth_mb']:.1f}) objects={stats['objects']} (+{stats['objects_growth']})"
+    )
+
+
+def _print_summary(stats, snapshot_diff):
+    def line(name, values):
+        print(f"  {name:24s} " + "  ".join(f"{k} {v * 1000:9.1f} ms" for k, v in values.items()))
+
+    print(f"\nSoak finished after {stats['elapsed'] / 3600:.2f} h: {stats['calls']} calls, "
+          f"{stats['fetches']} fetches, {stats['attempts']} attempts ({stats['late_calls']} late calls)")
+    print("Latency:")
+    line("call", stats['call_seconds'])
+    line("fetch (with retries)", stats['fetch_seconds'])
+    line("attempt (histogram)", stats['attempt_seconds'])
+    print(f"Retry amplification: {stats['retry_amplification']:.3f} attempts per fetch "
+          f"({stats['upstream_amplification']:.3f} as seen by the stand-in)")
+    for reason, count in sorted(stats['retry_reasons'].items()):
+        print(f"  {reason:40s} {count}")
+    print(f"Gave up: {stats['fetch_errors'] or 'none'} (calls with every marketplace failed: "
+          f"{stats['call_errors'] or 'none'})")
+    print(f"Token refreshes: {stats['upstream'].get('token_200', 0)} ({stats['token_refreshes_per_hour']:.1f}/h), "
+          f"{stats['refresh_token_rotations']} refresh token rotation(s)")
+    print(f"Memory: RSS {stats['rss_mb']:.1f} MB, {stats['rss_growth_mb']:+.2f} MB since warm-up "
+          f"({stats['rss_growth_mb_per_hour']:+.2f} MB/h); objects {stats['objects']} "
+          f"({stats['objects_growth']:+d}, {stats['objects_growth_per_hour']:+.0f}/h)")
+    for entry in snapshot_diff:
+        print(f"  {entry}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=parse_duration, default=parse_duration("10m"), help="e.g. 90s, 30m, 3h")
+    parser.add_argument("--rate", type=float, default=0.2, help="get_order_metrics_multi calls per second")
+    parser.add_argument("--marketplaces", default="US", help="comma-separated marketplace names")
+    parser.add_argument("--days", type=int, default=63, help="history window per call")
+    parser.add_argument("--store", default=":memory:",
+                        help="metrics store path, ':memory:' (default) or 'none' to fetch the whole window every call")
+    parser.add_argument("--intraday", action=argparse.BooleanOptionalAction, default=None,
+                        help="intraday mode (default: the INTRADAY setting)")
+    parser.add_argument("--url", help="a running stand-in (default: start one with the fault options below)")
+    parser.add_argument("--report-every", type=parse_duration, default=parse_duration("60s"))
+    parser.add_argument("--warmup", type=parse_duration, default=parse_duration("60s"),
+                        help="memory growth is measured from the first sample after this")
+    parser.add_argument("--tracemalloc", type=int, default=0, metavar="N",
+                        help="also list the N allocation sites that grew most since warm-up")
+    parser.add_argument("--out", help="write the final report as JSON")
+    parser.add_argument("--prewarm", action=argparse.BooleanOptionalAction, default=True,
+                        help="refresh access tokens ahead of expiry in the background, as the tracker does")
+    parser.add_argument("--verbose", action="store_true", help="log the client's own messages")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+
+    # Retries are expected here and counted in the report; only give-ups are logged unless --verbose
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if not args.verbose:
+        logging.getLogger("sp_api").setLevel(logging.CRITICAL)  # logs every error response
+    if args.tracemalloc:
+        tracemalloc.start(10)
+
+    standin = None if args.url else Standin(args)
+    url = (args.url or standin.url).rstrip("/")
+    print(f"Soaking against {url} for {args.duration / 60:.1f} min at {args.rate} calls/s", flush=True)
+
+    from led_sales_tracker.api.amazon_client import AmazonClient
+    from led_sales_tracker.api.metrics_store import MetricsStore
+
+    store = None if args.store == "none" else MetricsStore(args.store)
+    client = AmazonClient(store=store, intraday=args.intraday, endpoint=url, lwa_endpoint=f"{url}{TOKEN_PATH}")
+    client.set_credentials("amzn1.application-oa2-client.standin", "standin-secret", "Atzr|standin")
+    soak = Soak(client, args, url)
+    client.on_refresh_token = soak.count_rotation
+    if args.prewarm:
+        client.start_token_refresher()
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda sig, frame: stop.set())  # Ctrl-C ends the run early, with a report
+    start = time.monotonic()
+    period = 1.0 / args.rate
+    next_call = next_report = start
+    baseline = None
+    reported = (0, 0)
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            if now - start >= args.duration:
+                break
+            if now >= next_report:
+                elapsed = now - start
+                soak.sample_memory(elapsed)
+                if args.tracemalloc and baseline is None and elapsed >= args.warmup:
+                    baseline = tracemalloc.take_snapshot()
+                if soak.call_seconds:
+                    print(_format_interval(soak.report(elapsed, *reported)), flush=True)
+                    reported = (len(soak.call_seconds), len(soak.fetch_seconds))
+                next_report += args.report_every
+            if now < next_call:
+                stop.wait(min(next_call, next_report) - now)
+                continue
+            soak.call()
+            next_call += period
+            if next_call < time.monotonic():
+                soak.late_calls += 1
+                next_call = time.monotonic()  # no catch-up burst after a slow call
+        elapsed = time.monotonic() - start
+        soak.sample_memory(elapsed)
+        stats = soak.report(elapsed)
+    finally:
+        if standin is not None:
+            standin.stop()
+
+    snapshot_diff = []
+    if args.tracemalloc:
+        current = tracemalloc.take_snapshot()
+        top = current.compare_to(baseline or current, "lineno")[:args.tracemalloc]
+        snapshot_diff = [str(entry) for entry in top]
+    _print_summary(stats, snapshot_diff)
+    if args.out:
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'argv': sys.argv[1:] if argv is None else argv,
+            },
+            'results': stats | {'tracemalloc_top': snapshot_diff},
+        }
+        with open(args.out, "w") as fp:
+            json.dump(report, fp, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,337 @@
+"""
+Local stand-in for the SP-API Sales getOrderMetrics and LWA token endpoints,
+so AmazonClient's retries, token refresh and throttling can be exercised
+without calling Amazon.
+
+    python -m benchmarks.standin --port 9130 --latency lognormal:0.3,0.5 --token-ttl 600
+
+and point the tracker (or benchmarks.soak) at it:
+
+    SP_API_ENDPOINT=http://127.0.0.1:9130
+    LWA_ENDPOINT=http://127.0.0.1:9130/auth/o2/token
+
+Payloads cover the requested interval bucket by bucket (days or hours, years
+of them if asked) with counts that depend only on the marketplace and bucket,
+so repeated fetches agree. Faults are injected as SP-API reports them: 429
+QuotaExceeded when the server-side token bucket is empty (or at random), 403
+Unauthorized for access tokens past --token-ttl (or revoked at random) and 503
+at random. LWA can also rotate refresh tokens (--rotate-prob). GET
+/_standin/stats returns request counters as JSON.
+"""
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import argparse
+import datetime
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .synthetic import payload_entry
+
+ORDER_METRICS_PATH = "/sales/v1/orderMetrics"
+TOKEN_PATH = "/auth/o2/token"
+STATS_PATH = "/_standin/stats"
+
+CURRENCIES = {
+    'ATVPDKIKX0DER': "USD", 'A2EUQ1WTGCTBG2': "CAD", 'A1AM78C64UM0Y8': "MXN", 'A2Q3Y263D00KWC': "BRL",
+    'A1F83G8C2ARO7P': "GBP", 'A1PA6795UKMFR9': "EUR", 'A13V1IB3VIYZZH': "EUR", 'APJ6JRA9NG5V4': "EUR",
+    'A1RKKUPIHCS9HS': "EUR", 'A1VC38T7YXB528': "JPY", 'A39IBJ37TRP1C6': "AUD",
+}
+
+THROTTLED = {'code': "QuotaExceeded", 'message': "You exceeded your quota for the requested resource."}
+EXPIRED = {'code': "Unauthorized", 'message': "Access to requested resource is denied.",
+           'details': "The access token you provided has expired."}
+INVALID = {'code': "Unauthorized", 'message': "Access to requested resource is denied.",
+           'details': "The access token you provided is revoked, malformed or invalid."}
+UNAVAILABLE = {'code': "ServiceUnavailable", 'message': "Service temporarily unavailable."}
+
+
+def parse_latency(spec):
+    """
+    A delay sampler from 'S' or 'const:S', 'uniform:LO,HI', 'lognormal:MEDIAN,SIGMA'
+    or 'exp:MEAN' (seconds). The sampler takes a random.Random.
+    """
+    kind, _, params = spec.partition(":") if ":" in spec else ("const", "", spec)
+    try:
+        values = [float(v) for v in params.split(",")] if params else []
+        if kind == "const" and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == "uniform" and len(values) == 2:
+            return lambda rng: rng.uniform(*values)
+        if kind == "lognormal" and len(values) == 2:
+            return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+        if kind == "exp" and len(values) == 1:
+            return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Bad latency {spec!r}: expected S, const:S, uniform:LO,HI, lognormal:MEDIAN,SIGMA or exp:MEAN")
+
+
+def parse_throttle(spec):
+    """'RATE,BURST' (requests per second, bucket size) -> (rate, burst); a rate of 0 disables throttling."""
+    rate, _, burst = spec.partition(",")
+    try:
+        return float(rate), float(burst or 1)
+    except ValueError:
+        raise ValueError(f"Bad throttle {spec!r}: expected RATE,BURST") from None
+
+
+def _spec(parse):
+    """An argparse type that validates a spec with parse but keeps the string (to pass it on)."""
+    def check(spec):
+        try:
+            parse(spec)
+        except ValueError as e:
+            raise argparse.ArgumentTypeError(str(e)) from None
+        return spec
+    return check
+
+
+def add_fault_arguments(parser):
+    """The stand-in's latency and fault options (shared with benchmarks.soak)."""
+    group = parser.add_argument_group("stand-in faults")
+    group.add_argument("--latency", type=_spec(parse_latency), default="lognormal:0.25,0.4",
+                       help="getOrderMetrics response delay (default lognormal:0.25,0.4)")
+    group.add_argument("--lwa-latency", type=_spec(parse_latency), default="lognormal:0.15,0.3",
+                       help="LWA token response delay (default lognormal:0.15,0.3)")
+    group.add_argument("--per-entry-latency", type=float, default=0.0,
+                       help="extra seconds per payload entry, for large-payload slowdowns")
+    group.add_argument("--throttle", type=_spec(parse_throttle), default="0.5,15", metavar="RATE,BURST",
+                       help="server-side token bucket for getOrderMetrics; 0 disables (default 0.5,15)")
+    group.add_argument("--throttle-prob", type=float, default=0.0, help="probability of an extra random 429")
+    group.add_argument("--token-ttl", type=float, default=3600.0,
+                       help="seconds after issue that an access token is rejected with 403")
+    group.add_argument("--expire-prob", type=float, default=0.0,
+                       help="probability that a request finds its token expired (the token is revoked)")
+    group.add_argument("--error-prob", type=float, default=0.0, help="probability of a random 503")
+    group.add_argument("--lwa-error-prob", type=float, default=0.0, help="probability of an LWA 500")
+    group.add_argument("--rotate-prob", type=float, default=0.0,
+                       help="probability that LWA hands back a new refresh token (both stay valid)")
+    group.add_argument("--seed", type=int, default=None, help="seed for latencies and faults")
+    return group
+
+
+FAULT_OPTIONS = ("latency", "lwa_latency", "per_entry_latency", "throttle", "throttle_prob", "token_ttl",
+                 "expire_prob", "error_prob", "lwa_error_prob", "rotate_prob", "seed")
+
+
+def fault_argv(args):
+    """The fault options of parsed args as command-line arguments for a stand-in subprocess."""
+    argv = []
+    for option in FAULT_OPTIONS:
+        value = getattr(args, option)
+        if value is not None:
+            argv += [f"--{option.replace('_', '-')}", str(value)]
+    return argv
+
+
+def _buckets(start, end, granularity):
+    """(begin, end) pairs covering [start, end) in the start's UTC offset; the last one is cut at end."""
+    step = datetime.timedelta(hours=1) if granularity == "Hour" else datetime.timedelta(days=1)
+    begin = start
+    while begin < end:
+        yield begin, min(begin + step, end)
+        begin += step
+
+
+def _utc_offset(dt):
+    offset = dt.strftime("%z") or "+0000"
+    return f"{offset[:3]}:{offset[3:]}"
+
+
+def order_metrics(marketplace_id, interval, granularity):
+    """The getOrderMetrics payload for one marketplace and interval ('start--end', ISO 8601 with offsets)."""
+    start, end = (datetime.datetime.fromisoformat(part) for part in interval.split("--"))
+    currency = CURRENCIES.get(marketplace_id, "USD")
+    offset = _utc_offset(start)
+    top = 4 if granularity == "Hour" else 40
+    payload = []
+    for begin, stop in _buckets(start, end, granularity):
+        rng = random.Random(f"{marketplace_id}|{granularity}|{begin:%Y-%m-%dT%H}")
+        units = rng.randint(0, top)
+        orders = max(0, units - rng.randint(0, 3))
+        payload.append(payload_entry(begin, stop, units, orders, offset, currency))
+    return payload
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, options):
+        super().__init__(address, StandinHandler)
+        self.options = options
+        self.latency = parse_latency(options.latency)
+        self.lwa_latency = parse_latency(options.lwa_latency)
+        self.throttle = parse_throttle(options.throttle)
+        self.rng = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.tokens = {}  # access token -> time.monotonic() of issue
+        self.stats = Counter()
+        self.started = time.monotonic()
+        self._bucket = [self.throttle[1], time.monotonic()]  # tokens, last refill
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def take_quota(self):
+        """One getOrderMetrics token from the server-side bucket; False means throttle."""
+        rate, burst = self.throttle
+        if rate <= 0:
+            return True
+        with self.lock:
+            now = time.monotonic()
+            tokens = min(burst, self._bucket[0] + (now - self._bucket[1]) * rate)
+            self._bucket[:] = [tokens - 1 if tokens >= 1 else tokens, now]
+            return tokens >= 1
+
+    def issue_token(self):
+        token = f"Atza|standin-{uuid.uuid4().hex}"
+        with self.lock:
+            now = time.monotonic()
+            ttl = self.options.token_ttl
+            for old in [t for t, issued in self.tokens.items() if now - issued > 2 * ttl]:
+                del self.tokens[old]  # long expired: no need to tell them from unknown ones any more
+            self.tokens[token] = now
+        return token
+
+    def check_token(self, token):
+        """None if the token is good, else the 403 error to send."""
+        with self.lock:
+            issued = self.tokens.get(token)
+            if issued is None:
+                return INVALID
+            if time.monotonic() - issued > self.options.token_ttl or self.rng.random() < self.options.expire_prob:
+                self.tokens[token] = issued - self.options.token_ttl  # stays expired
+                return EXPIRED
+        return None
+
+    def snapshot(self):
+        with self.lock:
+            return {'uptime': time.monotonic() - self.started, 'live_tokens': len(self.tokens), **self.stats}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StandinSPAPI/1.0"
+
+    def _send_json(self, status, body, headers=()):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count("bytes_sent", len(data))
+
+    def _sleep(self, sampler):
+        time.sleep(max(0.0, sampler(self.server.rng)))
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == STATS_PATH:
+            self._send_json(200, self.server.snapshot())
+        elif url.path == ORDER_METRICS_PATH:
+            self._order_metrics(parse_qs(url.query))
+        else:
+            self._send_json(404, {'errors': [{'code': "NotFound", 'message': f"No route for {url.path}"}]})
+
+    def _order_metrics(self, query):
+        server, options = self.server, self.server.options
+        rate = server.throttle[0]
+        rate_headers = [("x-amzn-RateLimit-Limit", f"{rate:g}")] if rate > 0 else []
+        self._sleep(server.latency)
+
+        def fail(status, error):
+            server.count(f"order_metrics_{status}")
+            self._send_json(status, {'errors': [error]}, rate_headers)
+
+        error = server.check_token(self.headers.get("x-amz-access-token"))
+        if error is not None:
+            return fail(403, error)
+        if not server.take_quota() or server.rng.random() < options.throttle_prob:
+            return fail(429, THROTTLED)
+        if server.rng.random() < options.error_prob:
+            return fail(503, UNAVAILABLE)
+        try:
+            marketplace_ids = [m for value in query.get("marketplaceIds", []) for m in value.split(",") if m]
+            payload = order_metrics(marketplace_ids[0], query["interval"][0], query.get("granularity", ["Day"])[0])
+        except (KeyError, IndexError, ValueError) as e:
+            return fail(400, {'code': "InvalidInput", 'message': f"Bad request: {e}"})
+        if options.per_entry_latency:
+            time.sleep(options.per_entry_latency * len(payload))
+        server.count("order_metrics_200")
+        server.count("payload_entries", len(payload))
+        self._send_json(200, {'payload': payload}, rate_headers)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != TOKEN_PATH:
+            self._send_json(404, {'error': "not_found", 'error_description': self.path})
+            return
+        server, options = self.server, self.server.options
+        length = int(self.headers.get("Content-Length") or 0)
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        self._sleep(server.lwa_latency)
+        if server.rng.random() < options.lwa_error_prob:
+            server.count("token_500")
+            self._send_json(500, {'error': "ServerError", 'error_description': "Internal server error"})
+            return
+        if form.get("grant_type") != "refresh_token" or not form.get("refresh_token") or not form.get("client_id"):
+            server.count("token_400")
+            self._send_json(400, {'error': "invalid_grant", 'error_description': "Missing or invalid refresh token"})
+            return
+        refresh_token = form["refresh_token"]
+        if server.rng.random() < options.rotate_prob:
+            refresh_token = f"Atzr|standin-{uuid.uuid4().hex}"
+            server.count("token_rotated")
+        server.count("token_200")
+        self._send_json(200, {
+            'access_token': server.issue_token(),
+            'refresh_token': refresh_token,
+            'token_type': "bearer",
+            'expires_in': int(options.token_ttl),
+        })
+
+    def log_message(self, format, *args):
+        pass  # thousands of requests an hour; the counters are the log
+
+
+def start_standin(options, port=0, host="127.0.0.1"):
+    """Serve the stand-in from a daemon thread; options as parsed by add_fault_arguments."""
+    server = StandinServer((host, port), options)
+    threading.Thread(target=server.serve_forever, name="standin-http", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9130, help="0 picks a free port")
+    parser.add_argument("--host", default="127.0.0.1")
+    add_fault_arguments(parser)
+    args = parser.parse_args(argv)
+    server = StandinServer((args.host, args.port), args)
+    print(f"Stand-in listening on {server.url}", flush=True)  # benchmarks.soak reads the URL from here
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+"""
+Synthetic getOrderMetrics payloads for benchmarks and offline testing.
+"""
+import datetime
+import random
+
+
+def payload_entry(begin, end, units, orders, utc_offset="-07:00", currency="USD"):
+    """One getOrderMetrics entry for the bucket [begin, end) (naive local datetimes)."""
+    return {
+        'interval': f"{begin:%Y-%m-%dT%H:%M:%S}{utc_offset}--{end:%Y-%m-%dT%H:%M:%S}{utc_offset}",
+        'unitCount': units,
+        'orderItemCount': units,
+        'orderCount': orders,
+        'averageUnitPrice': {'amount': 19.99, 'currencyCode': currency},
+        'totalSales': {'amount': round(units * 19.99, 2), 'currencyCode': currency},
+    }
+
+
+def order_metrics_payload(days, end_day=None, utc_offset="-07:00", currency="USD", seed=0, granularity="Day"):
+    """
+    Build a list of getOrderMetrics entries shaped like the SP-API response:
+    one entry per day (or per hour with granularity='Hour') ending at end_day.
+    """
+    rng = random.Random(seed)
+    end_day = end_day or datetime.date.today()
+    start = datetime.datetime.combine(end_day - datetime.timedelta(days=days - 1), datetime.time.min)
+    step = datetime.timedelta(hours=1) if granularity == "Hour" else datetime.timedelta(days=1)
+    count = days * 24 if granularity == "Hour" else days
+
+    payload = []
+    for i in range(count):
+        begin = start + i * step
+        units = rng.randint(0, 40 if granularity == "Day" else 4)
+        orders = max(0, units - rng.randint(0, 3))
+        payload.append(payload_entry(begin, begin + step, units, orders, utc_offset, currency))
+    return payload
@@ -1,16 +1,57 @@
 import logging
 import datetime
 import time
+import threading
+from collections import defaultdict
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
 from zoneinfo import ZoneInfo
-from sp_api.api import Sales
 from sp_api.base import Marketplaces, Granularity
-from sp_api.base.exceptions import SellingApiForbiddenException
-from ..config import AMAZON_CLIENT_ID, AMAZON_CLIENT_SECRET, AMAZON_REFRESH_TOKEN
+from sp_api.base.exceptions import (
+    SellingApiException,
+    SellingApiForbiddenException,
+    SellingApiRequestThrottledException,
+    SellingApiServerException,
+    SellingApiTemporarilyUnavailableException,
+    SellingApiGatewayTimeoutException,
+)
+from requests.exceptions import ConnectionError as RequestsConnectionError, Timeout as RequestsTimeout
+from ..config import (
+    AMAZON_CLIENT_ID, AMAZON_CLIENT_SECRET, AMAZON_REFRESH_TOKEN,
+    METRICS_DB_PATH, METRICS_SETTLE_DAYS, MAX_FETCH_WORKERS,
+    FETCH_MAX_RETRIES, FETCH_BACKOFF_BASE, FETCH_BACKOFF_CAP, RESPONSE_CACHE_TTL,
+    INTRADAY, INTRADAY_SETTLE_HOURS, DAILY_REFRESH_INTERVAL, TIMEZONE,
+    SP_API_ENDPOINT, LWA_ENDPOINT, ROLLUP_WEEKS, ROLLUP_MONTHS,
+)
+from .metrics_store import MetricsStore
+from .scheduler import RateLimiter, backoff_delay
+from .cache import SWRCache
+from .order_metrics import OrderMetrics, MarketplaceMetrics
+from .rollups import RollupIndex, Rollups, rollup_days
+from .auth import TimedAccessTokenClient
+from .session import PooledSales, new_session
+from ..instrumentation import SP_API_REQUEST_SECONDS, SP_API_RETRIES, take_lwa_time
 
 logger = logging.getLogger(__name__)
 
+# Longest wait between checks for access tokens due a refresh (seconds)
+TOKEN_CHECK_INTERVAL = 60.0
+
+# Errors worth retrying: expired tokens (403), throttling (429), 5xx and network failures
+RETRYABLE_EXCEPTIONS = (
+    SellingApiForbiddenException,
+    SellingApiRequestThrottledException,
+    SellingApiServerException,
+    SellingApiTemporarilyUnavailableException,
+    SellingApiGatewayTimeoutException,
+    RequestsConnectionError,
+    RequestsTimeout,
+)
+
 class AmazonClient:
-    def __init__(self, timezone_str="America/Los_Angeles"):
+    def __init__(self, timezone_str=TIMEZONE, store=None, rate_limiter=None, intraday=None,
+                 endpoint=SP_API_ENDPOINT, lwa_endpoint=LWA_ENDPOINT, on_refresh_token=None,
+                 rollup_weeks=ROLLUP_WEEKS, rollup_months=ROLLUP_MONTHS):
         self.base_credentials = { # Renamed to avoid confusion with instance-specific creds
             'refresh_token': AMAZON_REFRESH_TOKEN,
             'lwa_app_id': AMAZON_CLIENT_ID,
@@ -22,6 +63,35 @@ class AmazonClient:
         self.timezone = ZoneInfo(timezone_str)
         self.timezone_str = timezone_str
         self._api_clients = {}  # Cache for {marketplace_id_str: client_instance}
+        self._api_clients_lock = threading.Lock()  # Marketplaces may be fetched from worker threads
+        # Per-operation token buckets shared by all marketplaces (limits are per selling partner)
+        self.rate_limiter = rate_limiter or RateLimiter()
+        # Last good merged results, served while a refresh is in flight or failing
+        self.response_cache = SWRCache(ttl=RESPONSE_CACHE_TTL)
+        # Persistent cache of closed daily buckets; disabled when METRICS_DB_PATH is empty
+        if store is None and METRICS_DB_PATH:
+            store = MetricsStore(METRICS_DB_PATH)
+        self.store = store
+        # Intraday mode: today's hourly buckets are fetched incrementally and summed into today's row
+        self.intraday = INTRADAY if intraday is None else intraday
+        self._intraday = {}  # marketplace_id -> (local date, hour of the last fetch, hourly OrderMetrics)
+        self._intraday_lock = threading.Lock()
+        self._daily_refreshed = {}  # marketplace_id -> (first day of the window, time.monotonic() of the refresh)
+        # Long-history pages: a rollup index per marketplace, seeded with rollup_days of history
+        # on its first fetch and then updated from each poll's window
+        self.rollup_weeks, self.rollup_months = rollup_weeks, rollup_months
+        self.rollup_days = rollup_days(rollup_weeks, rollup_months)
+        self._rollups = {}  # marketplace_id -> RollupIndex
+        self._rollups_lock = threading.Lock()
+        # Overrides of the marketplace's SP-API endpoint and of the LWA token URL (empty: Amazon's)
+        self.endpoint = endpoint.rstrip("/")
+        self.lwa_endpoint = lwa_endpoint
+        # Keep-alive connections shared by every marketplace's client, for SP-API and LWA alike
+        self.session = new_session()
+        # Called with a refresh token LWA rotated, to persist it (the token is in use before it returns)
+        self.on_refresh_token = on_refresh_token
+        self._refresher = None
+        self._refresher_stop = threading.Event()
         logger.info(f"Amazon client initialized with timezone: {timezone_str}. Refresh token loaded from environment.")
 
     def _get_sales_client(self, marketplace: Marketplaces):
@@ -31,19 +101,28 @@ class AmazonClient:
         """
         marketplace_key = marketplace.marketplace_id # Assuming marketplace_id is a unique string
 
-        if marketplace_key not in self._api_clients:
-            logger.info(f"Creating new Sales API client for marketplace: {marketplace.name} ({marketplace_key})")
-            # Pass a copy of base_credentials. The library might modify the credentials dict
-            # (e.g., with an access token), though it typically handles this internally.
-            # More importantly, each client instance needs its own credential state.
-            client_credentials = self.base_credentials.copy()
-            self._api_clients[marketplace_key] = Sales(
-                credentials=client_credentials,
-                marketplace=marketplace
-            )
-        else:
-            logger.debug(f"Reusing existing Sales API client for marketplace: {marketplace.name} ({marketplace_key})")
-        return self._api_clients[marketplace_key]
+        with self._api_clients_lock:
+            if marketplace_key not in self._api_clients:
+                logger.info(f"Creating new Sales API client for marketplace: {marketplace.name} ({marketplace_key})")
+                # Pass a copy of base_credentials. The library might modify the credentials dict
+                # (e.g., with an access token), though it typically handles this internally.
+                # More importantly, each client instance needs its own credential state.
+                client_credentials = self.base_credentials.copy()
+                sales_api = PooledSales(
+                    credentials=client_credentials,
+                    marketplace=marketplace,
+                    auth_token_client_class=TimedAccessTokenClient,  # records LWA refresh latency
+                    session=self.session,
+                )
+                sales_api._auth.on_refresh_token = self._refresh_token_rotated
+                if self.endpoint:
+                    sales_api.endpoint = self.endpoint
+                if self.lwa_endpoint:
+                    sales_api._auth.set_token_url(self.lwa_endpoint)
+                self._api_clients[marketplace_key] = sales_api
+            else:
+                logger.debug(f"Reusing existing Sales API client for marketplace: {marketplace.name} ({marketplace_key})")
+            return self._api_clients[marketplace_key]
 
     def _invalidate_sales_client(self, marketplace: Marketplaces):
         """
@@ -51,38 +130,412 @@ class AmazonClient:
         Useful if the client's token state is believed to be irrevocably bad.
         """
         marketplace_key = marketplace.marketplace_id
-        if marketplace_key in self._api_clients:
-            logger.warning(f"Invalidating cached Sales API client for marketplace: {marketplace.name} ({marketplace_key})")
-            del self._api_clients[marketplace_key]
+        with self._api_clients_lock:
+            if marketplace_key in self._api_clients:
+                logger.warning(f"Invalidating cached Sales API client for marketplace: {marketplace.name} ({marketplace_key})")
+                del self._api_clients[marketplace_key]
 
-    def get_sales_data(self, metric_type='sales', days=30, marketplace=Marketplaces.US):
+    def set_credentials(self, lwa_app_id, lwa_client_secret, refresh_token):
         """
-        Get sales data from Amazon Seller API using Analytics API.
+        Switch to new LWA credentials without a restart. Every cached Sales client
+        holds the old ones, so they are dropped and rebuilt on their next request.
+        Returns True if the credentials changed.
+        """
+        credentials = {'lwa_app_id': lwa_app_id, 'lwa_client_secret': lwa_client_secret, 'refresh_token': refresh_token}
+        with self._api_clients_lock:
+            if all(self.base_credentials[key] == value for key, value in credentials.items()):
+                return False
+            self.base_credentials = {**self.base_credentials, **credentials}
+            stale = len(self._api_clients)
+            self._api_clients.clear()
+        logger.info(f"Credentials updated; {stale} Sales API client(s) will be rebuilt")
+        return True
+
+    def _refresh_token_rotated(self, old, new):
+        """LWA returned a new refresh token: persist it, then use it for every client that had the old one."""
+        logger.warning("LWA rotated the refresh token; saving the new one")
+        if self.on_refresh_token is not None:
+            try:
+                self.on_refresh_token(new)
+            except Exception as e:
+                # Keep going with the new token: the old one may no longer be accepted
+                logger.error(f"Could not persist the rotated refresh token: {e}")
+        with self._api_clients_lock:
+            if self.base_credentials['refresh_token'] == old:
+                self.base_credentials = {**self.base_credentials, 'refresh_token': new}
+            for sales_api in self._api_clients.values():
+                if sales_api._auth.cred.refresh_token == old:
+                    sales_api._auth.cred.refresh_token = new
+
+    def refresh_tokens(self):
+        """
+        Refresh every cached client's access token that is close to expiry, so
+        no fetch waits on LWA. Clients sharing a refresh token share the access
+        token, which is refreshed once. Returns the seconds until the next one is due.
+        """
+        margin = self.base_credentials['lwa_options']['refresh_earlier']
+        with self._api_clients_lock:
+            clients = list(self._api_clients.values())
+        # Until the first client exists (it is created on the first fetch), look again soon
+        next_due, seen = TOKEN_CHECK_INTERVAL if clients else 5.0, set()
+        for sales_api in clients:
+            auth = sales_api._auth
+            key = auth._get_cache_key()
+            if key in seen:
+                continue
+            seen.add(key)
+            if auth.seconds_until_refresh(margin) <= 0:
+                logger.debug(f"Refreshing the access token for {sales_api.marketplace_id} ahead of expiry")
+                auth.refresh()
+            next_due = min(next_due, auth.seconds_until_refresh(margin))
+        return next_due
+
+    def start_token_refresher(self):
+        """Keep access tokens fresh from a daemon thread (see refresh_tokens) until stop_token_refresher()."""
+        if self._refresher is not None:
+            return
+        self._refresher_stop.clear()
+
+        def run():
+            delay = 0.0
+            while not self._refresher_stop.wait(delay):
+                try:
+                    delay = max(1.0, self.refresh_tokens())
+                except Exception as e:
+                    # The fetch path still refreshes on demand; try again later
+                    logger.warning(f"Pre-emptive access token refresh failed: {e}")
+                    delay = TOKEN_CHECK_INTERVAL
+
+        self._refresher = threading.Thread(target=run, name="lwa-refresher", daemon=True)
+        self._refresher.start()
+
+    def stop_token_refresher(self):
+        self._refresher_stop.set()
+        self._refresher = None
+
+    def retain_marketplaces(self, marketplaces):
+        """Drop the cached clients, intraday state and rollups of marketplaces no longer polled (members or names)."""
+        keep = {(Marketplaces[m] if isinstance(m, str) else m).marketplace_id for m in marketplaces}
+        with self._api_clients_lock:
+            for marketplace_key in [key for key in self._api_clients if key not in keep]:
+                logger.info(f"Dropping Sales API client for marketplace {marketplace_key}")
+                del self._api_clients[marketplace_key]
+        with self._intraday_lock:
+            for marketplace_key in [key for key in self._intraday if key not in keep]:
+                del self._intraday[marketplace_key]
+        with self._rollups_lock:
+            for marketplace_key in [key for key in self._rollups if key not in keep]:
+                del self._rollups[marketplace_key]
+
+    def get_order_metrics(self, days=30, marketplace=Marketplaces.US, keep_raw=False):
+        """
+        Units, orders and sales for the last `days` days as one columnar OrderMetrics,
+        from a single getOrderMetrics call. Closed days are served from the local
+        metrics store; only the still-open days at the end of the window are
+        requested from the API. The raw payload entries are kept only with keep_raw.
         """
         if not isinstance(days, int) or days <= 0:
             raise ValueError("Days parameter must be a positive integer")
+
+        end_date = datetime.datetime.now(self.timezone)
+        first_day = end_date.date() - datetime.timedelta(days=days)
+        if self.intraday:
+            return self._get_order_metrics_intraday(marketplace, first_day, end_date, keep_raw)
+        if self.store is None:
+            payload = self._fetch_order_metrics(marketplace, first_day, end_date)
+            return OrderMetrics.from_payload(payload, keep_raw=keep_raw)
+
+        self._refresh_store(marketplace, first_day, end_date)
+        metrics = self.store.load_metrics(marketplace.marketplace_id, first_day, end_date.date())
+        if keep_raw:
+            metrics = replace(metrics, raw=self.store.load(marketplace.marketplace_id, first_day, end_date.date()))
+        return metrics
+
+    def get_sales_data(self, metric_type='sales', days=30, marketplace=Marketplaces.US, keep_raw=False):
+        """
+        Get sales data from Amazon Seller API using Analytics API.
+        Returns the per-day dict view of get_order_metrics for one metric.
+        """
         if metric_type not in ['sales', 'units']:
             raise ValueError("Metric type must be 'sales' or 'units'")
+        metrics = self.get_order_metrics(days, marketplace, keep_raw=keep_raw)
+        if metric_type == 'sales':
+            return metrics.to_sales_dict()
+        else:  # units
+            return metrics.to_units_dict()
 
-        end_date = datetime.datetime.now(self.timezone)
-        start_date = end_date - datetime.timedelta(days=days)
+    def get_order_metrics_multi(self, marketplaces, days=30, max_workers=None):
+        """
+        Fetch several marketplaces concurrently and merge them into one series.
+        Marketplaces may be given as Marketplaces members or names ('US', 'CA', ...).
+        Each marketplace runs its own get_order_metrics call (and so its own retry loop)
+        on a bounded thread pool. Returns a MarketplaceMetrics with the merged series,
+        each marketplace's own series and the errors of any that failed.
+        Raises the first error only if every marketplace failed.
+        """
+        marketplaces = [Marketplaces[m] if isinstance(m, str) else m for m in marketplaces]
+        if not marketplaces:
+            raise ValueError("At least one marketplace is required")
+
+        workers = min(len(marketplaces), max_workers or MAX_FETCH_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sp-api") as pool:
+            futures = {
+                marketplace: pool.submit(self._get_order_metrics_rolled_up if self.rollup_days
+                                         else self.get_order_metrics, days, marketplace)
+                for marketplace in marketplaces
+            }
+
+        results, errors, first_error = {}, {}, None
+        for marketplace, future in futures.items():
+            try:
+                results[marketplace.name] = future.result()
+            except Exception as e:
+                logger.error(f"Fetching order metrics for {marketplace.name} failed: {e}")
+                errors[marketplace.name] = str(e)
+                first_error = first_error or e
+        if not results:
+            raise first_error
+        today_hourly = None
+        if self.intraday:
+            succeeded = [m for m in marketplaces if m.name in results]
+            today_hourly = OrderMetrics.merge(self.get_today_hourly(m) for m in succeeded)
+        rollups = None
+        if self.rollup_days:
+            # Marketplaces that failed this time keep their rollups from earlier polls
+            with self._rollups_lock:
+                indexes = [self._rollups[m.marketplace_id] for m in marketplaces if m.marketplace_id in self._rollups]
+            rollups = Rollups.from_indexes(indexes, self.rollup_weeks, self.rollup_months)
+        return MarketplaceMetrics(
+            merged=OrderMetrics.merge(results.values()), by_marketplace=results, errors=errors,
+            today_hourly=today_hourly, rollups=rollups,
+        )
+
+    def _get_order_metrics_rolled_up(self, days, marketplace):
+        """
+        get_order_metrics that also feeds the marketplace's rollup index. The
+        first call fetches rollup_days of history to seed it (closed days then
+        come from the store); later calls only apply the days of the window that changed.
+        """
+        with self._rollups_lock:
+            index = self._rollups.get(marketplace.marketplace_id)
+        if index is not None:
+            metrics = self.get_order_metrics(days, marketplace)
+            index.update(metrics)
+            return metrics
+        index = RollupIndex(max_days=self.rollup_days + 31)
+        history = self.get_order_metrics(max(days, self.rollup_days), marketplace)
+        changed = index.update(history)
+        logger.info(f"Rollup index for {marketplace.name} seeded with {len(history)} days ({changed} with sales)")
+        with self._rollups_lock:
+            self._rollups[marketplace.marketplace_id] = index
+        first_day = datetime.datetime.now(self.timezone).date() - datetime.timedelta(days=days)
+        return history.between(start=first_day)
+
+    def get_sales_data_multi(self, marketplaces, metric_type='sales', days=30, max_workers=None):
+        """
+        Dict view of get_order_metrics_multi for one metric: the same shape as
+        get_sales_data plus 'by_marketplace' (per-marketplace results) and
+        'errors' (marketplace name -> error text for any that failed).
+        """
+        if metric_type not in ['sales', 'units']:
+            raise ValueError("Metric type must be 'sales' or 'units'")
+        return self._multi_to_dict(self.get_order_metrics_multi(marketplaces, days, max_workers), metric_type)
+
+    def get_order_metrics_cached(self, marketplaces, days=30, refresh=False):
+        """
+        Stale-while-revalidate wrapper around get_order_metrics_multi.
+        Returns a CacheResult: the last good result for (marketplaces, window,
+        local date) right away, with its age. A result older than RESPONSE_CACHE_TTL
+        triggers one background refresh. Only the first call for a key (e.g. after
+        midnight) waits on the API. Concurrent callers for a key share one upstream call.
+        With refresh=True (a poll that is due) the API is always called, and the
+        cached result is only returned, with the error, when that call fails.
+        """
+        names = tuple(m if isinstance(m, str) else m.name for m in marketplaces)
+        local_date = datetime.datetime.now(self.timezone).date().isoformat()
+        key = (names, days, local_date)
+        loader = lambda: self.get_order_metrics_multi(names, days)
+        return self.response_cache.refresh(key, loader) if refresh else self.response_cache.get(key, loader)
 
-        # Format dates with timezone offset properly
-        start_date_str = start_date.strftime('%Y-%m-%dT00:00:00%z')
-        end_date_str = end_date.strftime('%Y-%m-%dT%H:%M:%S%z')
-        start_date_str = start_date_str[:-2] + ':' + start_date_str[-2:]
-        end_date_str = end_date_str[:-2] + ':' + end_date_str[-2:]
-        interval = (start_date_str, end_date_str)
-        
-        logger.info(f"Fetching {metric_type} data for interval: {interval}, marketplace: {marketplace.name}")
+    def get_sales_data_cached(self, marketplaces, metric_type='sales', days=30, refresh=False):
+        """Dict view of get_order_metrics_cached; units and sales share one cached upstream call."""
+        result = self.get_order_metrics_cached(marketplaces, days, refresh)
+        return replace(result, value=self._multi_to_dict(result.value, metric_type))
+
+    def _multi_to_dict(self, multi, metric_type):
+        if metric_type == 'sales':
+            by_marketplace = {name: m.to_sales_dict() for name, m in multi.by_marketplace.items()}
+            merged = self._merge_sales_results(by_marketplace)
+        else:
+            by_marketplace = {name: m.to_units_dict() for name, m in multi.by_marketplace.items()}
+            merged = multi.merged.to_units_dict()
+            del merged['raw_data']
+        merged['by_marketplace'] = by_marketplace
+        merged['errors'] = dict(multi.errors)
+        return merged
+
+    def _merge_sales_results(self, results):
+        # Marketplaces report in their own currency; amounts are only summed within a currency.
+        sales_by_date = defaultdict(lambda: defaultdict(float))
+        for result in results.values():
+            for day in result['daily_sales']:
+                sales_by_date[day['date']][day['currency']] += day['sales_amount']
+
+        totals_by_currency = defaultdict(float)
+        daily_sales = []
+        for date, by_currency in sorted(sales_by_date.items()):
+            for currency, amount in by_currency.items():
+                totals_by_currency[currency] += amount
+            daily_sales.append({
+                'date': date,
+                'sales_by_currency': {c: round(a, 2) for c, a in by_currency.items()},
+            })
+
+        merged = {
+            'totals_by_currency': {c: round(a, 2) for c, a in totals_by_currency.items()},
+            'daily_sales': daily_sales,
+        }
+        if len(totals_by_currency) <= 1:
+            # Single currency: also expose the get_sales_data field names
+            currency = next(iter(totals_by_currency), "USD")
+            merged['total_sales'] = round(totals_by_currency.get(currency, 0.0), 2)
+            merged['currency'] = currency
+            for day in daily_sales:
+                day['sales_amount'] = day['sales_by_currency'].get(currency, 0.0)
+                day['currency'] = currency
+        return merged
+
+    def get_today_hourly(self, marketplace=Marketplaces.US):
+        """
+        The hourly buckets for the current local day held from the last intraday
+        fetch (no API call). Empty until get_order_metrics has run today.
+        """
+        with self._intraday_lock:
+            day, _, hourly = self._intraday.get(marketplace.marketplace_id, (None, 0, None))
+        if day != datetime.datetime.now(self.timezone).date():
+            return OrderMetrics.empty(unit="h")
+        return hourly
+
+    def _get_order_metrics_intraday(self, marketplace, first_day, end_date, keep_raw):
+        """
+        get_order_metrics in intraday mode. Today comes from its hourly buckets,
+        fetched incrementally on every call; the days before it come from the
+        daily series, which (with a store) is only refreshed every
+        DAILY_REFRESH_INTERVAL seconds or when the window moves.
+        """
+        today = end_date.date()
+        midnight = datetime.datetime.combine(today, datetime.time.min, tzinfo=self.timezone)
+        today_metrics = self._refresh_today(marketplace, end_date).resample("D")
+
+        if self.store is None:
+            payload = self._fetch_order_metrics(marketplace, first_day, midnight) if first_day < today else []
+            metrics = OrderMetrics.merge([OrderMetrics.from_payload(payload), today_metrics])
+            return replace(metrics, raw=payload) if keep_raw else metrics
+
+        marketplace_key = marketplace.marketplace_id
+        window, refreshed_at = self._daily_refreshed.get(marketplace_key, (None, 0.0))
+        if window != first_day or time.monotonic() - refreshed_at > DAILY_REFRESH_INTERVAL:
+            self._refresh_store(marketplace, first_day, midnight)
+            self._daily_refreshed[marketplace_key] = (first_day, time.monotonic())
+        if len(today_metrics):
+            self.store.upsert(marketplace_key, [self._rollup_entry(today_metrics, midnight)], closed_before=today)
+
+        metrics = self.store.load_metrics(marketplace_key, first_day, today)
+        if keep_raw:
+            metrics = replace(metrics, raw=self.store.load(marketplace_key, first_day, today))
+        return metrics
+
+    def _refresh_today(self, marketplace, now):
+        """
+        Fetches today's hourly buckets from the oldest hour that may still change
+        (the hour of the previous fetch, or INTRADAY_SETTLE_HOURS back) and splices
+        them onto the completed hours already held. Returns today's hourly OrderMetrics.
+        """
+        marketplace_key = marketplace.marketplace_id
+        today = now.date()
+        with self._intraday_lock:
+            day, fetched_hour, hourly = self._intraday.get(marketplace_key, (None, 0, None))
+        if day != today:
+            fetched_hour, hourly = 0, OrderMetrics.empty(unit="h")  # new day: fetch it whole
+
+        start_hour = max(0, min(fetched_hour, now.hour - INTRADAY_SETTLE_HOURS))
+        start = datetime.datetime.combine(today, datetime.time(start_hour), tzinfo=self.timezone)
+        if start < now:
+            payload = self._fetch_order_metrics(marketplace, start, now, granularity=Granularity.HOUR)
+            fresh = OrderMetrics.from_payload(payload, unit="h")
+            hourly = OrderMetrics.merge([hourly.between(stop=f"{today.isoformat()}T{start_hour:02d}"), fresh])
+            logger.debug(f"Fetched {len(fresh)} hourly bucket(s) for {marketplace.name} from {start_hour:02d}:00")
+
+        with self._intraday_lock:
+            self._intraday[marketplace_key] = (today, now.hour, hourly)
+        return hourly
+
+    def _rollup_entry(self, day_metrics, midnight):
+        """A getOrderMetrics-shaped daily entry for the store from the hourly sum of one day."""
+        next_midnight = datetime.datetime.combine(
+            midnight.date() + datetime.timedelta(days=1), datetime.time.min, tzinfo=self.timezone
+        )
+        return {
+            'interval': f"{self._format_interval_timestamp(midnight)}--{self._format_interval_timestamp(next_midnight)}",
+            'unitCount': day_metrics.total_units,
+            'orderCount': day_metrics.total_orders,
+            'totalSales': {'amount': day_metrics.total_sales, 'currencyCode': day_metrics.currency or "USD"},
+        }
+
+    def _refresh_store(self, marketplace, first_day, end_date):
+        """
+        Brings the store up to date for first_day..end_date, fetching only the
+        days it does not hold as closed.
+        """
+        today = end_date.date()
+        marketplace_key = marketplace.marketplace_id
+        closed = self.store.closed_days(marketplace_key, first_day, today)
+
+        # Fetch from the oldest day we do not hold as closed. Today is never
+        # closed, so in steady state this is just the settle window.
+        fetch_start = first_day
+        while fetch_start < today and fetch_start.isoformat() in closed:
+            fetch_start += datetime.timedelta(days=1)
+
+        logger.debug(
+            f"{len(closed)} closed day(s) cached for {marketplace.name}; fetching from {fetch_start.isoformat()}"
+        )
+        if datetime.datetime.combine(fetch_start, datetime.time.min, tzinfo=self.timezone) >= end_date:
+            return  # everything up to end_date is closed (intraday mode stops at midnight)
+        payload = self._fetch_order_metrics(marketplace, fetch_start, end_date)
+        closed_before = today - datetime.timedelta(days=METRICS_SETTLE_DAYS)
+        self.store.upsert(marketplace_key, payload, closed_before=closed_before)
+
+    def _format_interval_timestamp(self, dt):
+        # SP-API wants the offset as +HH:MM rather than strftime's +HHMM
+        dt_str = dt.strftime('%Y-%m-%dT%H:%M:%S%z')
+        return dt_str[:-2] + ':' + dt_str[-2:]
+
+    def _fetch_order_metrics(self, marketplace, start_day, end_date, granularity=Granularity.DAY):
+        """
+        Calls getOrderMetrics for [start_day 00:00, end_date] and returns the raw payload list.
+        start_day may also be a timezone-aware datetime (e.g. the first hour of an hourly fetch).
+        """
+        if isinstance(start_day, datetime.datetime):
+            start_date = start_day
+        else:
+            start_date = datetime.datetime.combine(start_day, datetime.time.min, tzinfo=self.timezone)
+        interval = (self._format_interval_timestamp(start_date), self._format_interval_timestamp(end_date))
+
+        logger.info(f"Fetching order metrics for interval: {interval}, marketplace: {marketplace.name}")
 
         # Get a potentially cached, long-lived client instance
         sales_api = self._get_sales_client(marketplace)
 
         retry_count = 0
-        max_retries = 3 # Max retries for this specific operation
-        
-        while retry_count < max_retries:
+        max_retries = FETCH_MAX_RETRIES # Max retries for this specific operation
+
+        request_seconds = SP_API_REQUEST_SECONDS.labels('getOrderMetrics', marketplace.name, granularity.value)
+        while True:
+            # Wait for a getOrderMetrics token so we stay inside the usage plan
+            self.rate_limiter.acquire('getOrderMetrics')
+            take_lwa_time()  # start this attempt's LWA tally from zero
+            request_start = time.perf_counter()
             try:
                 # The sales_api instance, being persistent for this marketplace,
                 # will manage its own access token and use its internally stored
@@ -90,52 +543,58 @@ class AmazonClient:
                 response = sales_api.get_order_metrics(
                     marketplaceIds=[marketplace.marketplace_id],
                     interval=interval,
-                    granularity=Granularity.DAY, # Enum member
-                    granularityTimeZone='US/Pacific' # Or self.timezone_str if appropriate for granularity
+                    granularity=granularity, # Enum member
+                    # Bucket every marketplace by the display timezone so their days line up when merged
+                    granularityTimeZone=self.timezone_str
                 )
+                # Latency of the request itself; a token refresh inside the call is timed separately
+                request_seconds.observe(time.perf_counter() - request_start - take_lwa_time())
+                self.rate_limiter.update_from_headers('getOrderMetrics', response.headers)
 
                 payload = response.payload if hasattr(response, 'payload') and response.payload is not None else []
                 if not isinstance(payload, list):
                     logger.warning(f"Received unexpected payload format or empty payload: {response}")
                     payload = [] # Ensure payload is a list for processing functions
+                return payload
 
-                if metric_type == 'sales':
-                    return self._process_sales_metrics(payload)
-                else:  # units
-                    return self._process_units_metrics(payload)
-
-            except SellingApiForbiddenException as e:
+            except RETRYABLE_EXCEPTIONS as e:
+                request_seconds.observe(time.perf_counter() - request_start - take_lwa_time())
+                SP_API_RETRIES.labels('getOrderMetrics', type(e).__name__).inc()
                 retry_count += 1
-                error_message = str(e)
-                details_str = str(e.response.errors) if e.response and e.response.errors else "No details."
-                is_expired_token_error = 'The access token you provided has expired.' in error_message or \
-                                         ('details' in details_str and 'The access token you provided has expired.' in details_str)
-                
+                error_message = str(getattr(e, 'message', None) or e)
+                details_str = str(getattr(e, 'error', None) or "No details.")
+                if isinstance(e, SellingApiException):
+                    self.rate_limiter.update_from_headers('getOrderMetrics', e.headers)
+                if isinstance(e, SellingApiRequestThrottledException):
+                    # The server's bucket is empty; make ours match before the next attempt
+                    self.rate_limiter.bucket('getOrderMetrics').drain()
+                if isinstance(e, SellingApiForbiddenException):
+                    # An expired or revoked access token: refresh it on the next attempt
+                    sales_api._auth.invalidate()
+
                 logger.warning(
-                    f"SellingApiForbiddenException (Attempt {retry_count}/{max_retries}) for {marketplace.name}. "
-                    f"Expired Token: {is_expired_token_error}. Error: {error_message}. Details: {details_str}"
+                    f"{type(e).__name__} (Attempt {retry_count}/{max_retries}) for {marketplace.name}. "
+                    f"Error: {error_message}. Details: {details_str}"
                 )
-                
+
                 if retry_count >= max_retries:
                     logger.error(
                         f"Maximum retry attempts reached for {marketplace.name}. Unable to complete operation. "
                         f"Last error: {error_message}"
                     )
-                    # If all retries fail, it's possible the client's internal refresh token is bad.
-                    # Invalidating it will cause a new client (using the base refresh token from .env)
-                    # to be created on the *next* call to get_sales_data for this marketplace.
-                    self._invalidate_sales_client(marketplace)
-                    raise # Re-raise the SellingApiForbiddenException
-
-                # For any SellingApiForbiddenException (especially expired token), we assume the library
-                # will attempt to refresh its token on the next try with the same client instance.
-                # The library is designed to do this.
-                sleep_time = retry_count * 2 # Exponential backoff (e.g., 2, 4, 6 seconds)
-                logger.info(f"Retrying in {sleep_time} seconds...")
+                    if isinstance(e, SellingApiForbiddenException):
+                        # If all retries fail, it's possible the client's internal refresh token is bad.
+                        # Invalidating it will cause a new client (using the base refresh token from .env)
+                        # to be created on the *next* call to get_sales_data for this marketplace.
+                        self._invalidate_sales_client(marketplace)
+                    raise
+
+                # For SellingApiForbiddenException (especially expired token), the next try
+                # fetches a fresh access token with the same client instance. Throttling and
+                # 5xx errors just need time, so every class shares the same jittered backoff.
+                sleep_time = backoff_delay(retry_count, base=FETCH_BACKOFF_BASE, cap=FETCH_BACKOFF_CAP)
+                logger.info(f"Retrying in {sleep_time:.1f} seconds...")
                 time.sleep(sleep_time)
-                # No need to re-initialize sales_api, the same instance will retry.
-                # If its internal refresh token is also bad, it *should* ideally bubble up
-                # a more specific LWA error, but often just results in repeated "expired access token".
                 continue
 
             except Exception as e:
@@ -144,45 +603,9 @@ class AmazonClient:
                 # if you suspect its state is corrupted, or just re-raise.
                 # self._invalidate_sales_client(marketplace)
                 raise
-        
-        # This part should ideally not be reached if retries and exceptions are handled.
-        # If it is, it means the loop completed without returning or raising.
-        logger.error(f"Exhausted retries for get_sales_data for {marketplace.name} without success or unhandled exception.")
-        raise RuntimeError(f"Failed to get sales data for {marketplace.name} after {max_retries} attempts.")
-
 
     def _process_sales_metrics(self, metrics_data):
-        total_sales = 0.0
-        currency = "USD"
-        daily_sales = []
-        if not metrics_data: # Handle empty metrics_data
-            return {'total_sales': 0, 'currency': currency, 'daily_sales': [], 'raw_data': metrics_data}
-
-        sorted_data = sorted(metrics_data, key=lambda x: x.get('interval', '').split('--')[0] if x.get('interval') else '')
-        for day_data in sorted_data:
-            sales_info = day_data.get('totalSales', {})
-            amount = float(sales_info.get('amount', 0.0))
-            current_currency = sales_info.get('currencyCode')
-            if current_currency: currency = current_currency
-            total_sales += amount
-            interval_str = day_data.get('interval', '')
-            date_part = interval_str.split('--')[0]
-            date = date_part.split('T')[0] if 'T' in date_part else 'unknown'
-            daily_sales.append({'date': date, 'sales_amount': round(amount, 2), 'currency': currency})
-        return {'total_sales': round(total_sales, 2), 'currency': currency, 'daily_sales': daily_sales, 'raw_data': metrics_data}
+        return OrderMetrics.from_payload(metrics_data, keep_raw=True).to_sales_dict()
 
     def _process_units_metrics(self, metrics_data):
-        total_units = 0
-        daily_units = []
-        if not metrics_data: # Handle empty metrics_data
-            return {'total_units': 0, 'daily_units': [], 'raw_data': metrics_data}
-
-        sorted_data = sorted(metrics_data, key=lambda x: x.get('interval', '').split('--')[0] if x.get('interval') else '')
-        for day_data in sorted_data:
-            units = int(day_data.get('unitCount', 0))
-            total_units += units
-            interval_str = day_data.get('interval', '')
-            date_part = interval_str.split('--')[0]
-            date = date_part.split('T')[0] if 'T' in date_part else 'unknown'
-            daily_units.append({'date': date, 'units_sold': units})
-        return {'total_units': total_units, 'daily_units': daily_units, 'raw_data': metrics_data}
\ No newline at end of file
+        return OrderMetrics.from_payload(metrics_data, keep_raw=True).to_units_dict()
@@ -0,0 +1,87 @@
+"""
+Login with Amazon (LWA) access-token client used by the Sales API clients.
+"""
+import time
+import threading
+from urllib.parse import urlsplit
+import requests
+import sp_api.base  # noqa: F401  -- sp_api.auth cannot be imported before sp_api.base (circular import)
+from sp_api.auth import AccessTokenClient
+from sp_api.auth.access_token_client import cache
+from sp_api.auth.exceptions import AuthorizationError
+from ..instrumentation import record_lwa_refresh
+
+# sp_api cache key -> (time.monotonic() of issue, seconds the token is usable), for pre-emptive refreshes
+_issued = {}
+_issued_lock = threading.Lock()
+
+
+class TimedAccessTokenClient(AccessTokenClient):
+    """
+    AccessTokenClient that records how long each token refresh round trip
+    takes, can refresh ahead of expiry and reports rotated refresh tokens.
+    """
+
+    session = None           # requests.Session to send token requests on (set by PooledSales)
+    timeout = None           # seconds before a token request fails (set by PooledSales)
+    on_refresh_token = None  # called with (old, new) when LWA hands back a different refresh token
+
+    def _request(self, url, data, headers):
+        start = time.perf_counter()
+        try:
+            response = (self.session or requests).post(
+                url, data=data, headers=headers, proxies=self.proxies, verify=self.verify, timeout=self.timeout
+            )
+            token = response.json()
+            if response.status_code != 200:
+                raise AuthorizationError(token.get('error'), token.get('error_description'), response.status_code)
+        finally:
+            record_lwa_refresh(time.perf_counter() - start)
+        # Usable until LWA's expiry or sp_api's cache TTL drops it, whichever comes first
+        lifetime = min(float(token.get('expires_in') or cache.ttl), cache.ttl)
+        key = self._get_cache_key()
+        with _issued_lock:
+            _issued[key] = (time.monotonic(), lifetime)
+        rotated = token.get('refresh_token')
+        if rotated and rotated != self.cred.refresh_token and self.on_refresh_token is not None:
+            self.on_refresh_token(self.cred.refresh_token, rotated)
+            new_key = self._get_cache_key()
+            if new_key != key:
+                # The access token came with the new refresh token; cache it under that one too
+                cache[new_key] = token
+                with _issued_lock:
+                    _issued[new_key] = _issued[key]
+        return token
+
+    def set_token_url(self, url):
+        """Request tokens from url (e.g. a local stand-in) instead of api.amazon.com."""
+        parts = urlsplit(url)
+        self.scheme = f"{parts.scheme}://"
+        self.host = parts.netloc
+        self.path = parts.path or AccessTokenClient.path
+
+    def invalidate(self):
+        """
+        Forget the cached access token, so the next request fetches a new one.
+        sp_api caches it per refresh token for up to SP_API_AUTH_CACHE_TTL and
+        would otherwise keep sending a token the API has already rejected.
+        """
+        cache.pop(self._get_cache_key(), None)
+
+    def seconds_until_refresh(self, margin):
+        """
+        Seconds until the cached access token is within margin of expiring
+        (0 if it already is, or is not cached). The margin is capped at a
+        quarter of the token's lifetime.
+        """
+        key = self._get_cache_key()
+        with _issued_lock:
+            issued = _issued.get(key)
+        if issued is None or key not in cache:
+            return 0.0
+        issued_at, lifetime = issued
+        return max(0.0, issued_at + lifetime - min(margin, lifetime / 4) - time.monotonic())
+
+    def refresh(self):
+        """Fetch a new access token now and cache it in place of the current one."""
+        cache[self._get_cache_key()] = self._request(self.scheme + self.host + self.path, self.data, self.headers)
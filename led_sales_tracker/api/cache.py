@@ -0,0 +1,143 @@
+"""
+Stale-while-revalidate response cache.
+
+A hit younger than the TTL is returned as is. An older hit is still returned
+immediately, and a single background reload is started for it; if that reload
+fails the old value stays in place and the error is reported alongside it.
+Only a miss blocks the caller. Concurrent loads of the same key are coalesced
+into one upstream call.
+
+refresh() is for a caller that polls on its own schedule: it always loads,
+and only falls back to the cached value when the load fails.
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CacheResult:
+    value: Any
+    age: float                    # seconds since the value was loaded
+    stale: bool                   # age exceeded the TTL; a revalidation is (or was) in flight
+    error: Optional[str] = None   # last revalidation error for this key, if it failed
+
+
+@dataclass
+class _Entry:
+    value: Any
+    loaded_at: float
+    error: Optional[str] = None
+
+
+class SWRCache:
+    def __init__(self, ttl, max_entries=32):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> _Entry, least recently used first
+        self._inflight = {}            # key -> Future of the load in progress
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """callback(key, value) runs after every successful background revalidation."""
+        self._listeners.append(callback)
+
+    def get(self, key, loader):
+        """
+        Return a CacheResult for key, calling loader() on a miss (blocking) or
+        in the background when the cached value is older than the TTL.
+        Errors from a blocking load are raised; background errors are not.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            value = self._load(key, loader)
+            return CacheResult(value, age=0.0, stale=False)
+
+        age = time.monotonic() - entry.loaded_at
+        stale = age > self.ttl
+        if stale:
+            self._revalidate(key, loader)
+        return CacheResult(entry.value, age=age, stale=stale, error=entry.error)
+
+    def refresh(self, key, loader):
+        """
+        Load key now (joining a load already in flight) and return it as a fresh
+        CacheResult. If the load fails, the cached value is returned with its age
+        and the error instead; with nothing cached the error is raised.
+        """
+        try:
+            value = self._load(key, loader)
+        except Exception as e:
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                raise
+            return CacheResult(entry.value, age=time.monotonic() - entry.loaded_at, stale=True, error=str(e))
+        return CacheResult(value, age=0.0, stale=False)
+
+    def _load(self, key, loader):
+        """Run loader() once per key at a time; concurrent callers wait for the same result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+        return self._run_load(key, loader, future)
+
+    def _run_load(self, key, loader, future):
+        """Call loader() for the in-flight future registered for key, then store and resolve it."""
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                del self._inflight[key]
+                if key in self._entries:
+                    self._entries[key].error = str(e)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._entries[key] = _Entry(value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def _revalidate(self, key, loader):
+        # Claim the key before the thread starts, so a second stale get() cannot start another
+        with self._lock:
+            if key in self._inflight:
+                return  # already being reloaded
+            future = self._inflight[key] = Future()
+
+        def run():
+            try:
+                value = self._run_load(key, loader, future)
+            except Exception as e:
+                logger.warning(f"Background revalidation of {key} failed; serving stale value: {e}")
+                return
+            for callback in self._listeners:
+                callback(key, value)
+
+        threading.Thread(target=run, name="swr-revalidate", daemon=True).start()
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
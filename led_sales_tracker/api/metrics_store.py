@@ -0,0 +1,131 @@
+"""
+SQLite-backed store of daily order-metrics buckets.
+
+Past days stop changing once late orders have settled, so they only need to be
+downloaded once.  Rows are keyed by (marketplace_id, day) and hold every metric
+returned by getOrderMetrics, so one store serves both the 'units' and 'sales'
+views.  A row is flagged ``closed`` once its day is older than the settle
+window; closed rows are never requested from the API again.
+"""
+import sqlite3
+import logging
+import threading
+from .order_metrics import OrderMetrics
+from ..instrumentation import PARSE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS daily_metrics (
+    marketplace_id TEXT    NOT NULL,
+    day            TEXT    NOT NULL,  -- YYYY-MM-DD in the granularity timezone
+    interval       TEXT    NOT NULL,  -- raw interval string as returned by the API
+    unit_count     INTEGER NOT NULL DEFAULT 0,
+    order_count    INTEGER NOT NULL DEFAULT 0,
+    sales_amount   REAL    NOT NULL DEFAULT 0,
+    currency       TEXT,
+    closed         INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (marketplace_id, day)
+)
+"""
+
+
+class MetricsStore:
+    def __init__(self, path):
+        self.path = str(path)
+        # The connection is shared between the main loop and fetcher threads;
+        # every access goes through self._lock.
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(_SCHEMA)
+        logger.info(f"Metrics store opened at {self.path}")
+
+    def closed_days(self, marketplace_id, first_day, last_day):
+        """Return the set of ISO dates in [first_day, last_day] that are closed."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day FROM daily_metrics "
+                "WHERE marketplace_id = ? AND day BETWEEN ? AND ? AND closed = 1",
+                (marketplace_id, first_day.isoformat(), last_day.isoformat()),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    @PARSE_SECONDS.labels(stage="store_upsert").time()
+    def upsert(self, marketplace_id, metrics_data, closed_before):
+        """
+        Merge raw getOrderMetrics entries into the store.
+        Days strictly before ``closed_before`` (a date) are marked closed.
+        """
+        rows = []
+        cutoff = closed_before.isoformat()
+        for entry in metrics_data:
+            interval_str = entry.get('interval', '')
+            date_part = interval_str.split('--')[0]
+            if 'T' not in date_part:
+                continue
+            day = date_part.split('T')[0]
+            sales_info = entry.get('totalSales') or {}
+            rows.append((
+                marketplace_id,
+                day,
+                interval_str,
+                int(entry.get('unitCount', 0)),
+                int(entry.get('orderCount', 0)),
+                float(sales_info.get('amount', 0.0)),
+                sales_info.get('currencyCode'),
+                1 if day < cutoff else 0,
+            ))
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO daily_metrics "
+                "(marketplace_id, day, interval, unit_count, order_count, sales_amount, currency, closed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def load(self, marketplace_id, first_day, last_day):
+        """
+        Return the stored days in [first_day, last_day] as getOrderMetrics-shaped
+        entries, for callers that ask for the raw payload.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT interval, unit_count, order_count, sales_amount, currency FROM daily_metrics "
+                "WHERE marketplace_id = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (marketplace_id, first_day.isoformat(), last_day.isoformat()),
+            ).fetchall()
+        metrics_data = []
+        for interval_str, units, orders, amount, currency in rows:
+            sales_info = {'amount': amount}
+            if currency:
+                sales_info['currencyCode'] = currency
+            metrics_data.append({
+                'interval': interval_str,
+                'unitCount': units,
+                'orderCount': orders,
+                'totalSales': sales_info,
+            })
+        return metrics_data
+
+    @PARSE_SECONDS.labels(stage="store_load").time()
+    def load_metrics(self, marketplace_id, first_day, last_day):
+        """Return the stored days in [first_day, last_day] as a columnar OrderMetrics."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, unit_count, order_count, sales_amount, currency FROM daily_metrics "
+                "WHERE marketplace_id = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (marketplace_id, first_day.isoformat(), last_day.isoformat()),
+            ).fetchall()
+        if not rows:
+            return OrderMetrics.empty()
+        days, units, orders, sales, currencies = zip(*rows)
+        currency = next((c for c in reversed(currencies) if c), "USD")
+        return OrderMetrics.from_columns(days, units, orders, sales, currency)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,173 @@
+"""
+Compact columnar container for getOrderMetrics results.
+
+A getOrderMetrics payload carries unitCount, orderCount and totalSales for
+every bucket, so one call (parsed once) serves both the units and the sales
+views. Values are held in numpy arrays rather than per-day dicts, and the raw
+payload is only kept when asked for, so years of history stay small.
+The same container holds hourly buckets (dates in datetime64[h]) for the
+intraday view; resample("D") rolls them up into days.
+"""
+from array import array
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Optional
+import numpy as np
+from ..instrumentation import PARSE_SECONDS
+
+
+@dataclass(frozen=True)
+class OrderMetrics:
+    dates: np.ndarray               # datetime64[D] (or [h] for hourly buckets), ascending
+    units: np.ndarray               # int64 unitCount per day
+    orders: np.ndarray              # int64 orderCount per day
+    sales: np.ndarray               # float64 totalSales amount per day (NaN where currencies were mixed)
+    currency: Optional[str] = "USD" # None when merged across currencies
+    raw: Optional[list] = None      # original payload entries, only with keep_raw=True
+
+    @classmethod
+    def empty(cls, currency="USD", unit="D"):
+        return cls(
+            dates=np.array([], dtype=f"datetime64[{unit}]"),
+            units=np.array([], dtype=np.int64),
+            orders=np.array([], dtype=np.int64),
+            sales=np.array([], dtype=np.float64),
+            currency=currency,
+        )
+
+    @classmethod
+    @PARSE_SECONDS.labels(stage="from_payload").time()
+    def from_payload(cls, metrics_data, keep_raw=False, unit="D"):
+        """
+        Parse getOrderMetrics entries in a single pass. Entries without a parsable interval are skipped.
+        unit is "D" for Granularity.DAY payloads and "h" for Granularity.HOUR ones.
+        """
+        key_length = 13 if unit == "h" else 10  # 'YYYY-MM-DDTHH' or 'YYYY-MM-DD' of the local bucket start
+        days, units, orders, sales = [], array("q"), array("q"), array("d")
+        currency = "USD"
+        for entry in metrics_data or []:
+            date_part = entry.get('interval', '').split('--')[0]
+            if 'T' not in date_part:
+                continue
+            days.append(date_part[:key_length])
+            units.append(int(entry.get('unitCount', 0)))
+            orders.append(int(entry.get('orderCount', 0)))
+            sales_info = entry.get('totalSales') or {}
+            sales.append(float(sales_info.get('amount', 0.0)))
+            currency = sales_info.get('currencyCode') or currency
+        return cls.from_columns(
+            days, units, orders, sales, currency,
+            raw=list(metrics_data) if keep_raw and metrics_data else None, unit=unit,
+        )
+
+    @classmethod
+    def from_columns(cls, days, units, orders, sales, currency="USD", raw=None, unit="D"):
+        """Build from parallel sequences (ISO date strings and numbers); sorts by date."""
+        dates = np.array(days, dtype=f"datetime64[{unit}]")
+        order = np.argsort(dates, kind="stable")
+        return cls(
+            dates=dates[order],
+            units=np.asarray(units, dtype=np.int64)[order],
+            orders=np.asarray(orders, dtype=np.int64)[order],
+            sales=np.asarray(sales, dtype=np.float64)[order],
+            currency=currency,
+            raw=raw,
+        )
+
+    @classmethod
+    def merge(cls, metrics):
+        """
+        Sum several series (e.g. one per marketplace) by date. Sales are only
+        summed when every series uses the same currency; otherwise they are NaN
+        and currency is None.
+        """
+        metrics = list(metrics)
+        if not metrics:
+            return cls.empty()
+        if len(metrics) == 1:
+            return metrics[0]
+        dates = np.unique(np.concatenate([m.dates for m in metrics]))
+        units = np.zeros(len(dates), dtype=np.int64)
+        orders = np.zeros(len(dates), dtype=np.int64)
+        sales = np.zeros(len(dates), dtype=np.float64)
+        for m in metrics:
+            index = np.searchsorted(dates, m.dates)
+            np.add.at(units, index, m.units)
+            np.add.at(orders, index, m.orders)
+            np.add.at(sales, index, m.sales)
+        currencies = {m.currency for m in metrics if len(m.dates)}
+        currency = currencies.pop() if len(currencies) == 1 else (None if currencies else metrics[0].currency)
+        if currency is None:
+            sales[:] = np.nan
+        return cls(dates=dates, units=units, orders=orders, sales=sales, currency=currency)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def unit(self):
+        """'D' for daily buckets, 'h' for hourly ones."""
+        return np.datetime_data(self.dates.dtype)[0]
+
+    def between(self, start=None, stop=None):
+        """The rows with start <= date < stop (either bound may be None)."""
+        keep = np.ones(len(self.dates), dtype=bool)
+        if start is not None:
+            keep &= self.dates >= np.datetime64(start, self.unit)
+        if stop is not None:
+            keep &= self.dates < np.datetime64(stop, self.unit)
+        return replace(self, dates=self.dates[keep], units=self.units[keep],
+                       orders=self.orders[keep], sales=self.sales[keep], raw=None)
+
+    def resample(self, unit="D"):
+        """Sum the buckets into coarser ones, e.g. hours into days."""
+        dates, index = np.unique(self.dates.astype(f"datetime64[{unit}]"), return_inverse=True)
+        units = np.zeros(len(dates), dtype=np.int64)
+        orders = np.zeros(len(dates), dtype=np.int64)
+        sales = np.zeros(len(dates), dtype=np.float64)
+        np.add.at(units, index, self.units)
+        np.add.at(orders, index, self.orders)
+        np.add.at(sales, index, self.sales)
+        return replace(self, dates=dates, units=units, orders=orders, sales=sales, raw=None)
+
+    @property
+    def total_units(self):
+        return int(self.units.sum())
+
+    @property
+    def total_orders(self):
+        return int(self.orders.sum())
+
+    @property
+    def total_sales(self):
+        return round(float(self.sales.sum()), 2)
+
+    def iso_dates(self):
+        return np.datetime_as_string(self.dates, unit=self.unit).tolist()
+
+    def to_units_dict(self):
+        """The dict shape returned by get_sales_data(metric_type='units')."""
+        daily_units = [
+            {'date': date, 'units_sold': units}
+            for date, units in zip(self.iso_dates(), self.units.tolist())
+        ]
+        return {'total_units': self.total_units, 'daily_units': daily_units, 'raw_data': self.raw or []}
+
+    def to_sales_dict(self):
+        """The dict shape returned by get_sales_data(metric_type='sales')."""
+        currency = self.currency or "USD"
+        daily_sales = [
+            {'date': date, 'sales_amount': round(amount, 2), 'currency': currency}
+            for date, amount in zip(self.iso_dates(), self.sales.tolist())
+        ]
+        return {'total_sales': self.total_sales, 'currency': currency, 'daily_sales': daily_sales,
+                'raw_data': self.raw or []}
+
+
+@dataclass(frozen=True)
+class MarketplaceMetrics:
+    """Result of fetching several marketplaces: the merged series plus each marketplace's own."""
+    merged: OrderMetrics
+    by_marketplace: Dict[str, OrderMetrics]
+    errors: Dict[str, str]
+    today_hourly: Optional[OrderMetrics] = None  # merged hourly buckets for the local day, in intraday mode
+    rollups: Optional[Any] = None   # rollups.Rollups for the long-history pages, when enabled
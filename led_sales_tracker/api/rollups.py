@@ -0,0 +1,253 @@
+"""
+Rollup index over the daily order metrics: per-day values plus ISO-week and
+calendar-month sums and trailing 7/30-day sums, kept in numpy arrays and
+updated in place.
+
+The long-history pages ("52 weeks", "24 months", each against the year before)
+draw from it. An update only touches the days that changed since the last one
+(today and the settle window, once seeded), and each page reads O(panel width)
+precomputed buckets rather than summing years of days on every poll.
+"""
+import datetime
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+from .order_metrics import OrderMetrics
+
+logger = logging.getLogger(__name__)
+
+TRAILING_WINDOWS = (7, 30)
+YEAR_WEEKS = 52              # the year-over-year week compares with the one 364 days earlier
+_COLUMNS = 3                 # units, orders, sales
+_REBUILD_DAYS = 64           # with more changed days than this (e.g. seeding), re-derive in bulk
+
+
+def rollup_days(weeks=0, months=0):
+    """Days of daily history the index needs for `weeks` weeks and `months` months, each with the year before."""
+    needed = 0
+    if weeks:
+        needed = max(needed, (weeks + YEAR_WEEKS) * 7)
+    if months:
+        needed = max(needed, (months + 12) * 31)
+    return needed
+
+
+def _week_start(day):
+    """Monday of the ISO week of day (datetime64[D] scalar or array)."""
+    days = np.asarray(day, dtype="datetime64[D]").astype(np.int64)
+    return (days - (days + 3) % 7).astype("datetime64[D]")  # 1970-01-01 was a Thursday
+
+
+def _year_before(day):
+    """The same calendar date a year earlier (28 February for 29 February)."""
+    date = day.astype(datetime.date)
+    try:
+        return np.datetime64(date.replace(year=date.year - 1), "D")
+    except ValueError:
+        return np.datetime64(date.replace(year=date.year - 1, day=28), "D")
+
+
+class RollupIndex:
+    """
+    One marketplace's daily metrics and their rollups. Days are indexed from
+    self.origin; weeks from the Monday of its week and months from its month.
+    Days never reported count as zero.
+    """
+
+    def __init__(self, max_days=None):
+        self.max_days = max_days  # older days are dropped once the index grows past this (None: keep all)
+        self.currency = "USD"
+        self.origin = None
+        self.last = None          # the latest day seen
+        self._days = np.zeros((0, _COLUMNS))
+        self._weeks = np.zeros((0, _COLUMNS))
+        self._months = np.zeros((0, _COLUMNS))
+        self._trailing = {window: np.zeros((0, _COLUMNS)) for window in TRAILING_WINDOWS}
+
+    def __len__(self):
+        return len(self._days)
+
+    def _week_index(self, index):
+        return (_week_start(self.origin + index) - _week_start(self.origin)).astype(np.int64) // 7
+
+    def _month_index(self, index):
+        origin_month = self.origin.astype("datetime64[M]")
+        return ((self.origin + index).astype("datetime64[M]") - origin_month).astype(np.int64)
+
+    def _rebuild(self):
+        """Derive every rollup from the daily values (after the origin moved)."""
+        n = len(self._days)
+        index = np.arange(n)
+        self._weeks = np.zeros((int(self._week_index(n - 1)) + 1 if n else 0, _COLUMNS))
+        np.add.at(self._weeks, self._week_index(index), self._days)
+        self._months = np.zeros((int(self._month_index(n - 1)) + 1 if n else 0, _COLUMNS))
+        np.add.at(self._months, self._month_index(index), self._days)
+        for window in TRAILING_WINDOWS:
+            self._trailing[window] = self._window_sums(window, 0, n)
+
+    def _window_sums(self, window, start, stop):
+        """Trailing `window`-day sums ending on each day in [start, stop), from the daily values."""
+        cumulative = np.vstack([np.zeros((1, _COLUMNS)), np.cumsum(self._days[:stop], axis=0)])
+        ends = np.arange(start, stop) + 1
+        return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+    def _extend(self, first, last):
+        """Make room for the days first..last."""
+        if self.origin is None:
+            self.origin = first
+        if first < self.origin or (self.max_days and (last - self.origin).astype(int) >= 2 * self.max_days):
+            # Earlier days than held, or far past max_days: re-base and re-derive
+            new_origin = min(first, self.origin)
+            if self.max_days:
+                new_origin = max(new_origin, last - (self.max_days - 1))
+            days = np.zeros((int((max(last, self.origin + len(self._days) - 1) - new_origin).astype(int)) + 1,
+                             _COLUMNS))
+            held = self.origin + np.arange(len(self._days))
+            keep = held >= new_origin
+            days[(held[keep] - new_origin).astype(int)] = self._days[keep]
+            self.origin, self._days = new_origin, days
+            self._rebuild()
+            return
+        n, needed = len(self._days), int((last - self.origin).astype(int)) + 1
+        if needed <= n:
+            return
+        # New days start at zero: the week / month sums only need new (empty) buckets,
+        # the trailing sums of the new days cover the tail of the days already held
+        self._days = np.vstack([self._days, np.zeros((needed - n, _COLUMNS))])
+        weeks, months = int(self._week_index(needed - 1)) + 1, int(self._month_index(needed - 1)) + 1
+        self._weeks = np.vstack([self._weeks, np.zeros((weeks - len(self._weeks), _COLUMNS))])
+        self._months = np.vstack([self._months, np.zeros((months - len(self._months), _COLUMNS))])
+        for window in TRAILING_WINDOWS:
+            self._trailing[window] = np.vstack([self._trailing[window], self._window_sums(window, n, needed)])
+
+    def update(self, metrics):
+        """
+        Merge a daily OrderMetrics (any window) into the index. Only days whose
+        values differ from the held ones are applied to the rollups. Returns the
+        number of days that changed.
+        """
+        if not len(metrics):
+            return 0
+        dates = metrics.dates.astype("datetime64[D]")
+        self._extend(dates[0], dates[-1])
+        self.last = dates[-1] if self.last is None else max(self.last, dates[-1])
+        self.currency = metrics.currency or self.currency
+        index = (dates - self.origin).astype(np.int64)
+        inside = index >= 0  # days older than max_days are not held
+        index = index[inside]
+        values = np.column_stack([metrics.units, metrics.orders, np.nan_to_num(metrics.sales)])[inside]
+        delta = values - self._days[index]
+        changed = np.flatnonzero(delta.any(axis=1))
+        if not len(changed):
+            return 0
+        index, delta = index[changed], delta[changed]
+        self._days[index] += delta
+        if len(changed) > _REBUILD_DAYS:
+            self._rebuild()
+            return len(changed)
+        np.add.at(self._weeks, self._week_index(index), delta)
+        np.add.at(self._months, self._month_index(index), delta)
+        for window, sums in self._trailing.items():
+            for i, d in zip(index.tolist(), delta):
+                sums[i:i + window] += d
+        return len(changed)
+
+    def _series(self, dates, values):
+        return OrderMetrics(
+            dates=dates,
+            units=np.rint(values[:, 0]).astype(np.int64),
+            orders=np.rint(values[:, 1]).astype(np.int64),
+            sales=np.round(values[:, 2], 2),
+            currency=self.currency,
+        )
+
+    def _buckets(self, buckets, index, count):
+        """Rows index - count + 1 .. index of a rollup, zero where outside what is held."""
+        out = np.zeros((count, _COLUMNS))
+        wanted = np.arange(index - count + 1, index + 1)
+        held = (wanted >= 0) & (wanted < len(buckets))
+        out[held] = buckets[wanted[held]]
+        return out
+
+    def _after(self, day, stop):
+        """Sum of the held days after day up to (not including) stop."""
+        start = max(int((day - self.origin).astype(int)) + 1, 0)
+        end = min(int((stop - self.origin).astype(int)), len(self._days))
+        return self._days[start:end].sum(axis=0) if end > start else np.zeros(_COLUMNS)
+
+    def weeks(self, count, last=None):
+        """
+        The `count` ISO weeks up to the one holding `last` (default: the latest
+        day), dated by their Mondays. The last week only sums the days up to `last`.
+        """
+        last = self.last if last is None else np.datetime64(last, "D")
+        if last is None or count == 0:
+            return OrderMetrics.empty()
+        monday = _week_start(last)
+        index = int(self._week_index((last - self.origin).astype(int))) if self.origin is not None else 0
+        values = self._buckets(self._weeks, index, count)
+        values[-1] -= self._after(last, monday + 7)
+        return self._series(monday - 7 * np.arange(count - 1, -1, -1), values)
+
+    def months(self, count, last=None):
+        """The `count` calendar months up to the one holding `last`, the last one summed up to `last`."""
+        last = self.last if last is None else np.datetime64(last, "D")
+        if last is None or count == 0:
+            return OrderMetrics.empty(unit="M")
+        month = last.astype("datetime64[M]")
+        index = int((month - self.origin.astype("datetime64[M]")).astype(int))
+        values = self._buckets(self._months, index, count)
+        values[-1] -= self._after(last, (month + 1).astype("datetime64[D]"))
+        return self._series(month - np.arange(count - 1, -1, -1), values)
+
+    def trailing(self, window, count=1, last=None):
+        """Trailing `window`-day sums ending on each of the `count` days up to `last`."""
+        last = self.last if last is None else np.datetime64(last, "D")
+        if last is None:
+            return OrderMetrics.empty()
+        values = self._buckets(self._trailing[window], int((last - self.origin).astype(int)), count)
+        return self._series(last - np.arange(count - 1, -1, -1), values)
+
+    def trailing_mean(self, window, last=None):
+        """Mean units per day over the `window` days up to `last`."""
+        return self.trailing(window, 1, last).total_units / window
+
+
+@dataclass(frozen=True)
+class Rollups:
+    """
+    The long-history series the panel pages draw, merged across marketplaces:
+    O(panel width) values each, so rendering never touches the daily history.
+    """
+    weeks: OrderMetrics             # the last N ISO weeks (dated by Monday), the current one up to today; empty when off
+    weeks_year_ago: OrderMetrics    # the same weeks 52 weeks earlier, the last one up to the same weekday
+    months: OrderMetrics            # the last N calendar months (datetime64[M]), the current one up to today
+    months_year_ago: OrderMetrics   # the same months a year earlier, the last one up to the same date
+
+    @classmethod
+    def from_indexes(cls, indexes, weeks, months):
+        """Merge the given RollupIndexes' pages; None if none of them holds any days."""
+        indexes = [index for index in indexes if index.last is not None]
+        if not indexes:
+            return None
+        last = max(index.last for index in indexes)
+        week_ago, month_ago = last - 7 * YEAR_WEEKS, _year_before(last)
+        return cls(
+            weeks=OrderMetrics.merge(index.weeks(weeks, last) for index in indexes),
+            weeks_year_ago=OrderMetrics.merge(index.weeks(weeks, week_ago) for index in indexes),
+            months=OrderMetrics.merge(index.months(months, last) for index in indexes),
+            months_year_ago=OrderMetrics.merge(index.months(months, month_ago) for index in indexes),
+        )
+
+    def page(self, name):
+        """(this period, the year before) for the 'weeks' or 'months' page."""
+        if name == "weeks":
+            return self.weeks, self.weeks_year_ago
+        return self.months, self.months_year_ago
+
+    @staticmethod
+    def change(current, year_ago) -> Optional[float]:
+        """Year-over-year change of the total units, in percent (None without year-ago sales)."""
+        before = year_ago.total_units
+        return None if before == 0 else 100.0 * (current.total_units - before) / before
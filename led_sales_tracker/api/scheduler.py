@@ -0,0 +1,129 @@
+"""
+SP-API call pacing: per-operation token buckets, jittered exponential backoff
+and the time-of-day poll cadence.
+"""
+import time
+import random
+import logging
+import threading
+import datetime
+
+logger = logging.getLogger(__name__)
+
+# Documented usage plans (requests per second, burst) per SP-API operation.
+# The live rate from the x-amzn-RateLimit-Limit header overrides the rate.
+OPERATION_LIMITS = {
+    'getOrderMetrics': (0.5, 15),
+}
+DEFAULT_LIMIT = (0.5, 1)
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def drain(self):
+        """Empty the bucket, e.g. after the server says we were throttled."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = 0.0
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+
+class RateLimiter:
+    """One TokenBucket per SP-API operation, shared by every marketplace client."""
+
+    def __init__(self, limits=None):
+        self.limits = dict(OPERATION_LIMITS if limits is None else limits)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, operation):
+        with self._lock:
+            if operation not in self._buckets:
+                self._buckets[operation] = TokenBucket(*self.limits.get(operation, DEFAULT_LIMIT))
+            return self._buckets[operation]
+
+    def acquire(self, operation):
+        waited = self.bucket(operation).acquire()
+        if waited > 0:
+            logger.debug(f"Waited {waited:.2f}s for a {operation} token")
+        return waited
+
+    def update_from_headers(self, operation, headers):
+        """Adopt the rate from an x-amzn-RateLimit-Limit response header, if present."""
+        if not headers:
+            return
+        value = headers.get('x-amzn-RateLimit-Limit')
+        try:
+            rate = float(value)
+        except (TypeError, ValueError):
+            return
+        bucket = self.bucket(operation)
+        if rate > 0 and rate != bucket.rate:
+            logger.info(f"{operation} rate limit is now {rate} req/s (was {bucket.rate})")
+            bucket.set_rate(rate)
+
+    def sustained_rate(self, operation):
+        return self.bucket(operation).rate
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class PollScheduler:
+    """
+    Picks the delay until the next refresh: REFRESH_INTERVAL during business
+    hours, the off-hours interval otherwise, and never faster than the
+    operation's sustained rate allows for the calls a refresh makes.
+    """
+
+    def __init__(self, rate_limiter, business_interval, off_hours_interval,
+                 business_hours=(8, 20), timezone=None, operation='getOrderMetrics'):
+        self.rate_limiter = rate_limiter
+        self.business_interval = business_interval
+        self.off_hours_interval = off_hours_interval
+        self.business_hours = business_hours
+        self.timezone = timezone
+        self.operation = operation
+
+    def in_business_hours(self, now=None):
+        """start <= hour < end; a start after the end (e.g. 20-4) wraps past midnight."""
+        now = now or datetime.datetime.now(self.timezone)
+        start, end = self.business_hours
+        if start > end:
+            return now.hour >= start or now.hour < end
+        return start <= now.hour < end
+
+    def next_interval(self, calls_per_cycle=1, now=None):
+        interval = self.business_interval if self.in_business_hours(now) else self.off_hours_interval
+        floor = calls_per_cycle / self.rate_limiter.sustained_rate(self.operation)
+        return max(interval, floor)
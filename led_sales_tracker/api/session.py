@@ -0,0 +1,82 @@
+"""
+Keep-alive HTTP for the SP-API clients.
+
+sp_api sends every request through requests.request(), so each call opens a
+new connection and pays for a TCP and TLS handshake. PooledSales sends the
+Sales API's requests through a shared requests.Session instead; together with
+TimedAccessTokenClient (which uses the same session for LWA) a poll costs a
+request on an already-open connection.
+
+sp_api.base.client calls the requests.request it imported; that one name is
+replaced by a function sending on the session the calling thread's
+PooledSales set, and on requests.request otherwise. sp_api's own _request
+runs unchanged.
+"""
+import logging
+import threading
+from importlib.metadata import version
+import requests
+from requests.adapters import HTTPAdapter
+from sp_api.api import Sales
+from sp_api.base import client as sp_api_client
+from ..config import MAX_FETCH_WORKERS, HTTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+SP_API_VERSION = "1.9.28"  # the sp_api release the hook below was checked against (see requirements.txt)
+
+_local = threading.local()
+
+
+def _request(method, url, **kwargs):
+    session = getattr(_local, "session", None)
+    return (session or requests).request(method, url, **kwargs)
+
+
+def _install_hook():
+    hooked = getattr(sp_api_client, "request", None)
+    if hooked is _request:
+        return
+    if hooked is not requests.request:
+        raise ImportError(
+            f"python-amazon-sp-api {version('python-amazon-sp-api')} no longer sends requests through "
+            f"requests.request (checked against {SP_API_VERSION}); update api/session.py"
+        )
+    if version("python-amazon-sp-api") != SP_API_VERSION:
+        logger.warning(f"python-amazon-sp-api {version('python-amazon-sp-api')} is untested; "
+                       f"keep-alive was checked against {SP_API_VERSION}")
+    sp_api_client.request = _request
+
+
+_install_hook()
+
+
+def new_session(pool_size=MAX_FETCH_WORKERS):
+    """A Session keeping up to pool_size connections per host open (one per concurrent marketplace fetch)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class PooledSales(Sales):
+    """
+    Sales client whose requests (and LWA token requests) go through session,
+    and time out after HTTP_TIMEOUT seconds unless given a timeout.
+    """
+
+    def __init__(self, *args, session, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.session = session
+        if self.timeout is None:
+            self.timeout = HTTP_TIMEOUT  # a stalled keep-alive connection must not hang the fetch thread
+        self._auth.session = session
+        self._auth.timeout = self.timeout
+
+    def _request(self, *args, **kwargs):
+        previous, _local.session = getattr(_local, "session", None), self.session
+        try:
+            return super()._request(*args, **kwargs)
+        finally:
+            _local.session = previous
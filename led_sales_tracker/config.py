@@ -7,17 +7,182 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 ENV_PATH = Path(__file__).parents[1] / ".env"
+# The environment before .env is applied; a reload layers the file over it again
+PROCESS_ENV = dict(os.environ)
 load_dotenv(dotenv_path=ENV_PATH, override=True)
 
-AMAZON_CLIENT_ID     = os.getenv("AMAZON_CLIENT_ID", "")
-AMAZON_CLIENT_SECRET = os.getenv("AMAZON_CLIENT_SECRET", "")
-AMAZON_REFRESH_TOKEN = os.getenv("AMAZON_REFRESH_TOKEN", "")
+
+def parse_flag(value):
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+def parse_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def parse_seconds(value):
+    """A positive, finite number of seconds; anything else raises ValueError."""
+    seconds = float(value)
+    if not 0 < seconds < float("inf"):
+        raise ValueError(f"Expected a positive number of seconds, got {value!r}")
+    return seconds
+
+
+def parse_hours(value):
+    return tuple(int(h) for h in value.split("-", 1))
+
+
+def live_settings(env):
+    """
+    The settings a running tracker picks up when .env changes (see config_store),
+    typed, from a mapping of raw strings. Everything else applies on restart.
+    """
+    refresh_interval = int(env.get("REFRESH_INTERVAL", 10))
+    return {
+        'AMAZON_CLIENT_ID': env.get("AMAZON_CLIENT_ID", ""),
+        'AMAZON_CLIENT_SECRET': env.get("AMAZON_CLIENT_SECRET", ""),
+        'AMAZON_REFRESH_TOKEN': env.get("AMAZON_REFRESH_TOKEN", ""),
+        'REFRESH_INTERVAL': refresh_interval,
+        'REFRESH_INTERVAL_OFF_HOURS': int(env.get("REFRESH_INTERVAL_OFF_HOURS", refresh_interval * 6)),
+        'BUSINESS_HOURS': parse_hours(env.get("BUSINESS_HOURS", "8-20")),
+        'AMAZON_MARKETPLACES': parse_list(env.get("AMAZON_MARKETPLACES", "US")),
+        'DISPLAY_BACKEND': env.get("DISPLAY_BACKEND", "auto"),
+        'PAGE_SECONDS': parse_seconds(env.get("PAGE_SECONDS", 10)),
+    }
+
+
+_LIVE = live_settings(os.environ)
+
+AMAZON_CLIENT_ID     = _LIVE['AMAZON_CLIENT_ID']
+AMAZON_CLIENT_SECRET = _LIVE['AMAZON_CLIENT_SECRET']
+AMAZON_REFRESH_TOKEN = _LIVE['AMAZON_REFRESH_TOKEN']
 
 # Refresh rate for sales polling (seconds)
-REFRESH_INTERVAL = int(os.getenv("REFRESH_INTERVAL", 10))
+REFRESH_INTERVAL = _LIVE['REFRESH_INTERVAL']
 
 # Display back-end selection.
 # auto  – detect platform
 # real  – force real matrix
 # emu   – force emulator
-DISPLAY_BACKEND = os.getenv("DISPLAY_BACKEND", "auto")
\ No newline at end of file
+# null  – headless; frames are kept in memory (benchmarks, CI)
+DISPLAY_BACKEND = _LIVE['DISPLAY_BACKEND']
+
+# Null backend: frames kept in memory, and where to dump them on exit (empty = don't)
+NULL_DISPLAY_MAX_FRAMES = int(os.getenv("NULL_DISPLAY_MAX_FRAMES", 600))
+NULL_DISPLAY_DUMP_DIR = os.getenv("NULL_DISPLAY_DUMP_DIR", "")
+
+# Local SQLite cache of closed daily metric buckets (empty disables it)
+METRICS_DB_PATH = os.getenv("METRICS_DB_PATH", str(Path(__file__).parents[1] / "metrics.sqlite3"))
+
+# Days before today that may still change (late orders); older days are cached as closed
+METRICS_SETTLE_DAYS = int(os.getenv("METRICS_SETTLE_DAYS", 2))
+
+# Marketplaces to fetch and merge (comma-separated sp_api Marketplaces names, e.g. US,CA,MX)
+AMAZON_MARKETPLACES = _LIVE['AMAZON_MARKETPLACES']
+
+# Upper bound on marketplaces fetched in parallel
+MAX_FETCH_WORKERS = int(os.getenv("MAX_FETCH_WORKERS", 4))
+
+# Maximum frame rate (frames per second); frames only run when something on the panel changes
+FRAME_RATE = float(os.getenv("FRAME_RATE", 10))
+
+# Geometry of one LED panel (pixels), panels chained side by side per chain, and
+# chains driven in parallel (stacked vertically). The canvas is
+# (PANEL_ROWS * PANEL_PARALLEL) x (PANEL_COLS * PANEL_CHAIN_LENGTH).
+PANEL_ROWS = int(os.getenv("PANEL_ROWS", 32))
+PANEL_COLS = int(os.getenv("PANEL_COLS", 64))
+PANEL_CHAIN_LENGTH = int(os.getenv("PANEL_CHAIN_LENGTH", 1))
+PANEL_PARALLEL = int(os.getenv("PANEL_PARALLEL", 1))
+
+# Days of history shown on the chart (downsampled to the panel width when longer);
+# defaults to one column per day across the whole wall, today included
+HISTORY_DAYS = int(os.getenv("HISTORY_DAYS") or PANEL_COLS * PANEL_CHAIN_LENGTH - 1)
+
+# Y axis of the sales chart: linear | log
+CHART_SCALE = os.getenv("CHART_SCALE", "linear")
+
+# Poll cadence outside business hours (seconds) and the business-hours window (local hours, start-end)
+REFRESH_INTERVAL_OFF_HOURS = _LIVE['REFRESH_INTERVAL_OFF_HOURS']
+BUSINESS_HOURS = _LIVE['BUSINESS_HOURS']
+
+# Retries per SP-API call and the jittered exponential backoff between them (seconds)
+FETCH_MAX_RETRIES = int(os.getenv("FETCH_MAX_RETRIES", 5))
+FETCH_BACKOFF_BASE = float(os.getenv("FETCH_BACKOFF_BASE", 1.0))
+FETCH_BACKOFF_CAP = float(os.getenv("FETCH_BACKOFF_CAP", 60.0))
+
+# Seconds an SP-API or LWA request may wait to connect or for data before it fails (and is retried)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+
+# SP-API base URL and LWA token URL; empty uses Amazon's (set both to run against benchmarks/standin.py)
+SP_API_ENDPOINT = os.getenv("SP_API_ENDPOINT", "")
+LWA_ENDPOINT = os.getenv("LWA_ENDPOINT", "")
+
+# Age (seconds) after which a cached result is refreshed in the background. The
+# tracker's own polls always call the API and only fall back to the cache on errors.
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 30))
+
+# Intraday mode (opt-in): poll today's hourly buckets and roll them into the daily series.
+# Doubles the SP-API calls per poll cycle and adds a "today by hour" page
+INTRADAY = parse_flag(os.getenv("INTRADAY", "false"))
+
+# Completed hours still refetched on every intraday poll (late orders)
+INTRADAY_SETTLE_HOURS = int(os.getenv("INTRADAY_SETTLE_HOURS", 2))
+
+# In intraday mode, how often (seconds) the past days of the history window are refreshed
+DAILY_REFRESH_INTERVAL = int(os.getenv("DAILY_REFRESH_INTERVAL", 1800))
+
+# Seconds each display page (history / today by hour) stays on screen
+PAGE_SECONDS = _LIVE['PAGE_SECONDS']
+
+# Long-history pages: the last ROLLUP_WEEKS ISO weeks and the last ROLLUP_MONTHS months,
+# each drawn against the year before (0 leaves the page out). They need two to three
+# years of daily metrics, fetched once and then served from the metrics store
+ROLLUP_WEEKS = int(os.getenv("ROLLUP_WEEKS", 0))
+ROLLUP_MONTHS = int(os.getenv("ROLLUP_MONTHS", 0))
+
+# Port for the Prometheus /metrics endpoint (0 disables it) and the address it binds to;
+# local only by default (set 0.0.0.0 to let a scraper on the LAN reach it)
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9120))
+METRICS_BIND = os.getenv("METRICS_BIND", "127.0.0.1")
+
+# Timezone used for day boundaries, business hours and the intraday view
+TIMEZONE = os.getenv("TIMEZONE", "America/Los_Angeles")
+
+# Where the last rendered data frame is kept for an instant first frame at boot (empty disables)
+LAST_FRAME_PATH = os.getenv("LAST_FRAME_PATH", str(Path(__file__).parents[1] / "last_frame.npy"))
+
+# Run the display backend in its own process, fed through a shared-memory framebuffer
+DISPLAY_DRIVER_PROCESS = parse_flag(os.getenv("DISPLAY_DRIVER_PROCESS", "false"))
+
+# CPU core to pin the display driver process to (e.g. one isolated with isolcpus=3); empty leaves it unpinned
+DISPLAY_DRIVER_CPU = int(os.getenv("DISPLAY_DRIVER_CPU")) if os.getenv("DISPLAY_DRIVER_CPU") else None
+
+# Name of the shared-memory framebuffer (the portal attaches to it for its live preview)
+FRAMEBUFFER_NAME = os.getenv("FRAMEBUFFER_NAME", "led_sales_tracker_fb")
+
+# Colour correction applied to every frame at push time: gamma (1 = none; rpi-rgb-led-matrix already
+# applies its own CIE1931 luminance correction), R,G,B white-balance gains and brightness (0-1)
+DISPLAY_GAMMA = float(os.getenv("DISPLAY_GAMMA", 1.0))
+DISPLAY_WHITE_BALANCE = os.getenv("DISPLAY_WHITE_BALANCE", "1,1,1")
+DISPLAY_BRIGHTNESS = float(os.getenv("DISPLAY_BRIGHTNESS", 1.0))
+
+# Dimming schedule: comma-separated local HH:MM=brightness steps, e.g. 07:00=1,21:00=0.5,23:00=0.15
+# (empty keeps DISPLAY_BRIGHTNESS all day)
+DISPLAY_DIM_SCHEDULE = os.getenv("DISPLAY_DIM_SCHEDULE", "")
+
+# Ambient light sensor: a file holding a lux reading (e.g. an IIO in_illuminance_input) that scales
+# the brightness, and the lux at which it is full (empty path disables)
+DISPLAY_AMBIENT_PATH = os.getenv("DISPLAY_AMBIENT_PATH", "")
+DISPLAY_AMBIENT_FULL_LUX = float(os.getenv("DISPLAY_AMBIENT_FULL_LUX", 200))
+
+# How often (seconds) the running tracker checks .env for changes; 0 reloads on SIGHUP only
+CONFIG_POLL_INTERVAL = float(os.getenv("CONFIG_POLL_INTERVAL", 2))
+
+# Fleet mode: standalone (fetch for this panel only) | hub (fetch and serve snapshots
+# to client panels) | client (follow a hub instead of calling SP-API)
+FLEET_MODE = os.getenv("FLEET_MODE", "standalone").lower()
+
+# Hub: port (and address) of the snapshot endpoint. Client: the hub's base URL.
+HUB_PORT = int(os.getenv("HUB_PORT", 9121))
+HUB_BIND = os.getenv("HUB_BIND", "0.0.0.0")
+HUB_URL = os.getenv("HUB_URL", "http://localhost:9121")
@@ -0,0 +1,181 @@
+"""
+The .env file as a config store that is updated in place, and a watcher that
+hot-reloads the running tracker when it changes.
+
+update() rewrites the assignments of the given keys where they are (a later
+duplicate of a key is dropped, new keys are appended) and renames a complete
+temporary file over .env, so a reader only ever sees the old or the new file.
+ConfigWatcher notices edits from the portal, an editor or a deploy by polling
+the file, or right away on SIGHUP, and reports which of the typed live
+settings (config.live_settings) changed.
+"""
+import os
+import re
+import fcntl
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager, suppress
+from dotenv import dotenv_values
+from .config import ENV_PATH, PROCESS_ENV, CONFIG_POLL_INTERVAL, live_settings
+
+logger = logging.getLogger(__name__)
+
+# KEY=value, optionally exported, quoted and followed by a comment (kept on update)
+_ASSIGNMENT = re.compile(
+    r"""^(?P<head>\s*(?:export\s+)?(?P<key>[A-Za-z_][A-Za-z0-9_]*)\s*=\s*)"""
+    r"""(?P<value>"(?:[^"\\]|\\.)*"|'[^']*'|[^\s#'"]*)(?P<tail>\s+#.*)?\s*$"""
+)
+_KEY = re.compile(r"^\s*(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)\s*=")
+_BARE_VALUE = re.compile(r"^[A-Za-z0-9_./:@,+-]*$")
+
+
+def _format_value(value):
+    """A value as dotenv reads it back: bare when safe, double-quoted and escaped otherwise."""
+    value = str(value)
+    if _BARE_VALUE.match(value):
+        return value
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
+
+
+@contextmanager
+def _file_lock(path):
+    # A separate lock file: the rename replaces the inode of the file itself
+    with open(f"{path}.lock", "a") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def _atomic_write(path, text):
+    """Write text to a temp file next to path and rename it over path, keeping its mode and owner."""
+    fd, tmp_path = tempfile.mkstemp(prefix=".env.", dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w") as fp:
+            fp.write(text)
+            fp.flush()
+            os.fsync(fp.fileno())
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            pass  # a new file keeps mkstemp's 0600: it holds credentials
+        else:
+            os.chmod(tmp_path, st.st_mode & 0o7777)
+            with suppress(PermissionError):
+                os.chown(tmp_path, st.st_uid, st.st_gid)  # the portal may run as root
+        os.replace(tmp_path, path)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+
+class ConfigStore:
+    def __init__(self, path=ENV_PATH, base_env=PROCESS_ENV):
+        self.path = str(path)
+        self.base_env = base_env  # what the file is layered over, as at startup
+        self._lock = threading.Lock()
+
+    def read(self):
+        """The file's assignments as raw strings (the last one wins for a duplicated key)."""
+        if not os.path.exists(self.path):
+            return {}
+        return {key: value or "" for key, value in dotenv_values(self.path).items()}
+
+    def settings(self, raw=None):
+        """Typed live settings: the file (or raw, as returned by read()) over the process environment."""
+        return live_settings({**self.base_env, **(self.read() if raw is None else raw)})
+
+    def update(self, values):
+        """Set keys in place (values are str()'d) and atomically replace the file."""
+        with self._lock, _file_lock(self.path):
+            try:
+                with open(self.path) as fp:
+                    lines = fp.read().splitlines()
+            except FileNotFoundError:
+                lines = []
+            pending = dict(values)
+            out = []
+            for line in lines:
+                key_match = _KEY.match(line)
+                key = key_match.group(1) if key_match else None
+                if key in values:
+                    if key not in pending:
+                        continue  # a later duplicate of a key already written
+                    value = _format_value(pending.pop(key))
+                    match = _ASSIGNMENT.match(line)
+                    line = f"{match['head']}{value}{match['tail'] or ''}" if match else f"{key}={value}"
+                out.append(line)
+            out.extend(f"{key}={_format_value(value)}" for key, value in pending.items())
+            _atomic_write(self.path, "\n".join(out) + "\n")
+        logger.info(f"Updated {', '.join(sorted(values))} in {self.path}")
+
+
+class ConfigWatcher(threading.Thread):
+    """
+    Checks the store's file every interval seconds (0: only on request_reload())
+    and calls on_change(changed) with the live settings whose typed value
+    changed. Keys that only apply on restart are logged. on_change runs on this
+    thread.
+    """
+
+    def __init__(self, store, on_change, interval=CONFIG_POLL_INTERVAL):
+        super().__init__(name="config-watcher", daemon=True)
+        self.store = store
+        self.on_change = on_change
+        self.interval = interval
+        self._reload = threading.Event()
+        self._stop_event = threading.Event()
+        self._stat = self._file_stat()
+        self._raw = store.read()
+        self.settings = store.settings(self._raw)
+
+    def _file_stat(self):
+        try:
+            st = os.stat(self.store.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def request_reload(self):
+        """Check the file now; only sets an event, so it is safe from a signal handler."""
+        self._reload.set()
+
+    def check(self, force=False):
+        """Reload if the file changed (or force); returns the changed live settings."""
+        stat = self._file_stat()
+        if stat == self._stat and not force:
+            return {}
+        self._stat = stat
+        raw = self.store.read()
+        settings = self.store.settings(raw)  # a bad value raises and keeps the current settings
+        changed = {key: value for key, value in settings.items() if value != self.settings.get(key)}
+        restart_only = sorted(
+            key for key in raw.keys() | self._raw.keys()
+            if raw.get(key) != self._raw.get(key) and key not in settings
+        )
+        self.settings, self._raw = settings, raw
+        if restart_only:
+            logger.warning(f"Changed in {self.store.path}, applied on the next restart: {', '.join(restart_only)}")
+        if changed:
+            logger.info(f"Applying changed settings: {', '.join(sorted(changed))}")
+            self.on_change(changed)
+        return changed
+
+    def run(self):
+        while not self._stop_event.is_set():
+            forced = self._reload.wait(self.interval or None)
+            self._reload.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.check(force=forced)
+            except Exception as e:
+                logger.error(f"Could not reload {self.store.path}: {e}")
+
+    def stop(self):
+        self._stop_event.set()
+        self._reload.set()
@@ -1,26 +1,87 @@
 """
 Factory that picks the correct back-end.
+
+Backends are imported only when selected, so the Pi never imports pygame and
+a machine without rgbmatrix can still run the emulator.
 """
 import platform
 import logging
-from .emulator import EmulatedMatrixDisplay
-from .real_matrix import RealMatrixDisplay
-from ..config import DISPLAY_BACKEND
+from ..config import DISPLAY_BACKEND, DISPLAY_DRIVER_PROCESS, DISPLAY_DRIVER_CPU, FRAMEBUFFER_NAME
 
 logger = logging.getLogger(__name__)
 
-def get_display():
+_BACKENDS = {
+    'EmulatedMatrixDisplay': ".emulator",
+    'RealMatrixDisplay': ".real_matrix",
+    'NullDisplay': ".null",
+}
+
+
+def __getattr__(name):
+    # Keeps `from led_sales_tracker.display import EmulatedMatrixDisplay` working without eager imports
+    if name in _BACKENDS:
+        from importlib import import_module
+        return getattr(import_module(_BACKENDS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _backend_name(setting=DISPLAY_BACKEND):
     # Force by env?
-    if DISPLAY_BACKEND == "real":
+    if setting == "real":
         logger.info("Display backend forced to REAL")
-        return RealMatrixDisplay()
-    if DISPLAY_BACKEND == "emu":
+        return "real"
+    if setting == "emu":
         logger.info("Display backend forced to EMULATOR")
-        return EmulatedMatrixDisplay()
+        return "emu"
+    if setting == "null":
+        logger.info("Display backend forced to NULL (headless)")
+        return "null"
 
     # auto-detect
     if platform.system() == "Linux" and platform.machine().startswith("arm"):
         logger.info("Auto-detected Raspberry Pi – using real matrix")
-        return RealMatrixDisplay()
+        return "real"
     logger.info("Using emulator (non-Pi platform)")
-    return EmulatedMatrixDisplay()
\ No newline at end of file
+    return "emu"
+
+
+def create_backend(name):
+    """Instantiate a backend by name ('real', 'emu' or 'null'), importing only that one."""
+    if name == "real":
+        from .real_matrix import RealMatrixDisplay
+        return RealMatrixDisplay()
+    if name == "emu":
+        from .emulator import EmulatedMatrixDisplay
+        return EmulatedMatrixDisplay()
+    if name == "null":
+        from .null import NullDisplay
+        return NullDisplay()
+    raise ValueError(f"Unknown display backend: {name}")
+
+
+def get_display(setting=DISPLAY_BACKEND):
+    backend = _backend_name(setting)
+    if DISPLAY_DRIVER_PROCESS:
+        # The backend runs in a driver process fed through a shared-memory framebuffer
+        from .shared import SharedMemoryDisplay
+        logger.info(f"Driving the {backend} backend from a separate process")
+        return SharedMemoryDisplay(backend, name=FRAMEBUFFER_NAME, cpu=DISPLAY_DRIVER_CPU)
+    return create_backend(backend)
+
+
+def switch_backend(disp, setting):
+    """
+    Move a running display to another backend (a DISPLAY_BACKEND value) and show
+    the current frame on it straight away. Returns the display to draw on from now on.
+    """
+    backend = _backend_name(setting)
+    from .shared import SharedMemoryDisplay
+    if isinstance(disp, SharedMemoryDisplay):
+        disp.set_backend(backend)  # only the driver process changes
+        return disp
+    new = create_backend(backend)
+    new.initialize()
+    new.buffer[:] = disp.buffer
+    new.push()
+    disp.cleanup()
+    return new
@@ -0,0 +1,245 @@
+"""
+Frame scheduler and animations on the monotonic clock.
+
+Animations are functions of time: each reports its value at a given moment
+and when that value next changes, and calls its on_change callback (usually
+updating the view and invalidating a layer) when it does. The scheduler runs
+frames on a fixed grid of time.monotonic() slots, drops the slots it has
+already missed instead of catching up, and sleeps until the earliest slot in
+which something actually changes, so a panel with nothing moving costs no CPU
+between wake-ups.
+"""
+import math
+import time
+import logging
+import threading
+from ..instrumentation import FRAMES, FRAMES_DROPPED
+
+logger = logging.getLogger(__name__)
+
+
+def smoothstep(t):
+    """Ease in and out over 0..1."""
+    return t * t * (3 - 2 * t)
+
+
+class Animation:
+    """
+    Base class. Subclasses implement value_at(now) and next_change(now); the
+    scheduler calls on_change(value) whenever the value differs from the last one.
+    """
+
+    def __init__(self, on_change):
+        self.on_change = on_change
+        self.value = None
+        self.finished = False  # finished animations are dropped by the scheduler
+
+    def value_at(self, now):
+        raise NotImplementedError
+
+    def next_change(self, now):
+        """Monotonic time of the next value change after now, or None if it will not change by itself."""
+        raise NotImplementedError
+
+    def update(self, now):
+        value = self.value_at(now)
+        if value == self.value:
+            return False
+        self.value = value
+        self.on_change(value)
+        return True
+
+
+class Progress(Animation):
+    """Integer progress 0..steps between two monotonic times, e.g. lit pixels of a loading bar."""
+
+    def __init__(self, on_change, start, end, steps):
+        super().__init__(on_change)
+        self.steps = steps
+        self.retarget(start, end)
+
+    def retarget(self, start, end):
+        self.start = start
+        self.end = max(end, start + 1e-3)
+
+    def value_at(self, now):
+        fraction = (now - self.start) / (self.end - self.start)
+        return max(0, min(self.steps, int(fraction * self.steps)))
+
+    def next_change(self, now):
+        value = self.value_at(now)
+        if value >= self.steps:
+            return None
+        return self.start + (value + 1) * (self.end - self.start) / self.steps
+
+
+class Marquee(Animation):
+    """
+    Horizontal scroll offset (pixels) for content wider than its box. The
+    content pauses at offset 0, scrolls left at speed px/s and wraps after
+    content_width + gap pixels. Content that fits stays at 0 and never wakes
+    the scheduler.
+    """
+
+    def __init__(self, on_change, content_width, view_width, speed=12.0, gap=8, pause=2.0, start=None):
+        super().__init__(on_change)
+        self.content_width = content_width
+        self.view_width = view_width
+        self.speed = speed
+        self.gap = gap
+        self.pause = pause
+        self.start = time.monotonic() if start is None else start
+
+    @property
+    def scrolls(self):
+        return self.content_width > self.view_width
+
+    @property
+    def span(self):
+        """Pixels scrolled per cycle: the content plus the gap before it repeats."""
+        return self.content_width + self.gap
+
+    def _cycle(self):
+        return self.pause + self.span / self.speed
+
+    def value_at(self, now):
+        if not self.scrolls:
+            return 0
+        t = (now - self.start) % self._cycle()
+        if t < self.pause:
+            return 0
+        return min(self.span - 1, int((t - self.pause) * self.speed))
+
+    def next_change(self, now):
+        if not self.scrolls:
+            return None
+        cycle = self._cycle()
+        cycle_start = self.start + math.floor((now - self.start) / cycle) * cycle
+        t = now - cycle_start
+        if t < self.pause:
+            return cycle_start + self.pause + 1 / self.speed
+        offset = int((t - self.pause) * self.speed)
+        if offset + 1 >= self.span:
+            return cycle_start + cycle  # wraps back to 0 (and pauses)
+        return cycle_start + self.pause + (offset + 1) / self.speed
+
+
+class Tween(Animation):
+    """A value eased from 0.0 to 1.0 over duration seconds, updated every frame; finishes at 1.0."""
+
+    def __init__(self, on_change, duration, ease=smoothstep, start=None):
+        super().__init__(on_change)
+        self.duration = duration
+        self.ease = ease
+        self.start = time.monotonic() if start is None else start
+
+    def value_at(self, now):
+        t = (now - self.start) / self.duration if self.duration > 0 else 1.0
+        return 1.0 if t >= 1.0 else self.ease(max(0.0, t))
+
+    def next_change(self, now):
+        return None if self.value_at(now) >= 1.0 else now  # every frame until done
+
+    def update(self, now):
+        changed = super().update(now)
+        self.finished = self.value >= 1.0
+        return changed
+
+
+class FrameScheduler:
+    """
+    Runs animations on a grid of frame slots (1 / frame_rate apart) on the
+    monotonic clock. tick() advances every animation; wait() sleeps until the
+    first slot in which an animation changes, an explicit deadline passes or
+    wake() is called from another thread.
+    """
+
+    def __init__(self, frame_rate, clock=time.monotonic):
+        self.frame_interval = 1.0 / frame_rate
+        self.clock = clock
+        self._epoch = clock()
+        self._animations = {}
+        self._wake_event = threading.Event()
+        self._target_slot = None  # slot the last wait() aimed for
+        self.frames = 0
+        self.dropped_frames = 0
+
+    def add(self, name, animation):
+        """Start (or replace) the named animation and apply its current value right away."""
+        self._animations[name] = animation
+        animation.update(self.clock())
+        return animation
+
+    def get(self, name):
+        return self._animations.get(name)
+
+    def remove(self, name):
+        self._animations.pop(name, None)
+
+    def wake(self):
+        """Run the next frame now; safe to call from any thread (e.g. when new data lands)."""
+        self._wake_event.set()
+
+    def _slot(self, t):
+        return math.floor((t - self._epoch) / self.frame_interval)
+
+    def tick(self, now=None):
+        """Advance every animation to now. Returns True if any of them changed."""
+        now = self.clock() if now is None else now
+        slot = self._slot(now)
+        if self._target_slot is not None and slot > self._target_slot:
+            # Woke up late; those slots are skipped
+            self.dropped_frames += slot - self._target_slot
+            FRAMES_DROPPED.inc(slot - self._target_slot)
+        self._target_slot = None
+        self.frames += 1
+        FRAMES.inc()
+
+        changed = False
+        for name, animation in list(self._animations.items()):
+            changed |= animation.update(now)
+            if animation.finished:
+                del self._animations[name]
+        return changed
+
+    def next_deadline(self, now=None):
+        """Earliest time an animation changes, or None when every animation is idle."""
+        now = self.clock() if now is None else now
+        deadlines = []
+        for animation in self._animations.values():
+            if animation.value_at(now) != animation.value:
+                return now  # already due (e.g. a tween's final step)
+            deadline = animation.next_change(now)
+            if deadline is not None:
+                deadlines.append(deadline)
+        return min(deadlines) if deadlines else None
+
+    def wait(self, *deadlines):
+        """
+        Sleep until the next frame slot that has work to do. Extra deadlines
+        (monotonic times, None ignored) are for changes outside any animation,
+        such as the minute rolling over. Never runs two frames in one slot, and
+        any slots already missed are skipped rather than run late.
+        """
+        now = self.clock()
+        candidates = [d for d in deadlines if d is not None]
+        animation_deadline = self.next_deadline(now)
+        if animation_deadline is not None:
+            candidates.append(animation_deadline)
+
+        next_slot = self._slot(now) + 1
+        if candidates:
+            # Round the deadline up to a slot boundary, but no earlier than the next slot
+            slot = max(next_slot, math.ceil((min(candidates) - self._epoch) / self.frame_interval))
+            timeout = max(0.0, self._epoch + slot * self.frame_interval - now)
+        else:
+            slot, timeout = None, None  # fully idle: sleep until wake()
+
+        woken = self._wake_event.wait(timeout)
+        self._target_slot = slot if not woken else next_slot
+        if woken:
+            # Woken early; still respect the frame budget
+            self._wake_event.clear()
+            delay = self._epoch + next_slot * self.frame_interval - self.clock()
+            if delay > 0:
+                time.sleep(delay)
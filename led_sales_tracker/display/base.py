@@ -1,38 +1,76 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
 import numpy as np
 from .font5x7 import FONT
+from . import chart
+from .colour import ColourStage
+from ..config import PANEL_ROWS, PANEL_COLS, PANEL_CHAIN_LENGTH, PANEL_PARALLEL
 
-ROWS, COLS = 32, 64  # keep global for font & helpers
+# Default canvas size: the whole wall, chains side by side and parallel chains stacked
+ROWS, COLS = PANEL_ROWS * PANEL_PARALLEL, PANEL_COLS * PANEL_CHAIN_LENGTH
 
-class BaseDisplay(ABC):
+GLYPH_WIDTH, GLYPH_HEIGHT = 5, 7
+GLYPH_ADVANCE = GLYPH_WIDTH + 1  # 5 pixels + 1 space
+
+
+def _compile_font():
+    """
+    Decode the hex-row FONT once into a boolean glyph atlas shaped
+    (n_glyphs, GLYPH_HEIGHT, GLYPH_ADVANCE); the last column is the spacing.
     """
-    Drivers work with an RGB pixel buffer shaped (ROWS, COLS, 3).
+    index = {char: i for i, char in enumerate(FONT)}
+    rows = np.array([FONT[char] for char in index], dtype=np.uint8)  # (n, 7)
+    shifts = np.arange(GLYPH_WIDTH - 1, -1, -1, dtype=np.uint8)      # MSB is the leftmost column
+    atlas = np.zeros((len(index), GLYPH_HEIGHT, GLYPH_ADVANCE), dtype=bool)
+    atlas[:, :, :GLYPH_WIDTH] = (rows[:, :, None] >> shifts) & 1
+    return atlas, index
+
+
+GLYPH_ATLAS, GLYPH_INDEX = _compile_font()
+
+
+@lru_cache(maxsize=256)
+def text_mask(text):
+    """Boolean (GLYPH_HEIGHT, len(text) * GLYPH_ADVANCE) mask of a rendered string. Cached; read-only."""
+    fallback = GLYPH_INDEX['?']
+    glyphs = GLYPH_ATLAS[[GLYPH_INDEX.get(char, fallback) for char in text]]  # (n, 7, 6)
+    mask = glyphs.transpose(1, 0, 2).reshape(GLYPH_HEIGHT, len(text) * GLYPH_ADVANCE)
+    mask.flags.writeable = False
+    return mask
+
+class Canvas:
+    """
+    An RGB pixel buffer shaped (rows, cols, 3) plus the drawing primitives.
     Colours are 0-255 ints.
     """
 
-    def __init__(self):
-        self.buffer = np.zeros((ROWS, COLS, 3), dtype=np.uint8)
+    def __init__(self, rows=ROWS, cols=COLS):
+        self.buffer = np.zeros((rows, cols, 3), dtype=np.uint8)
 
-    @abstractmethod
-    def push(self):
-        """Send current buffer to the physical / emulated matrix."""
-        pass
+    @property
+    def rows(self):
+        return self.buffer.shape[0]
+
+    @property
+    def cols(self):
+        return self.buffer.shape[1]
 
     def clear(self, colour=(0, 0, 0)):
         self.buffer[:, :] = colour
 
     # Optional helper to draw text
     def draw_text(self, text, x, y, colour=(255, 255, 255)):
-        for char in text:
-            glyph = FONT.get(char, FONT['?'])
-            for row in range(7):
-                for col in range(5):
-                    if glyph[row] & (1 << (4 - col)):
-                        px = x + col
-                        py = y + row
-                        if 0 <= px < COLS and 0 <= py < ROWS:
-                            self.buffer[py, px] = colour
-            x += 6  # 5 pixels + 1 space
+        if text:
+            self.draw_mask(text_mask(text), x, y, colour)
+
+    def draw_mask(self, mask, x, y, colour=(255, 255, 255)):
+        """Set every pixel where the boolean mask is True, with its top-left at (x, y). Clipped to the panel."""
+        height, width = mask.shape
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, self.cols), min(y + height, self.rows)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.buffer[y0:y1, x0:x1][mask[y0 - y:y1 - y, x0 - x:x1 - x]] = colour
 
     def draw_series(self, series, x, y, colour=(255, 255, 255)):
         """
@@ -42,18 +80,56 @@ class BaseDisplay(ABC):
         :param y: Starting y position.
         :param colour: Colour of the points.
         """
+        points = np.asarray(series, dtype=int).reshape(-1, 2)
+        px = x + points[:, 0]
+        py = y + points[:, 1]
+        rows, cols = self.rows, self.cols
+        inside = (px >= 0) & (px < cols) & (py >= 0) & (py < rows)
+        px, py = px[inside], py[inside]
+        if len(px) == 0:
+            return
+
+        # Highest point per column; everything below it is filled in the darker colour
+        tops = np.full(cols, rows)
+        np.minimum.at(tops, px, py)
+        fill = np.arange(rows)[:, None] > tops[None, :]
+
         # Create darker version of the color (50% brightness)
         darker_colour = tuple(max(0, c // 2) for c in colour)
+        self.buffer[fill] = darker_colour
+        self.buffer[py, px] = colour
+
+    def draw_chart(self, values, x=0, y=0, width=None, height=None, colour=(255, 255, 255),
+                   scale="linear", max_value=None, downsample_method="lttb"):
+        """
+        Draw values as a bar chart in the box (x, y, width, height), one column per value.
+        Series longer than the box are downsampled and bars are auto-scaled to its height.
+        :param scale: 'linear' or 'log'.
+        :param max_value: Value mapped to the full height (defaults to the series maximum).
+        :param downsample_method: 'lttb', 'max' or 'mean'; see chart.downsample.
+        """
+        rows, cols = self.rows, self.cols
+        width = cols - x if width is None else width
+        height = rows - y if height is None else height
+        if width <= 0 or height <= 0 or len(values) == 0:
+            return
+        values = chart.downsample(values, width, downsample_method)
+        heights = chart.scale_to_rows(values, height, scale, max_value)
+
+        px = x + np.arange(len(heights))
+        tops = y + height - heights  # first row of each bar
+        row_index = np.arange(rows)[:, None]
+        bars = (row_index >= tops) & (row_index < y + height) & (heights > 0)
+        visible = (px >= 0) & (px < cols)
+        bars, px, tops, heights = bars[:, visible], px[visible], tops[visible], heights[visible]
+
+        column_mask = np.zeros((rows, cols), dtype=bool)
+        column_mask[:, px] = bars
+        darker_colour = tuple(max(0, c // 2) for c in colour)
+        self.buffer[column_mask] = darker_colour
+        peaks = (heights > 0) & (tops >= 0) & (tops < rows)
+        self.buffer[tops[peaks], px[peaks]] = colour
 
-        for point in series:
-            px = x + point[0]
-            py = y + point[1]
-            
-            if 0 <= px < COLS and 0 <= py < ROWS:
-                self.buffer[py, px] = colour
-                for fill_y in range(py + 1, ROWS):
-                    self.buffer[fill_y, px] = darker_colour
-                
     def set_pixel(self, x, y, colour=(255, 255, 255)):
         """
         Set a single pixel in the buffer to the specified color.
@@ -66,5 +142,64 @@ class BaseDisplay(ABC):
         Returns:
         None
         """
-        if 0 <= x < COLS and 0 <= y < ROWS:
-            self.buffer[y, x] = colour
\ No newline at end of file
+        if 0 <= x < self.cols and 0 <= y < self.rows:
+            self.buffer[y, x] = colour
+
+
+class BaseDisplay(Canvas, ABC):
+    """
+    Drivers work with an RGB pixel buffer shaped (rows, cols, 3) covering the
+    whole wall: parallel chains stacked top to bottom, each chain's panels
+    left to right. Colours are 0-255 ints. push() sends frame(): the buffer
+    after the colour stage (gamma, white balance, brightness), if one is set.
+    """
+
+    def __init__(self, panel_rows=PANEL_ROWS, panel_cols=PANEL_COLS,
+                 chain_length=PANEL_CHAIN_LENGTH, parallel=PANEL_PARALLEL):
+        super().__init__(panel_rows * parallel, panel_cols * chain_length)
+        self.panel_rows = panel_rows
+        self.panel_cols = panel_cols
+        self.chain_length = chain_length
+        self.parallel = parallel
+        self.colour = ColourStage.from_config()  # None: frames are sent as drawn
+
+    def frame(self):
+        """The buffer as the panel should show it. Read-only: it may be the colour stage's cached output."""
+        return self.buffer if self.colour is None else self.colour.apply(self.buffer)
+
+    def panels(self):
+        """(row slice, column slice) of every panel, chain by chain."""
+        return [
+            (slice(c * self.panel_rows, (c + 1) * self.panel_rows),
+             slice(p * self.panel_cols, (p + 1) * self.panel_cols))
+            for c in range(self.parallel) for p in range(self.chain_length)
+        ]
+
+    def changed_panels(self, previous, frame=None):
+        """
+        The panels() whose pixels in frame (default: the buffer) differ from
+        previous (all of them when previous is None).
+        """
+        frame = self.buffer if frame is None else frame
+        if previous is None:
+            return self.panels()
+        if np.array_equal(frame, previous):
+            return []  # the common case, and cheaper than the per-panel reduction
+        # One comparison over the wall, reduced per panel
+        changed = np.any(frame != previous, axis=2).reshape(
+            self.parallel, self.panel_rows, self.chain_length, self.panel_cols
+        ).any(axis=(1, 3))
+        return [panel for panel, dirty in zip(self.panels(), changed.ravel()) if dirty]
+
+    @abstractmethod
+    def push(self):
+        """Send current buffer to the physical / emulated matrix."""
+        pass
+
+    def initialize(self):
+        """Hook run once before the first push."""
+        pass
+
+    def cleanup(self):
+        """Release the device / window on shutdown."""
+        pass
@@ -0,0 +1,89 @@
+"""
+Numpy helpers for fitting a data series onto the panel: downsampling long
+series to the available columns and scaling values to the available rows.
+"""
+from functools import lru_cache
+import numpy as np
+
+
+@lru_cache(maxsize=16)
+def _lttb_buckets(n, n_out):
+    """
+    The n_out - 2 buckets between the end points of n values as a padded index
+    matrix (one row per bucket, short rows repeat their last index), plus each
+    bucket's start, size and centre. Cached: the chart width rarely changes.
+    """
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+    xs = np.minimum(starts[:, None] + np.arange((ends - starts).max()), ends[:, None] - 1)
+    centres = (starts + ends - 1) / 2.0
+    return starts, ends - starts, xs, centres
+
+
+def lttb_indices(values, n_out):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previous bucket's average and the next
+    bucket's average, which preserves peaks and dips. Anchoring on the previous
+    bucket's average rather than on the point kept from it makes the buckets
+    independent, so they are all picked in one numpy pass.
+    """
+    n = len(values)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.linspace(0, n - 1, n_out).round().astype(int)
+
+    y = np.asarray(values, dtype=float)
+    starts, counts, xs, centres = _lttb_buckets(n, n_out)
+    means = np.add.reduceat(y[:n - 1], starts) / counts
+    # Previous and next bucket averages; the end points stand in for them at the edges
+    prev_x, prev_y = np.append(0, centres[:-1]), np.append(y[0], means[:-1])
+    next_x, next_y = np.append(centres[1:], n - 1), np.append(means[1:], y[-1])
+    # Twice the triangle area, |(px - nx)(y - py) - (px - x)(ny - py)|, is linear in (x, y) per bucket
+    a, b = prev_x - next_x, next_y - prev_y
+    area = np.abs(a[:, None] * y[xs] + b[:, None] * xs - (a * prev_y + b * prev_x)[:, None])
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    kept[1:-1] = xs[np.arange(len(xs)), area.argmax(axis=1)]  # padding repeats a point, so never wins a tie
+    return kept
+
+
+def downsample(values, n_out, method="lttb"):
+    """
+    Reduce a 1-D series to at most n_out points.
+    method: 'lttb' (shape-preserving), 'max' or 'mean' (per equal-width bucket).
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) <= n_out:
+        return values
+    if method == "lttb":
+        return values[lttb_indices(values, n_out)]
+    starts = np.linspace(0, len(values), n_out, endpoint=False).astype(int)
+    if method == "max":
+        return np.maximum.reduceat(values, starts)
+    if method == "mean":
+        counts = np.diff(np.append(starts, len(values)))
+        return np.add.reduceat(values, starts) / counts
+    raise ValueError(f"Unknown downsample method: {method}")
+
+
+def scale_to_rows(values, rows, scale="linear", max_value=None):
+    """
+    Map non-negative values to integer bar heights in 0..rows.
+    Any positive value gets at least one row so small days stay visible.
+    scale: 'linear' or 'log'.
+    """
+    values = np.clip(np.asarray(values, dtype=float), 0, None)
+    top = float(max_value) if max_value is not None else (values.max() if len(values) else 0.0)
+    if top <= 0:
+        return np.zeros(len(values), dtype=int)
+    if scale == "log":
+        fraction = np.log1p(values) / np.log1p(top)
+    elif scale == "linear":
+        fraction = values / top
+    else:
+        raise ValueError(f"Unknown scale: {scale}")
+    heights = np.ceil(np.clip(fraction, 0, 1) * rows).astype(int)
+    return heights
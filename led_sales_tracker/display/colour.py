@@ -0,0 +1,165 @@
+"""
+Push-time colour stage: gamma, white balance and brightness folded into one
+256-entry lookup table per channel and applied to the whole frame in a single
+numpy take.
+
+Callers keep drawing full-range colours into the buffer; backends send
+BaseDisplay.frame(), which is the buffer mapped through the stage. The
+brightness follows an optional time-of-day schedule and an optional ambient
+light sensor. Each brightness level's LUT is built once and swapped in whole,
+and the mapped frame is cached: under an unchanged LUT only the band of rows
+that changed is re-mapped, and an unchanged frame costs one comparison.
+"""
+import time
+import logging
+import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+import numpy as np
+from ..config import (
+    DISPLAY_GAMMA, DISPLAY_WHITE_BALANCE, DISPLAY_BRIGHTNESS, DISPLAY_DIM_SCHEDULE,
+    DISPLAY_AMBIENT_PATH, DISPLAY_AMBIENT_FULL_LUX, TIMEZONE,
+)
+
+logger = logging.getLogger(__name__)
+
+BRIGHTNESS_STEPS = 64       # brightness is quantized, so sensor noise does not churn LUTs
+AMBIENT_MIN = 1 / 16        # the ambient sensor never dims below this fraction
+CHECK_INTERVAL = 5.0        # seconds between schedule / sensor checks
+_CHANNEL_OFFSETS = np.array([0, 256, 512], dtype=np.int16)  # index of each channel's table in the flat LUT
+
+
+@lru_cache(maxsize=BRIGHTNESS_STEPS + 1)
+def build_lut(gamma=1.0, white_balance=(1.0, 1.0, 1.0), brightness=1.0):
+    """
+    Flat (768,) uint8 table: entry c * 256 + v is channel c's output for input v,
+    255 * brightness * white_balance[c] * (v / 255) ** gamma. Cached; read-only.
+    """
+    levels = (np.arange(256) / 255.0) ** gamma
+    gains = np.clip(np.asarray(white_balance, dtype=np.float64) * brightness, 0.0, 1.0)
+    lut = np.rint(255.0 * gains[:, None] * levels[None, :]).astype(np.uint8).ravel()
+    lut.flags.writeable = False
+    return lut
+
+
+def parse_white_balance(value):
+    gains = tuple(float(g) for g in value.split(","))
+    if len(gains) != 3:
+        raise ValueError(f"White balance needs three R,G,B gains, got {value!r}")
+    return gains
+
+
+def parse_dim_schedule(value):
+    """'07:00=1,22:30=0.3' -> [(minute of day, brightness), ...] sorted by time."""
+    schedule = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        at, _, level = item.partition("=")
+        hours, _, minutes = at.strip().partition(":")
+        schedule.append((int(hours) * 60 + int(minutes or 0), float(level)))
+    return sorted(schedule)
+
+
+def scheduled_brightness(schedule, minute, default=1.0):
+    """The level of the last entry at or before minute of the day (wrapping to yesterday's last one)."""
+    if not schedule:
+        return default
+    level = schedule[-1][1]
+    for at, entry_level in schedule:
+        if at > minute:
+            break
+        level = entry_level
+    return level
+
+
+def _read_lux(path):
+    with open(path) as fp:
+        return float(fp.read().split()[0])
+
+
+class ColourStage:
+    def __init__(self, gamma=1.0, white_balance=(1.0, 1.0, 1.0), brightness=1.0, schedule=(),
+                 ambient_path="", ambient_full_lux=200.0, timezone_str=TIMEZONE):
+        self.gamma = gamma
+        self.white_balance = tuple(white_balance)
+        self.brightness = brightness
+        self.schedule = list(schedule)
+        self.ambient_path = ambient_path
+        self.ambient_full_lux = ambient_full_lux
+        self.timezone = ZoneInfo(timezone_str)
+        self._level = None
+        self._lut = None
+        self._checked_at = -float("inf")
+        self._input = None    # the last frame mapped, and the LUT it was mapped with
+        self._input_lut = None
+        self._index = None
+        self._output = None
+
+    @classmethod
+    def from_config(cls):
+        """The configured stage, or None when it would leave every colour as it is."""
+        stage = cls(
+            gamma=DISPLAY_GAMMA,
+            white_balance=parse_white_balance(DISPLAY_WHITE_BALANCE),
+            brightness=DISPLAY_BRIGHTNESS,
+            schedule=parse_dim_schedule(DISPLAY_DIM_SCHEDULE),
+            ambient_path=DISPLAY_AMBIENT_PATH,
+            ambient_full_lux=DISPLAY_AMBIENT_FULL_LUX,
+        )
+        return None if stage.is_identity() else stage
+
+    def is_identity(self):
+        return (self.gamma == 1.0 and self.white_balance == (1.0, 1.0, 1.0) and self.brightness == 1.0
+                and not self.schedule and not self.ambient_path)
+
+    def current_level(self, now=None):
+        """Brightness for now (a local datetime): the schedule, or the fixed level, scaled by ambient light."""
+        now = now or datetime.datetime.now(self.timezone)
+        level = scheduled_brightness(self.schedule, now.hour * 60 + now.minute, self.brightness)
+        if self.ambient_path:
+            try:
+                lux = _read_lux(self.ambient_path)
+            except (OSError, ValueError, IndexError) as e:
+                logger.warning(f"Could not read the ambient light sensor {self.ambient_path}: {e}")
+            else:
+                level *= min(1.0, max(AMBIENT_MIN, lux / self.ambient_full_lux))
+        return round(min(1.0, max(0.0, level)) * BRIGHTNESS_STEPS) / BRIGHTNESS_STEPS
+
+    def lut(self):
+        """The current LUT, re-evaluated at most every CHECK_INTERVAL seconds."""
+        now = time.monotonic()
+        if now - self._checked_at >= CHECK_INTERVAL:
+            self._checked_at = now
+            level = self.current_level()
+            if level != self._level:
+                if self._level is not None:
+                    logger.info(f"Display brightness {self._level:.2f} -> {level:.2f}")
+                self._level = level
+                self._lut = build_lut(self.gamma, self.white_balance, level)
+        return self._lut
+
+    def apply(self, buffer):
+        """
+        buffer mapped through the current LUT. The output is cached: under the
+        same LUT only the rows that changed since the last call are re-mapped.
+        Do not modify the result.
+        """
+        lut = self.lut()
+        if self._output is None or self._output.shape != buffer.shape:
+            self._input = np.empty_like(buffer)
+            self._index = np.empty(buffer.shape, dtype=np.int16)
+            self._output = np.empty_like(buffer)
+            self._input_lut = None
+        if lut is not self._input_lut:
+            rows = slice(None)  # a new LUT: map the whole frame
+        else:
+            changed = np.flatnonzero((buffer != self._input).any(axis=(1, 2)))
+            if len(changed) == 0:
+                return self._output
+            rows = slice(changed[0], changed[-1] + 1)
+        np.copyto(self._input[rows], buffer[rows])
+        np.add(buffer[rows], _CHANNEL_OFFSETS, out=self._index[rows])
+        np.take(lut, self._index[rows], out=self._output[rows])
+        self._input_lut = lut
+        return self._output
@@ -0,0 +1,79 @@
+"""
+Layered frame compositor.
+
+Each named layer is its own Canvas with a render callback and a dirty flag.
+Only dirty, visible layers are re-rasterized; the visible layers are then
+flattened in z-order into the display buffer. Black layer pixels are
+transparent, which matches the panel (black is "LED off").
+"""
+import numpy as np
+from .base import Canvas, ROWS, COLS
+
+
+class Layer(Canvas):
+    def __init__(self, name, z=0, render=None, rows=ROWS, cols=COLS):
+        super().__init__(rows, cols)
+        self.name = name
+        self.z = z
+        self.render = render      # callable(layer) that draws into layer; None for manually drawn layers
+        self.visible = True
+        self.dirty = True
+        self.opaque = np.zeros(self.buffer.shape[:2], dtype=bool)  # pixels this layer covers
+
+
+class Compositor:
+    def __init__(self, display, background=(0, 0, 0)):
+        self.display = display
+        self.background = background
+        self._layers = {}
+        self._ordered = []
+        self._needs_flatten = True
+
+    def add_layer(self, name, z=0, render=None):
+        rows, cols = self.display.buffer.shape[:2]
+        layer = Layer(name, z, render, rows, cols)  # layers match the display, whatever its geometry
+        self._layers[name] = layer
+        self._ordered = sorted(self._layers.values(), key=lambda l: l.z)
+        self._needs_flatten = True
+        return layer
+
+    def __getitem__(self, name):
+        return self._layers[name]
+
+    def invalidate(self, *names):
+        """Mark layers for re-rasterization on the next compose()."""
+        for name in names:
+            self._layers[name].dirty = True
+
+    def set_visible(self, name, visible):
+        layer = self._layers[name]
+        if layer.visible != visible:
+            layer.visible = visible
+            self._needs_flatten = True
+
+    def compose(self):
+        """
+        Re-rasterize dirty layers and flatten into the display buffer.
+        Returns True if the display buffer changed (i.e. a push is needed).
+        """
+        changed = self._needs_flatten
+        for layer in self._ordered:
+            # Hidden layers stay dirty and are rasterized once they are shown again
+            if not layer.dirty or not layer.visible:
+                continue
+            layer.dirty = False
+            if layer.render is not None:
+                layer.clear()
+                layer.render(layer)
+            np.any(layer.buffer, axis=2, out=layer.opaque)
+            changed = True
+        if not changed:
+            return False
+
+        out = self.display.buffer
+        out[:] = self.background
+        for layer in self._ordered:
+            if layer.visible:
+                np.copyto(out, layer.buffer, where=layer.opaque[..., None])
+        self._needs_flatten = False
+        return True
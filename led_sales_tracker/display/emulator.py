@@ -1,17 +1,31 @@
+import numpy as np
 import pygame
-from .base import BaseDisplay, ROWS, COLS
+from .base import BaseDisplay
 
 CELL_PITCH = 10  # Distance between LED centers (pixels)
 LED_DIAMETER = 8 # Diameter of the LED “beads” (pixels)
 LED_RADIUS = LED_DIAMETER // 2
 BG_COLOR = (20, 20, 20)  # Panel background
 
+
+def _led_mask():
+    """Boolean (CELL_PITCH, CELL_PITCH) mask of one LED bead centred in its cell."""
+    offsets = np.arange(CELL_PITCH) - CELL_PITCH // 2
+    return offsets[:, None] ** 2 + offsets[None, :] ** 2 < LED_RADIUS ** 2
+
+
 class EmulatedMatrixDisplay(BaseDisplay):
     def __init__(self):
         super().__init__()
         pygame.init()
-        self.screen = pygame.display.set_mode((COLS * CELL_PITCH, ROWS * CELL_PITCH))
+        self.screen = pygame.display.set_mode((self.cols * CELL_PITCH, self.rows * CELL_PITCH))
         pygame.display.set_caption("LED Matrix Emulator")
+        # Window image as (row, y-in-cell, col, x-in-cell, rgb) so each LED is a
+        # broadcast of one buffer pixel over the bead mask.
+        self._frame = np.empty((self.rows, CELL_PITCH, self.cols, CELL_PITCH, 3), dtype=np.uint8)
+        self._frame[:] = BG_COLOR
+        self._mask = _led_mask()[None, :, None, :, None]
+        self._last_buffer = None
 
     def initialize(self):
         # (Optional - keep for interface compatibility)
@@ -22,13 +36,24 @@ class EmulatedMatrixDisplay(BaseDisplay):
         for e in pygame.event.get():
             if e.type == pygame.QUIT:
                 pygame.quit()
-        self.screen.fill(BG_COLOR)
-        for y in range(ROWS):
-            for x in range(COLS):
-                colour = tuple(self.buffer[y, x])
-                center = (x * CELL_PITCH + CELL_PITCH // 2, y * CELL_PITCH + CELL_PITCH // 2)
-                pygame.draw.circle(self.screen, colour, center, LED_RADIUS)
-        pygame.display.flip()
+        frame = self.frame()
+        panels = self.changed_panels(self._last_buffer, frame)
+        if not panels:
+            return  # nothing changed since the last frame
+
+        # Only the panels that changed are redrawn and updated on screen
+        surface = pygame.surfarray.pixels3d(self.screen)  # (x, y, rgb) view; locks the surface
+        rects = []
+        for rows, cols in panels:
+            beads = self._frame[rows, :, cols]
+            np.copyto(beads, frame[rows, cols][:, None, :, None, :], where=self._mask)
+            x0, x1 = cols.start * CELL_PITCH, cols.stop * CELL_PITCH
+            y0, y1 = rows.start * CELL_PITCH, rows.stop * CELL_PITCH
+            surface[x0:x1, y0:y1] = beads.reshape(y1 - y0, x1 - x0, 3).swapaxes(0, 1)
+            rects.append(pygame.Rect(x0, y0, x1 - x0, y1 - y0))
+        del surface  # unlock before updating the window
+        pygame.display.update(rects)
+        self._last_buffer = frame.copy()
 
     def cleanup(self):
-        pygame.quit()
\ No newline at end of file
+        pygame.quit()
@@ -0,0 +1,49 @@
+"""
+The last rendered data frame, kept on disk so the panel can show it at power-on
+before the network or the SP-API client are up.
+"""
+import os
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _fsync_dir(path):
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_frame(path, frame):
+    """
+    Write frame atomically (synced temp file + rename + synced directory), so a
+    power cut leaves either the old or the new file, never a torn or empty one.
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as fp:
+            np.save(fp, frame, allow_pickle=False)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+        _fsync_dir(path)
+    except OSError as e:
+        logger.warning(f"Could not save the last frame to {path}: {e}")
+
+
+def load_frame(path, shape):
+    """The saved frame, or None if there is none or it does not fit a buffer of this shape."""
+    try:
+        frame = np.load(path, allow_pickle=False)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError) as e:  # EOFError: an empty file
+        logger.warning(f"Ignoring unreadable last frame {path}: {e}")
+        return None
+    if frame.shape != tuple(shape) or frame.dtype != np.uint8:
+        logger.info(f"Ignoring last frame {path}: shape {frame.shape} does not match the panel {tuple(shape)}")
+        return None
+    return frame
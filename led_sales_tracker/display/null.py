@@ -0,0 +1,42 @@
+import os
+import logging
+from collections import deque
+import numpy as np
+from .base import BaseDisplay
+from .png import write_png
+from ..config import NULL_DISPLAY_MAX_FRAMES, NULL_DISPLAY_DUMP_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class NullDisplay(BaseDisplay):
+    """
+    Headless backend: every push() records a copy of the frame in memory.
+    Used for benchmarks and for running without a Pi or a window. If dump_dir
+    is set, cleanup() writes the recorded frames to frames.npz and the last
+    frame to last.png there. Geometry keywords (panel_rows, panel_cols,
+    chain_length, parallel) override the configured wall.
+    """
+
+    def __init__(self, max_frames=NULL_DISPLAY_MAX_FRAMES, dump_dir=NULL_DISPLAY_DUMP_DIR, **geometry):
+        super().__init__(**geometry)
+        self.frames = deque(maxlen=max_frames or None)
+        self.push_count = 0
+        self.dump_dir = dump_dir
+
+    def push(self):
+        self.frames.append(self.frame().copy())
+        self.push_count += 1
+
+    def dump(self, directory):
+        """Write the recorded frames to <directory>/frames.npz and the latest one to last.png."""
+        if not self.frames:
+            return
+        os.makedirs(directory, exist_ok=True)
+        np.savez_compressed(os.path.join(directory, "frames.npz"), frames=np.stack(self.frames))
+        write_png(os.path.join(directory, "last.png"), self.frames[-1])
+        logger.info(f"Dumped {len(self.frames)} frame(s) to {directory}")
+
+    def cleanup(self):
+        if self.dump_dir:
+            self.dump(self.dump_dir)
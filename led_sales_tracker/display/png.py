@@ -0,0 +1,33 @@
+"""
+Minimal PNG encoder for RGB frames (no Pillow needed).
+"""
+import struct
+import zlib
+import numpy as np
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def encode_png(frame, scale=1):
+    """Encode a (H, W, 3) uint8 array as PNG bytes, optionally upscaled by an integer factor."""
+    frame = np.ascontiguousarray(frame, dtype=np.uint8)
+    if scale > 1:
+        frame = frame.repeat(scale, axis=0).repeat(scale, axis=1)
+    height, width, _ = frame.shape
+    # Each scanline is prefixed with filter type 0 (None)
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    raw[:, 1:] = frame.reshape(height, width * 3)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)  # 8-bit truecolour
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def write_png(path, frame, scale=1):
+    with open(path, "wb") as fp:
+        fp.write(encode_png(frame, scale))
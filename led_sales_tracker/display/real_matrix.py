@@ -1,18 +1,73 @@
 import numpy as np
-from .base import BaseDisplay, ROWS, COLS
+from .base import BaseDisplay
+
+# Above this many changed pixels a full-frame SetImage + SwapOnVSync is cheaper
+# than calling SetPixel from Python for each one.
+BULK_PUSH_THRESHOLD = 256
+
 
 class RealMatrixDisplay(BaseDisplay):
     def __init__(self):
         super().__init__()
         from rgbmatrix import RGBMatrix, RGBMatrixOptions
         opts = RGBMatrixOptions()
-        opts.rows = ROWS
-        opts.cols = COLS
+        opts.rows = self.panel_rows
+        opts.cols = self.panel_cols
+        opts.chain_length = self.chain_length
+        opts.parallel = self.parallel
         self.matrix = RGBMatrix(options=opts)
+        # Offscreen canvas for bulk updates; swapped in on vsync so there is no tearing
+        self._canvas = self.matrix.CreateFrameCanvas()
+        # Last frame sent to the panel, and what the offscreen canvas still holds; None forces a full push
+        self._shown = None
+        self._back = None
+        try:
+            from PIL import Image  # ships with the rgbmatrix Python bindings' SetImage support
+            self._Image = Image
+        except ImportError:
+            self._Image = None
 
     def push(self):
         # expect buffer as numpy (H, W, 3)
-        for y in range(ROWS):
-            for x in range(COLS):
-                r, g, b = map(int, self.buffer[y, x])
-                self.matrix.SetPixel(x, y, r, g, b)
\ No newline at end of file
+        frame = self.frame()
+        if self._shown is None:
+            self._push_bulk(frame)
+            return
+
+        changed = np.any(frame != self._shown, axis=2)
+        ys, xs = np.nonzero(changed)
+        if len(ys) == 0:
+            return
+        if len(ys) > BULK_PUSH_THRESHOLD:
+            self._push_bulk(frame)
+            return
+
+        # SetPixel on the matrix draws into the canvas currently on screen
+        set_pixel = self.matrix.SetPixel
+        for x, y, (r, g, b) in zip(xs.tolist(), ys.tolist(), frame[ys, xs].tolist()):
+            set_pixel(x, y, r, g, b)
+        self._shown[ys, xs] = frame[ys, xs]
+
+    def _push_bulk(self, frame):
+        """Redraw the panels that differ on the offscreen canvas and swap it in on vsync."""
+        # SetImage copies pixels while holding the GIL, so threads would not help;
+        # on a wall, skipping the panels that did not change is what saves time
+        for panel in self.changed_panels(self._back, frame):
+            self._draw_panel(frame, panel)
+        self._canvas = self.matrix.SwapOnVSync(self._canvas)
+        # The canvas that was on screen becomes the offscreen one
+        self._back, self._shown = self._shown, frame.copy()
+
+    def _draw_panel(self, frame, panel):
+        rows, cols = panel
+        tile = np.ascontiguousarray(frame[rows, cols])
+        if self._Image is not None:
+            self._canvas.SetImage(self._Image.fromarray(tile, "RGB"), cols.start, rows.start)
+        else:
+            set_pixel = self._canvas.SetPixel
+            for y, row in enumerate(tile.tolist(), rows.start):
+                for x, (r, g, b) in enumerate(row, cols.start):
+                    set_pixel(x, y, r, g, b)
+
+    def cleanup(self):
+        self.matrix.Clear()
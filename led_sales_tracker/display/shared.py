@@ -0,0 +1,276 @@
+"""
+Shared-memory framebuffer and a display-driver process.
+
+The panel refresh is sensitive to CPU spikes in the process that drives it.
+With DISPLAY_DRIVER_PROCESS on, the real backend runs in its own process
+(optionally pinned to an isolated core), and the main loop only copies
+finished frames into a shared-memory double buffer:
+
+    header: magic, published sequence, sequence being written, rows, cols, owner pid
+    slot 0, slot 1: one (rows, cols, 3) uint8 frame each
+
+Frame n is written into slot n % 2, and published by storing n in the header
+once the slot is complete. A reader copies the slot of the latest published
+frame and keeps the copy unless a writer has meanwhile started frame n + 2,
+which reuses that slot. Neither side ever waits on the other. The header words
+are 32-bit, so their loads and stores are single-copy atomic on the 32-bit ARM
+Pis too, and both sides put a memory barrier between the sequence words and the
+frame copy. Other processes (e.g. the portal's live preview) can attach by name
+and read frames too.
+"""
+import os
+import signal
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+from .base import BaseDisplay, ROWS, COLS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 0x4C464232  # "LFB2"
+_HEADER_WORDS = 6  # magic, published, writing, rows, cols, owner pid (uint32 each)
+_HEADER_BYTES = 64
+_PUBLISHED, _WRITING, _ROWS, _COLS, _OWNER = 1, 2, 3, 4, 5
+_SEQ_MAX = 0xFFFFFFFF
+
+_fence_lock = threading.Lock()
+
+
+def _fence():
+    """
+    Full memory barrier. CPython has no fence of its own, but acquiring and
+    releasing a lock orders the memory accesses on either side (a dmb on ARM).
+    """
+    with _fence_lock:
+        pass
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # alive, under another user
+    return True
+
+
+def _block_inode(name):
+    """Inode of the block's /dev/shm entry (None if it is gone, or where there is no /dev/shm)."""
+    try:
+        return os.stat(os.path.join("/dev/shm", name)).st_ino
+    except OSError:
+        return None
+
+
+class SharedFramebuffer:
+    """A seq-counted double buffer of RGB frames in a named shared-memory block."""
+
+    def __init__(self, shm, owner):
+        self._shm = shm
+        self.owner = owner
+        self.name = shm.name
+        self._inode = _block_inode(shm.name)
+        self._header = np.ndarray((_HEADER_WORDS,), dtype=np.uint32, buffer=shm.buf)
+        if int(self._header[0]) != MAGIC:
+            raise ValueError(f"Shared memory block {shm.name!r} is not a framebuffer")
+        self.shape = (int(self._header[_ROWS]), int(self._header[_COLS]), 3)
+        frame_bytes = int(np.prod(self.shape))
+        self._slots = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=shm.buf, offset=_HEADER_BYTES + i * frame_bytes)
+            for i in range(2)
+        ]
+
+    @classmethod
+    def create(cls, name=None, rows=ROWS, cols=COLS):
+        """
+        Create the block, replacing a stale one left behind by a crashed run.
+        Raises FileExistsError while the process that created the block is
+        still alive (e.g. a second tracker instance).
+        """
+        size = _HEADER_BYTES + 2 * rows * cols * 3
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = shared_memory.SharedMemory(name=name)
+            magic = owner = 0
+            if existing.size >= _HEADER_BYTES:
+                header = np.ndarray((_HEADER_WORDS,), dtype=np.uint32, buffer=existing.buf)
+                magic, owner = int(header[0]), int(header[_OWNER])
+                del header  # the view must go before the block can be closed
+            existing.close()
+            if magic != MAGIC or _pid_alive(owner):
+                # Leave it alone, and keep this process's resource tracker from unlinking it at exit
+                resource_tracker.unregister(existing._name, "shared_memory")
+                reason = f"in use by pid {owner}" if magic == MAGIC else "not a framebuffer"
+                raise FileExistsError(f"Shared memory block {name!r} is {reason}; is another tracker running?")
+            logger.warning(f"Replacing stale shared framebuffer {name!r} (pid {owner} is gone)")
+            existing.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.uint32, buffer=shm.buf)
+        header[:] = (MAGIC, 0, 0, rows, cols, os.getpid())
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name, untrack=True):
+        """
+        Open an existing block read/write. Raises FileNotFoundError if no tracker is running.
+        untrack=False is for the driver process, which shares the tracker's resource tracker.
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        # Python < 3.13 registers attached blocks with this process's resource
+        # tracker, which would unlink the block when this process exits.
+        if untrack:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, owner=False)
+
+    def replaced(self):
+        """
+        True when the name no longer refers to this block: the tracker restarted
+        and created a new one (or exited), so readers should attach again.
+        """
+        return self._inode is not None and _block_inode(self.name) != self._inode
+
+    @property
+    def sequence(self):
+        """Sequence number of the latest published frame (0 before the first)."""
+        return int(self._header[_PUBLISHED])
+
+    def write(self, frame):
+        """Publish frame as the next sequence number. Never blocks; returns the new sequence."""
+        seq = int(self._header[_PUBLISHED]) + 1
+        if seq > _SEQ_MAX:
+            seq = 2  # wrap to the next even number, so slots keep alternating (0 means nothing published)
+        self._header[_WRITING] = seq
+        _fence()  # readers must see the slot claimed before any of it changes
+        np.copyto(self._slots[seq & 1], frame)
+        _fence()  # ...and the whole frame before it is published
+        self._header[_PUBLISHED] = seq
+        return seq
+
+    def read(self, out=None, since=None, attempts=3):
+        """
+        Copy the latest frame into out (a new array if None). Returns (sequence, frame),
+        or (since, None) when nothing newer than since has been published or every
+        attempt raced a writer.
+        """
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        for _ in range(attempts):
+            seq = int(self._header[_PUBLISHED])
+            if seq == 0 or seq == since:
+                return since, None
+            _fence()
+            np.copyto(out, self._slots[seq & 1])
+            _fence()  # re-read the writer's claim only after the copy is complete
+            if (int(self._header[_WRITING]) - seq) & _SEQ_MAX <= 1:
+                return seq, out  # no writer has started reusing this slot
+        return since, None
+
+    def close(self):
+        self._header = self._slots = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def _run_driver(name, backend, frame_ready, stop, cpu):
+    """Driver process: push every newly published frame to the real backend."""
+    from . import create_backend
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    # Shutdown is coordinated by the parent; a SIGTERM to the whole group just stops the loop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda sig, frame: stop.set())
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not pin the display driver to CPU {cpu}: {e}")
+
+    framebuffer = SharedFramebuffer.attach(name, untrack=False)
+    disp = create_backend(backend)
+    disp.initialize()
+    logger.info(f"Display driver running ({type(disp).__name__}, pid {os.getpid()}, cpu {cpu})")
+    seq = None
+    try:
+        while not stop.is_set():
+            frame_ready.wait(1.0)
+            frame_ready.clear()
+            seq, frame = framebuffer.read(disp.buffer, since=seq)
+            if frame is not None:
+                disp.push()
+    finally:
+        disp.cleanup()
+        framebuffer.close()
+
+
+class SharedMemoryDisplay(BaseDisplay):
+    """
+    Producer side: push() publishes the buffer to the shared framebuffer and
+    signals the driver process, which owns the actual backend.
+    """
+
+    def __init__(self, backend, name=None, cpu=None):
+        super().__init__()
+        self.backend = backend
+        self.name = name
+        self.cpu = cpu
+        self.framebuffer = None
+        self._process = None
+        # spawn, not fork: the driver is (re)started while the fetcher, HTTP servers and
+        # config watcher run, and a fork taken while one of them holds a lock can deadlock.
+        # The fresh interpreter attaches to the framebuffer by name.
+        self._context = multiprocessing.get_context("spawn")
+        self._frame_ready = self._stop = None
+
+    def _start_driver(self):
+        # New events for every driver: one that died inside wait() leaves an Event
+        # whose set() would block the render loop
+        self._frame_ready = self._context.Event()
+        self._stop = self._context.Event()
+        self._process = self._context.Process(
+            target=_run_driver,
+            args=(self.framebuffer.name, self.backend, self._frame_ready, self._stop, self.cpu),
+            name="display-driver",
+            daemon=True,
+        )
+        self._process.start()
+
+    def initialize(self):
+        self.framebuffer = SharedFramebuffer.create(self.name, *self.buffer.shape[:2])
+        self._start_driver()
+
+    def _stop_driver(self):
+        self._stop.set()
+        self._frame_ready.set()
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.terminate()
+
+    def set_backend(self, backend):
+        """Restart the driver on another backend; it picks up the latest published frame."""
+        if backend == self.backend:
+            return
+        logger.info(f"Switching the display driver from {self.backend} to {backend}")
+        self._stop_driver()
+        self.backend = backend
+        self._start_driver()
+        self._frame_ready.set()
+
+    def push(self):
+        self.framebuffer.write(self.buffer)
+        if not self._process.is_alive():
+            logger.error(f"Display driver exited (code {self._process.exitcode}); restarting it")
+            self._start_driver()
+        self._frame_ready.set()
+
+    def cleanup(self):
+        if self._process is not None:
+            self._stop_driver()
+        if self.framebuffer is not None:
+            self.framebuffer.close()
@@ -0,0 +1,119 @@
+"""
+Background data fetcher.
+
+Runs the (blocking) Amazon fetch on its own thread and publishes each result as
+an immutable SalesSnapshot. The render loop only ever reads the latest
+snapshot, so network latency and retry sleeps never stall the display.
+"""
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from .api.scheduler import backoff_delay
+from .api.cache import CacheResult
+
+logger = logging.getLogger(__name__)
+
+ERROR_RETRY_DELAY = 10  # base delay before retrying after a failed fetch; backs off on repeated failures
+
+
+@dataclass(frozen=True)
+class SalesSnapshot:
+    """One published fetch result. Never mutated after it is published."""
+    sequence: int                  # increments with every publish
+    data: Optional[Any]            # result of the fetch function (None if nothing fetched yet)
+    fetched_at: float              # time.monotonic() when this snapshot was published
+    error: Optional[str] = None    # set when the fetch failed; data is then the last good result
+    next_fetch_at: Optional[float] = None  # time.monotonic() when the next fetch is due
+    data_age: float = 0.0          # how old data already was when published (seconds)
+
+    def age(self, now=None):
+        """Age of data in seconds at monotonic time now."""
+        return self.data_age + ((now or time.monotonic()) - self.fetched_at)
+
+
+class BackgroundFetcher(threading.Thread):
+    """
+    interval is either a number of seconds or a callable returning the delay
+    until the next fetch (e.g. PollScheduler.next_interval).
+    fetch_fn may return plain data or a CacheResult, whose age and error are
+    carried over into the snapshot.
+    """
+
+    def __init__(self, fetch_fn: Callable[[], Any], interval, error_retry_delay=ERROR_RETRY_DELAY):
+        super().__init__(name="sales-fetcher", daemon=True)
+        self.fetch_fn = fetch_fn
+        self.interval = interval
+        self.error_retry_delay = error_retry_delay
+        self._snapshot = None
+        self._sequence = 0
+        self._failures = 0  # consecutive failed fetches
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._listeners = []
+
+    @property
+    def latest(self) -> Optional[SalesSnapshot]:
+        """The most recently published snapshot, or None before the first fetch completes."""
+        return self._snapshot  # attribute reads are atomic; snapshots are immutable
+
+    def add_listener(self, callback):
+        """callback(snapshot) runs on the fetcher thread after every publish."""
+        self._listeners.append(callback)
+
+    def _next_delay(self):
+        return self.interval() if callable(self.interval) else self.interval
+
+    def _publish(self, data, delay, error=None, data_age=0.0):
+        self._sequence += 1
+        now = time.monotonic()
+        self._snapshot = SalesSnapshot(
+            sequence=self._sequence,
+            data=data,
+            fetched_at=now,
+            error=error,
+            next_fetch_at=now + delay,
+            data_age=data_age,
+        )
+        for callback in self._listeners:
+            callback(self._snapshot)
+
+    def _sleep(self, delay):
+        """Wait for delay seconds, or until stop() / wake() is called."""
+        self._wake_event.wait(delay)
+        self._wake_event.clear()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                result = self.fetch_fn()
+            except Exception as e:
+                logger.error(f"Background fetch failed: {e}", exc_info=True)
+                self._failures += 1
+                # Jittered backoff on repeated failures (about error_retry_delay on the first),
+                # but never wait longer than a normal refresh
+                half = self.error_retry_delay / 2
+                delay = min(self._next_delay(), half + backoff_delay(self._failures, base=half))
+                previous = self._snapshot
+                if previous is not None and previous.data is not None:
+                    self._publish(previous.data, delay, error=str(e), data_age=previous.age())
+                else:
+                    self._publish(None, delay, error=str(e))
+                self._sleep(delay)
+                continue
+            self._failures = 0
+            delay = self._next_delay()
+            if isinstance(result, CacheResult):
+                self._publish(result.value, delay, error=result.error, data_age=result.age)
+            else:
+                self._publish(result, delay)
+            self._sleep(delay)
+
+    def wake(self):
+        """Run the next fetch now (e.g. when the settings changed)."""
+        self._wake_event.set()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake_event.set()
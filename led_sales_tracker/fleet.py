@@ -0,0 +1,312 @@
+"""
+Fleet mode: one hub fetches from SP-API and serves the processed metrics to
+any number of client panels, so upstream calls do not grow with the fleet.
+
+The hub serves GET /snapshot over plain HTTP. Every published snapshot gets an
+ETag. A client long-polls with If-None-Match set to the ETag it holds and
+?wait=<seconds>. The request returns as soon as the hub publishes something
+newer, or with 304 when nothing changed before the wait ran out. When the
+client's version is still in the hub's short history, the response is a delta
+against it: each series keeps the rows that did not change and only the rows
+after them are sent (typically today and the settle window). Otherwise the
+full snapshot is sent. Response bodies are encoded once per published
+version, however many panels ask.
+"""
+import json
+import time
+import uuid
+import logging
+import threading
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+from .api.order_metrics import OrderMetrics, MarketplaceMetrics
+from .api.rollups import Rollups
+from .api.scheduler import backoff_delay
+from .fetcher import BackgroundFetcher, ERROR_RETRY_DELAY
+
+logger = logging.getLogger(__name__)
+
+HUB_HISTORY = 8             # published versions a delta can be based on
+MAX_WAIT = 60.0             # longest long-poll the hub holds open (seconds)
+CONTENT_TYPE = "application/json"
+
+
+# --- Wire format ---
+
+def _encode_series(metrics, start=0):
+    """Rows from start on, with dates as integer offsets from the epoch in the series' unit."""
+    return {
+        'unit': metrics.unit,
+        'currency': metrics.currency,
+        'dates': metrics.dates[start:].astype(np.int64).tolist(),
+        'units': metrics.units[start:].tolist(),
+        'orders': metrics.orders[start:].tolist(),
+        'sales': metrics.sales[start:].tolist(),
+    }
+
+
+def _decode_series(encoded):
+    return OrderMetrics(
+        dates=np.array(encoded['dates'], dtype=np.int64).astype(f"datetime64[{encoded['unit']}]"),
+        units=np.array(encoded['units'], dtype=np.int64),
+        orders=np.array(encoded['orders'], dtype=np.int64),
+        sales=np.array(encoded['sales'], dtype=np.float64),
+        currency=encoded['currency'],
+    )
+
+
+def series_delta(base, new):
+    """
+    new relative to base: {'drop': d, 'keep': k, 'tail': rows} means base[d:d + k]
+    followed by the tail rows. Falls back to {'full': rows} when they do not line up.
+    """
+    if base is None or len(base) == 0 or len(new) == 0 or base.unit != new.unit or base.currency != new.currency:
+        return {'full': _encode_series(new)}
+    drop = int(np.searchsorted(base.dates, new.dates[0]))
+    if drop == len(base) or base.dates[drop] != new.dates[0]:
+        return {'full': _encode_series(new)}
+    overlap = min(len(base) - drop, len(new))
+    old = slice(drop, drop + overlap)
+    same = (
+        (base.dates[old] == new.dates[:overlap]) & (base.units[old] == new.units[:overlap])
+        & (base.orders[old] == new.orders[:overlap])
+        & ((base.sales[old] == new.sales[:overlap]) | (np.isnan(base.sales[old]) & np.isnan(new.sales[:overlap])))
+    )
+    keep = overlap if same.all() else int(np.argmin(same))  # length of the unchanged run
+    return {'drop': drop, 'keep': keep, 'tail': _encode_series(new, keep)}
+
+
+def apply_series_delta(base, delta):
+    if 'full' in delta:
+        return _decode_series(delta['full'])
+    tail = _decode_series(delta['tail'])
+    kept = slice(delta['drop'], delta['drop'] + delta['keep'])
+    if delta['drop'] == 0 and delta['keep'] == len(base) and len(tail) == 0:
+        return base  # unchanged: keep the same object, so the panel knows not to redraw
+    return OrderMetrics(
+        dates=np.concatenate([base.dates[kept], tail.dates]),
+        units=np.concatenate([base.units[kept], tail.units]),
+        orders=np.concatenate([base.orders[kept], tail.orders]),
+        sales=np.concatenate([base.sales[kept], tail.sales]),
+        currency=tail.currency,
+    )
+
+
+_ROLLUP_SERIES = ('weeks', 'weeks_year_ago', 'months', 'months_year_ago')
+
+
+def rollups_delta(base, new):
+    """The long-history page series relative to the client's (only the current week / month usually changes)."""
+    if new is None:
+        return None
+    return {name: series_delta(base and getattr(base, name), getattr(new, name)) for name in _ROLLUP_SERIES}
+
+
+def apply_rollups_delta(base, delta):
+    if delta is None:
+        return None
+    series = {name: apply_series_delta(base and getattr(base, name), delta[name]) for name in _ROLLUP_SERIES}
+    if base is not None and all(series[name] is getattr(base, name) for name in _ROLLUP_SERIES):
+        return base
+    return Rollups(**series)
+
+
+def snapshot_delta(base, new):
+    """A MarketplaceMetrics (or None) relative to the one the client holds (None: send everything)."""
+    if new is None:
+        return None
+    base_markets = base.by_marketplace if base is not None else {}
+    today_hourly = base.today_hourly if base is not None else None
+    return {
+        'merged': series_delta(base and base.merged, new.merged),
+        'by_marketplace': {name: series_delta(base_markets.get(name), m) for name, m in new.by_marketplace.items()},
+        'errors': new.errors,
+        'today_hourly': None if new.today_hourly is None else series_delta(today_hourly, new.today_hourly),
+        'rollups': rollups_delta(base and base.rollups, new.rollups),
+    }
+
+
+def apply_snapshot_delta(base, delta):
+    if delta is None:
+        return None
+    base_markets = base.by_marketplace if base is not None else {}
+    merged = apply_series_delta(base and base.merged, delta['merged'])
+    by_marketplace = {
+        name: apply_series_delta(base_markets.get(name), series) for name, series in delta['by_marketplace'].items()
+    }
+    today_hourly = delta['today_hourly'] and apply_series_delta(base and base.today_hourly, delta['today_hourly'])
+    # .get: a hub from before the long-history pages sends no rollups
+    rollups = apply_rollups_delta(base and base.rollups, delta.get('rollups'))
+    if (base is not None and merged is base.merged and today_hourly is base.today_hourly
+            and rollups is base.rollups
+            and delta['errors'] == base.errors and by_marketplace.keys() == base_markets.keys()
+            and all(m is base_markets[name] for name, m in by_marketplace.items())):
+        return base
+    return MarketplaceMetrics(merged=merged, by_marketplace=by_marketplace, errors=delta['errors'],
+                              today_hourly=today_hourly, rollups=rollups)
+
+
+# --- Hub ---
+
+class HubServer:
+    """Keeps the last few published snapshots and answers (long-)polls for them."""
+
+    def __init__(self, history=HUB_HISTORY):
+        self._boot = uuid.uuid4().hex[:8]  # ETags from an earlier hub process never match
+        self._history = OrderedDict()      # etag -> SalesSnapshot, oldest first
+        self._latest = None                # (etag, snapshot)
+        self._bodies = {}                  # base etag -> encoded data for the latest version
+        self._max_history = history
+        self._changed = threading.Condition()
+
+    def publish(self, snapshot):
+        """BackgroundFetcher listener: make snapshot the latest version and wake every waiting client."""
+        etag = f'"{self._boot}-{snapshot.sequence}"'
+        with self._changed:
+            self._history[etag] = snapshot
+            while len(self._history) > self._max_history:
+                self._history.popitem(last=False)
+            self._latest = (etag, snapshot)
+            self._bodies = {}
+            self._changed.notify_all()
+
+    def wait_for_change(self, known, timeout):
+        """The latest (etag, snapshot) once it differs from known, or None if it did not within timeout."""
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self._latest is None or self._latest[0] == known:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._changed.wait(remaining)
+            return self._latest
+
+    def response_body(self, known, etag, snapshot):
+        """JSON for moving a client from known to etag; the data part is encoded once per base."""
+        with self._changed:
+            base = self._history.get(known)
+            base_etag = known if base is not None else None
+            data = self._bodies.get(base_etag) if etag == self._latest[0] else None
+            if data is None:
+                data = json.dumps(snapshot_delta(base.data if base else None, snapshot.data))
+                if etag == self._latest[0]:
+                    self._bodies[base_etag] = data
+        now = time.monotonic()
+        header = json.dumps({
+            'etag': etag,
+            'base': base_etag,
+            'age': snapshot.age(now),
+            'next_fetch_in': max(0.0, (snapshot.next_fetch_at or now) - now),
+            'error': snapshot.error,
+        })
+        return f'{header[:-1]}, "data": {data}}}'.encode("utf-8")
+
+
+def start_hub_server(fetcher, port, host="0.0.0.0"):
+    """Serve the fetcher's snapshots on GET /snapshot from a daemon thread. Returns the HTTP server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    hub = HubServer()
+    fetcher.add_listener(hub.publish)
+    if fetcher.latest is not None:
+        hub.publish(fetcher.latest)
+
+    class HubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path != "/snapshot":
+                self.send_error(404)
+                return
+            try:
+                wait = min(max(float(parse_qs(url.query).get("wait", ["0"])[0]), 0.0), MAX_WAIT)
+            except ValueError:
+                self.send_error(400, "wait must be a number of seconds")
+                return
+            known = self.headers.get("If-None-Match")
+            latest = hub.wait_for_change(known, wait)
+            if latest is None:
+                self.send_response(304 if known else 503)
+                if known:
+                    self.send_header("ETag", known)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            etag, snapshot = latest
+            body = hub.response_body(known, etag, snapshot)
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    class HubHTTPServer(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 128  # every panel reconnects at once right after a publish
+
+    server = HubHTTPServer((host, port), HubHandler)
+    threading.Thread(target=server.serve_forever, name="hub-http", daemon=True).start()
+    logger.info(f"Serving snapshots to client panels on http://{host}:{server.server_address[1]}/snapshot")
+    return server
+
+
+# --- Client ---
+
+class HubSubscriber(BackgroundFetcher):
+    """
+    Client mode: a drop-in for BackgroundFetcher that long-polls a hub instead
+    of calling SP-API. Snapshots are published as soon as the hub has them; the
+    loading bar follows the hub's own poll schedule.
+    """
+
+    def __init__(self, url, wait=30.0, error_retry_delay=ERROR_RETRY_DELAY):
+        super().__init__(fetch_fn=None, interval=None, error_retry_delay=error_retry_delay)
+        self.name = "hub-subscriber"
+        self.url = url.rstrip("/")
+        self.wait = wait
+        self._etag = None
+        self._data = None
+
+    def _poll(self):
+        """One long-poll. Returns the decoded response, or None if nothing changed."""
+        request = urllib.request.Request(f"{self.url}/snapshot?wait={self.wait:g}")
+        if self._etag:
+            request.add_header("If-None-Match", self._etag)
+        try:
+            with urllib.request.urlopen(request, timeout=self.wait + 10) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            if e.code in (304, 503):  # no change / the hub has no data yet
+                return None
+            raise
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                body = self._poll()
+            except Exception as e:
+                self._failures += 1
+                half = self.error_retry_delay / 2
+                delay = half + backoff_delay(self._failures, base=half)
+                logger.error(f"Hub {self.url} unreachable: {e}")
+                previous = self._snapshot
+                data_age = previous.age() if previous is not None else 0.0
+                self._publish(self._data, delay, error=str(e), data_age=data_age)
+                self._sleep(delay)
+                continue
+            self._failures = 0
+            if body is None:
+                continue
+            base = self._data if body['base'] is not None and body['base'] == self._etag else None
+            self._data = apply_snapshot_delta(base, body['data'])
+            self._etag = body['etag']
+            self._publish(self._data, body['next_fetch_in'], error=body['error'], data_age=body['age'])
@@ -0,0 +1,254 @@
+"""
+Hot-path instrumentation: fixed-size histograms and counters kept in memory
+and served in the Prometheus text format.
+
+Every metric lives in the module-level REGISTRY. Histograms have a fixed set
+of buckets, so memory stays constant no matter how long the tracker runs.
+start_metrics_server() serves the registry from a small standalone HTTP
+server (GET /metrics) on a daemon thread.
+"""
+import time
+import bisect
+import logging
+import threading
+from contextlib import ContextDecorator
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans a sub-millisecond render up to a fetch that needed its retries
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_bound(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+class _Timer(ContextDecorator):
+    """Observes the elapsed time of a with-block (or decorated call) into a histogram."""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def _recreate_cm(self):
+        return _Timer(self.histogram)  # a fresh timer per decorated call, so concurrent calls don't share _start
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.histogram.observe(self.elapsed)
+        return False
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self.labels()  # unlabelled metrics are exported (as zero) from the start
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values, **kwargs):
+        """The child for one combination of label values (created on first use)."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def children(self):
+        """{label values: child} for every combination seen so far (e.g. to total a metric in-process)."""
+        with self._lock:
+            return dict(self._children)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self.children().items()):  # a snapshot: fetcher threads may add labels
+            lines.extend(self._render_child(key, child))
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _render_child(self, key, child):
+        counts, total = child.snapshot()
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_bound(bound))])
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {total!r}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def _render_child(self, key, child):
+        yield f"{self.name}_total{_format_labels(self.labelnames, key)} {child.value}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        """The whole registry in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+SP_API_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "led_sales_sp_api_request_seconds", "SP-API call latency, excluding LWA token refresh.",
+    ("operation", "marketplace", "granularity"),
+))
+LWA_REFRESH_SECONDS = REGISTRY.register(Histogram(
+    "led_sales_lwa_token_refresh_seconds", "Login with Amazon access-token refresh latency.",
+))
+SP_API_RETRIES = REGISTRY.register(Counter(
+    "led_sales_sp_api_retries", "SP-API attempts that failed with a retryable error.",
+    ("operation", "reason"),
+))
+PARSE_SECONDS = REGISTRY.register(Histogram(
+    "led_sales_parse_seconds", "Order-metrics payload parsing and metrics-store access.", ("stage",),
+))
+RENDER_SECONDS = REGISTRY.register(Histogram(
+    "led_sales_render_seconds", "Compositing one frame (layer rasterization and flattening).",
+))
+PUSH_SECONDS = REGISTRY.register(Histogram(
+    "led_sales_push_seconds", "Display push() latency.", ("backend",),
+))
+FRAMES = REGISTRY.register(Counter("led_sales_frames", "Frames run by the frame scheduler."))
+FRAMES_DROPPED = REGISTRY.register(Counter(
+    "led_sales_frames_dropped", "Frame slots skipped because a frame ran late.",
+))
+
+# LWA time spent on the current thread, so a fetch can subtract it from its own duration
+_lwa_time = threading.local()
+
+
+def record_lwa_refresh(seconds):
+    LWA_REFRESH_SECONDS.observe(seconds)
+    _lwa_time.seconds = getattr(_lwa_time, "seconds", 0.0) + seconds
+
+
+def take_lwa_time():
+    """LWA refresh time accumulated on this thread since the last call."""
+    seconds = getattr(_lwa_time, "seconds", 0.0)
+    _lwa_time.seconds = 0.0
+    return seconds
+
+
+def start_metrics_server(port, host="0.0.0.0", registry=REGISTRY):
+    """Serve GET /metrics on a daemon thread. Returns the server (call shutdown() to stop it)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only needed once the endpoint is on
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.debug(f"{self.address_string()} {format % args}")
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"Serving Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -1,15 +1,30 @@
 #!/usr/bin/env python3
 """
-Entry point: chooses display backend, periodically pulls data and renders.
+Entry point: chooses display backend, pulls data in the background and renders
+the latest snapshot at a fixed frame rate.
 """
 import time
 import logging
 import signal
 import sys
+import threading
 from datetime import datetime
-from .config import REFRESH_INTERVAL # Assuming this is the duration for the loading bar animation
-from .display import get_display
-from .api.amazon_client import AmazonClient
+from zoneinfo import ZoneInfo
+import numpy as np
+from .config import (
+    FRAME_RATE, CHART_SCALE, HISTORY_DAYS, INTRADAY,
+    METRICS_PORT, METRICS_BIND, TIMEZONE, LAST_FRAME_PATH,
+    FLEET_MODE, HUB_PORT, HUB_BIND, HUB_URL,
+)
+from .config_store import ConfigStore, ConfigWatcher
+from .display import get_display, switch_backend
+from .display.base import GLYPH_ADVANCE
+from .display.compositor import Compositor
+from .display.animation import FrameScheduler, Progress, Marquee, Tween
+from .display.last_frame import save_frame, load_frame
+from .api.scheduler import PollScheduler, RateLimiter
+from .fetcher import BackgroundFetcher
+from .instrumentation import RENDER_SECONDS, PUSH_SECONDS, start_metrics_server
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,132 +34,421 @@ logging.basicConfig(
 log = logging.getLogger("main_app") # Changed logger name slightly for clarity
 
 # --- Helper Rendering Functions ---
+# Each helper rasterizes one compositor layer; main() decides when a layer is dirty.
 
-def _render_sales_data_on_display(disp, units_data):
-    """Renders the sales data and current time on the display."""
-    disp.clear()
-    current_time_str = datetime.now().strftime("%H:%M")  # or %I:%M%p for 12-hr
-    msg = f"{units_data.get('total_units', 'N/A')}   {current_time_str}"
-    
-    series = []
-    # Ensure daily_units exists and is a list
-    daily_units_list = units_data.get('daily_units', [])
-    if isinstance(daily_units_list, list):
-        for i, day_data in enumerate(daily_units_list):
-            # Make sure 'units_sold' key exists, default to 0 if not
-            units_sold = day_data.get('units_sold', 0)
-            x = i
-            y = -units_sold  # Negative y to "go up" if (0,0) is top-left
-            series.append((x, y))
-
-    # Draw the sales series (e.g., a line graph)
-    # Assuming y=32 is a baseline for the graph on your display
-    disp.draw_series(series, x=0, y=32, colour=(0, 255, 0)) # Green
-
-    # Draw the text message (total units and time)
-    disp.draw_text(msg, x=1, y=1, colour=(0, 255, 0)) # Green
-    disp.push() # Push the rendered sales data to the display immediately
-
-def _animate_loading_bar(disp, total_bar_segments, total_bar_duration, animation_start_ref_time):
+CHART_TOP = 9  # first chart row: below the loading bar (row 0) and the 7-row text line
+GREEN = (0, 255, 0)
+CYAN = (0, 200, 255)
+YEAR_AGO = (70, 70, 160)  # the same period a year earlier, drawn behind the long-history bars
+ROLLUP_PAGES = ("weeks", "months")  # long-history pages, shown when the snapshot carries rollups
+CLOCK_WIDTH = len("00:00") * GLYPH_ADVANCE  # the clock is right-aligned on the text line
+TRANSITION_SECONDS = 0.5  # bars grow in over this long when the page changes
+
+def _hourly_units(hourly):
+    """Today's units as 24 slots indexed by local hour (hours not yet fetched are 0)."""
+    slots = np.zeros(24, dtype=np.int64)
+    hours = (hourly.dates - hourly.dates.astype("datetime64[D]")).astype(int)
+    np.add.at(slots, hours, hourly.units)
+    return slots
+
+def _totals_width(cols):
+    """Columns left of the clock for the totals; wider text scrolls (32 on a 64-wide panel)."""
+    return cols - CLOCK_WIDTH - 2
+
+def _chart_max(values, growth):
+    """max_value that draws the chart at `growth` (0..1) of its full height."""
+    return None if growth >= 1.0 else max(float(np.max(values)), 1.0) / max(growth, 1e-3)
+
+def _rollup_pages(metrics):
+    """The long-history pages the data carries (those enabled where it was fetched: here or on the hub)."""
+    if metrics.rollups is None:
+        return ()
+    return tuple(page for page in ROLLUP_PAGES if len(metrics.rollups.page(page)[0]))
+
+def _render_rollup_chart(layer, rollups, page, growth):
     """
-    Animates a loading bar over a specified duration.
-    The animation itself will take 'total_bar_duration'.
+    Draws this period's weekly or monthly units over the year before's (dimmer, behind),
+    on one scale, from the precomputed rollups: one bar per bucket, widened to fill the panel.
     """
-    if total_bar_segments <= 0:
-        return # Nothing to animate
-
-    time_per_segment = total_bar_duration / total_bar_segments
-
-    for current_segment_num in range(total_bar_segments + 1): # Loop from 0 to total_bar_segments
-        # Calculate elapsed time since the animation reference start
-        elapsed_since_ref_start = time.time() - animation_start_ref_time
-        
-        # When should the (current_segment_num)-th step of logic ideally execute?
-        # For drawing pixel N, we consider it at step N+1.
-        target_time_for_this_step = current_segment_num * time_per_segment
-
-        if current_segment_num > 0:  # Only draw if we're past the first conceptual segment (i.e., drawing pixel 0 onwards)
-            pixel_to_draw_index = current_segment_num - 1 # Pixels are 0-indexed
-
-            # Wait if we are too early for this step's pixel drawing
-            if elapsed_since_ref_start < target_time_for_this_step:
-                sleep_duration = target_time_for_this_step - elapsed_since_ref_start
-                if sleep_duration > 0: # Defensive check for tiny negative sleeps
-                    time.sleep(sleep_duration)
-            
-            disp.set_pixel(pixel_to_draw_index, 0, (100, 100, 100))  # Grey pixel at y=0
-            disp.push() # Push the new segment of the loading bar
-
-        # If all segments (pixels 0 to total_bar_segments-1) have been drawn
-        if current_segment_num >= total_bar_segments:
-            break # Exit the loop
-            
-        # Recalculate elapsed time after drawing and potential sleep
-        elapsed_after_draw = time.time() - animation_start_ref_time
-        
-        # Determine when the next segment's logic should ideally start
-        target_time_for_next_step_processing = (current_segment_num + 1) * time_per_segment
-        
-        # Sleep until it's time to process the next segment
-        if elapsed_after_draw < target_time_for_next_step_processing:
-            sleep_duration_for_next = target_time_for_next_step_processing - elapsed_after_draw
-            if sleep_duration_for_next > 0: # Defensive check
-                time.sleep(sleep_duration_for_next)
-
-def _render_error_on_display(disp, error_text="Error"):
-    """Clears display and shows an error message."""
-    disp.clear()
-    disp.draw_text(error_text, x=1, y=1, colour=(255, 0, 0)) # Red
-    disp.push()
+    current, year_ago = rollups.page(page)
+    repeat = max(1, layer.cols // len(current))
+    top = max(float(current.units.max()), float(year_ago.units.max()), 1.0)
+    max_value = top / max(growth, 1e-3)
+    x = (layer.cols - len(current) * repeat) // 2
+    for series, colour in ((year_ago, YEAR_AGO), (current, GREEN)):
+        values = np.repeat(series.units, repeat)
+        # 'max' buckets the same columns of both series when there are more buckets than columns
+        layer.draw_chart(values, x=max(x, 0), y=CHART_TOP, width=min(len(values), layer.cols), colour=colour,
+                         scale=CHART_SCALE, max_value=max_value, downsample_method="max")
+
+def _render_chart_layer(layer, metrics, page="history", growth=1.0):
+    """Draws the daily units bar chart (today's hourly one, or a long-history one) from a MarketplaceMetrics."""
+    if page in ROLLUP_PAGES:
+        _render_rollup_chart(layer, metrics.rollups, page, growth)
+        return
+    if page == "today":
+        # One bar per hour of the local day, as wide as the panel allows, centred
+        values = np.repeat(_hourly_units(metrics.today_hourly), max(1, layer.cols // 24))
+        x = (layer.buffer.shape[1] - len(values)) // 2
+        layer.draw_chart(values, x=x, y=CHART_TOP, width=len(values), colour=CYAN, scale=CHART_SCALE,
+                         max_value=_chart_max(values, growth))
+        return
+    # Bar chart below the text line, auto-scaled to the rows available;
+    # windows wider than the panel are downsampled to fit.
+    values = metrics.merged.units
+    if len(values):
+        layer.draw_chart(values, x=0, y=CHART_TOP, colour=GREEN, scale=CHART_SCALE,
+                         max_value=_chart_max(values, growth))
+
+def _totals_text(metrics, page="history"):
+    if page == "today":
+        return f"T{metrics.today_hourly.total_units}"
+    if page in ROLLUP_PAGES:
+        # e.g. "52W+12": the period shown and its change on the year before, in percent
+        current, year_ago = metrics.rollups.page(page)
+        change = metrics.rollups.change(current, year_ago)
+        label = f"{len(current)}{'W' if page == 'weeks' else 'M'}"
+        return label if change is None else f"{label}{change:+.0f}"
+    return f"{metrics.merged.total_units}"
+
+def _render_totals_layer(layer, metrics, page="history", offset=0, gap=8):
+    """
+    Draws the total units (today's, on the hourly page) in the top-left corner,
+    scrolled left by offset pixels when it is wider than the space left of the clock.
+    """
+    text = _totals_text(metrics, page)
+    colour = CYAN if page == "today" else GREEN
+    width = _totals_width(layer.cols)
+    layer.draw_text(text, x=1 - offset, y=1, colour=colour)
+    if len(text) * GLYPH_ADVANCE > width:
+        # Marquee: the next copy follows after the gap; clip at the clock
+        layer.draw_text(text, x=1 - offset + len(text) * GLYPH_ADVANCE + gap, y=1, colour=colour)
+        layer.buffer[:, 1 + width:] = 0
+
+def _render_clock_layer(layer, time_str):
+    """Draws the current time right-aligned on the text line."""
+    x = layer.cols - len(time_str) * GLYPH_ADVANCE
+    layer.draw_text(time_str, x=x, y=1, colour=GREEN)
+
+def _render_loading_bar(layer, lit_segments):
+    """Draws the refresh progress bar along the top row."""
+    layer.buffer[0, :lit_segments] = (100, 100, 100)  # Grey pixels at y=0
+
+def _render_stale_layer(layer):
+    """Draws a small amber dot in the top-right corner: the data shown is out of date."""
+    layer.set_pixel(layer.cols - 1, 0, (255, 120, 0))
+
+def _render_banner_layer(layer, banner):
+    """Draws a status message (error / loading) where the totals normally go."""
+    text, colour = banner
+    layer.draw_text(text, x=1, y=1, colour=colour)
+
+def _data_frame(compositor):
+    """The chart and totals layers flattened on black: what is persisted for the next boot."""
+    frame = np.zeros_like(compositor["chart"].buffer)
+    for name in ("chart", "totals"):
+        layer = compositor[name]
+        np.copyto(frame, layer.buffer, where=layer.opaque[..., None])
+    return frame
+
+def _build_compositor(disp, view):
+    """
+    Creates the panel layers. Each layer renders from the shared view dict:
+    'snapshot' (SalesSnapshot of MarketplaceMetrics), 'page' ('history' | 'today' | 'weeks' | 'months'),
+    'growth' (0..1),
+    'totals_offset' (int), 'clock' (str), 'segments' (int) and 'banner' ((text, colour)).
+    """
+    compositor = Compositor(disp)
+    compositor.add_layer("chart", z=0, render=lambda layer: _render_chart_layer(
+        layer, view['snapshot'].data, view.get('page', "history"), view.get('growth', 1.0)
+    ))
+    compositor.add_layer("totals", z=1, render=lambda layer: _render_totals_layer(
+        layer, view['snapshot'].data, view.get('page', "history"), view.get('totals_offset', 0)
+    ))
+    compositor.add_layer("clock", z=1, render=lambda layer: _render_clock_layer(layer, view['clock']))
+    compositor.add_layer("progress", z=2, render=lambda layer: _render_loading_bar(layer, view['segments']))
+    compositor.add_layer("stale", z=3, render=_render_stale_layer)
+    compositor.add_layer("banner", z=3, render=lambda layer: _render_banner_layer(layer, view['banner']))
+    return compositor
 
 # --- Main Application Logic ---
 
-def main():
+def _boot_display():
+    """
+    Initializes the display and pushes the last persisted data frame straight
+    away, before networking or the SP-API client. Returns (display, restored frame or None).
+    """
     disp = get_display()
     disp.initialize()
+    restored = load_frame(LAST_FRAME_PATH, disp.buffer.shape) if LAST_FRAME_PATH else None
+    if restored is not None:
+        disp.buffer[:] = restored
+        disp.push()
+    return disp, restored
+
+def main():
+    disp, restored = _boot_display()
 
-    amazon_api_client = AmazonClient()
+    # sp_api (and requests) are slow to import on a Pi, so the client is only
+    # created on the first fetch, once the panel already shows something
+    rate_limiter = RateLimiter()
+    amazon_api_client = None
+
+    # Settings that follow .env while running (config.live_settings). The watcher
+    # thread queues changes; the render loop applies them between frames.
+    pending_settings = {}
+    pending_lock = threading.Lock()
+
+    def queue_settings(changes):
+        with pending_lock:
+            pending_settings.update(changes)
+        scheduler.wake()
+
+    config_watcher = ConfigWatcher(ConfigStore(), on_change=queue_settings)
+    settings = dict(config_watcher.settings)
+
+    def get_amazon_client():
+        nonlocal amazon_api_client
+        if amazon_api_client is None:
+            from .api.amazon_client import AmazonClient
+            amazon_api_client = AmazonClient(
+                timezone_str=TIMEZONE, rate_limiter=rate_limiter,
+                # A refresh token rotated by LWA is written back to .env; reloading it then changes nothing
+                on_refresh_token=lambda token: config_watcher.store.update({'AMAZON_REFRESH_TOKEN': token}),
+            )
+            amazon_api_client.set_credentials(
+                settings['AMAZON_CLIENT_ID'], settings['AMAZON_CLIENT_SECRET'], settings['AMAZON_REFRESH_TOKEN']
+            )
+            amazon_api_client.start_token_refresher()  # polls never wait on an LWA round trip
+        return amazon_api_client
+
+    if METRICS_PORT:
+        try:
+            start_metrics_server(METRICS_PORT, METRICS_BIND)
+        except OSError as e:
+            log.warning(f"Could not start the metrics endpoint on port {METRICS_PORT}: {e}")
+
+    # Configuration for data fetching and display
+    DAYS_OF_DATA_TO_FETCH = HISTORY_DAYS  # Longer windows are downsampled to the graph width
+    
+    # Configuration for the loading bar
+    # SEGMENTS is the number of pixels for the loading bar (the display width)
+    LOADING_BAR_PIXEL_WIDTH = disp.cols
+
+    def fetch_metrics():
+        # One getOrderMetrics call per marketplace yields units, orders and sales together.
+        # Every poll that is due calls the API, whatever the cache TTL; the cached
+        # result is only published (with the error) when that call fails.
+        marketplaces = settings['AMAZON_MARKETPLACES']
+        result = get_amazon_client().get_order_metrics_cached(
+            marketplaces, days=DAYS_OF_DATA_TO_FETCH, refresh=True
+        )
+        merged, today_hourly = result.value.merged, result.value.today_hourly
+        log.info(
+            f"Data for the last {DAYS_OF_DATA_TO_FETCH} days from {', '.join(marketplaces)} "
+            f"({result.age:.0f}s old). Total units: {merged.total_units}, orders: {merged.total_orders}"
+            + (f", today: {today_hourly.total_units}" if today_hourly is not None else "")
+        )
+        return result
+
+    # Poll faster during business hours, slower overnight, never faster than the rate limit allows
+    poll_scheduler = PollScheduler(
+        rate_limiter,
+        business_interval=settings['REFRESH_INTERVAL'],
+        off_hours_interval=settings['REFRESH_INTERVAL_OFF_HOURS'],
+        business_hours=settings['BUSINESS_HOURS'],
+        timezone=ZoneInfo(TIMEZONE),
+    )
+
+    def calls_per_cycle():
+        # Intraday mode adds an hourly call per marketplace (the daily one then runs only now and then)
+        return len(settings['AMAZON_MARKETPLACES']) * (2 if INTRADAY else 1)
+
+    if FLEET_MODE == "client":
+        # Follow a hub: no SP-API client, credentials or quota on this panel
+        from .fleet import HubSubscriber
+        fetcher = HubSubscriber(HUB_URL)
+        log.info(f"Application started as a client of {HUB_URL}, rendering at {FRAME_RATE} fps.")
+    else:
+        fetcher = BackgroundFetcher(
+            fetch_metrics, interval=lambda: poll_scheduler.next_interval(calls_per_cycle=calls_per_cycle())
+        )
+        log.info(
+            f"Application started. Refreshing data every {settings['REFRESH_INTERVAL']}s "
+            f"({settings['REFRESH_INTERVAL_OFF_HOURS']}s outside business hours), rendering at {FRAME_RATE} fps."
+        )
+    if FLEET_MODE == "hub":
+        from .fleet import start_hub_server
+        try:
+            start_hub_server(fetcher, HUB_PORT, HUB_BIND)
+        except OSError as e:
+            log.error(f"Could not start the hub endpoint on port {HUB_PORT}: {e}")
+    fetcher.start()
+
+    # Render loop: frames run on the monotonic clock, but only when something on
+    # the panel changes: a new snapshot (the fetcher wakes the scheduler), an
+    # animation step (loading bar pixel, marquee, page transition) or the clock
+    # minute. In between, the loop sleeps. The fetcher thread does all the
+    # blocking I/O, so animations keep moving while a fetch is in flight.
+    # Layers are only re-rasterized when their input changes and the panel is
+    # only pushed when a layer did.
+    view = {
+        'snapshot': None, 'page': "history", 'growth': 1.0, 'totals_offset': 0,
+        'clock': None, 'segments': None, 'banner': ("...", (100, 100, 100)),
+    }
+    compositor = _build_compositor(disp, view)
+    for name in ("chart", "totals", "progress", "stale"):
+        compositor.set_visible(name, False)
+    if restored is not None:
+        # Until the first fetch lands, keep showing the restored frame, flagged stale
+        compositor.add_layer("restored", z=-1).buffer[:] = restored
+        compositor.set_visible("banner", False)
+        compositor.set_visible("stale", True)
+    showing_restored = restored is not None
+    save_pending = False  # new data on screen that has not been persisted yet
 
     def cleanup_and_exit(sig, frame):
         log.info("Signal received. Cleaning up display and exiting...")
+        fetcher.stop()
+        config_watcher.stop()
+        if amazon_api_client is not None:
+            amazon_api_client.stop_token_refresher()
+        if LAST_FRAME_PATH and view['snapshot'] is not None and view['snapshot'].data is not None:
+            save_frame(LAST_FRAME_PATH, _data_frame(compositor))
         disp.cleanup()
         sys.exit(0)
 
     signal.signal(signal.SIGINT, cleanup_and_exit)
     signal.signal(signal.SIGTERM, cleanup_and_exit)
+    # systemctl reload: re-read .env now rather than at the next poll
+    signal.signal(signal.SIGHUP, lambda sig, frame: config_watcher.request_reload())
 
-    # Configuration for data fetching and display
-    DAYS_OF_DATA_TO_FETCH = 63  # Corresponds to graph width potentially
-    
-    # Configuration for the loading bar animation
-    # Assuming SEGMENTS means the number of pixels for the loading bar (e.g., display width)
-    LOADING_BAR_PIXEL_WIDTH = 64
-    # REFRESH_INTERVAL from config is assumed to be the desired duration for the loading bar animation
-    LOADING_BAR_ANIMATION_DURATION = REFRESH_INTERVAL 
+    scheduler = FrameScheduler(FRAME_RATE)
+    push_seconds = PUSH_SECONDS.labels(backend=type(disp).__name__)
+    fetcher.add_listener(lambda snapshot: scheduler.wake())
+
+    def animate(key, *layers):
+        """on_change callback that stores an animation's value in the view and dirties its layers."""
+        def on_change(value):
+            view[key] = value
+            compositor.invalidate(*layers)
+        return on_change
+
+    def restart_marquee():
+        text = _totals_text(view['snapshot'].data, view['page'])
+        marquee = Marquee(animate('totals_offset', "totals"), len(text) * GLYPH_ADVANCE, _totals_width(disp.cols))
+        scheduler.add("marquee", marquee)
 
-    log.info(f"Application started. Data refresh cycle will involve a loading bar animation of {LOADING_BAR_ANIMATION_DURATION}s.")
+    def apply_settings(changes):
+        """Applies reloaded settings; only what changed is touched and the render loop keeps running."""
+        nonlocal disp, push_seconds
+        settings.update(changes)
+        if changes.keys() & {'REFRESH_INTERVAL', 'REFRESH_INTERVAL_OFF_HOURS', 'BUSINESS_HOURS'}:
+            poll_scheduler.business_interval = settings['REFRESH_INTERVAL']
+            poll_scheduler.off_hours_interval = settings['REFRESH_INTERVAL_OFF_HOURS']
+            poll_scheduler.business_hours = settings['BUSINESS_HOURS']
+        if amazon_api_client is not None:
+            if 'AMAZON_MARKETPLACES' in changes:
+                amazon_api_client.retain_marketplaces(settings['AMAZON_MARKETPLACES'])
+            if changes.keys() & {'AMAZON_CLIENT_ID', 'AMAZON_CLIENT_SECRET', 'AMAZON_REFRESH_TOKEN'}:
+                amazon_api_client.set_credentials(
+                    settings['AMAZON_CLIENT_ID'], settings['AMAZON_CLIENT_SECRET'], settings['AMAZON_REFRESH_TOKEN']
+                )
+        if 'DISPLAY_BACKEND' in changes:
+            # The new backend shows the current frame before the old one is released
+            disp = compositor.display = switch_backend(disp, settings['DISPLAY_BACKEND'])
+            push_seconds = PUSH_SECONDS.labels(backend=type(disp).__name__)
+        if changes.keys() - {'DISPLAY_BACKEND', 'PAGE_SECONDS'}:
+            fetcher.wake()  # poll now with the new cadence, marketplaces or credentials
+
+    config_watcher.start()
 
     while True:
+        deadlines = []
         try:
-            # 1. Fetch sales data
-            log.info(f"Fetching sales data for the last {DAYS_OF_DATA_TO_FETCH} days...")
-            units_data = amazon_api_client.get_sales_data(metric_type='units', days=DAYS_OF_DATA_TO_FETCH)
-            log.info(f"Data received. Total units: {units_data.get('total_units', 'N/A')}")
-
-            # 2. Render the fetched sales data on the display
-            _render_sales_data_on_display(disp, units_data)
-            
-            # 3. Animate the loading bar for the configured duration
-            # This call will block for approx. LOADING_BAR_ANIMATION_DURATION seconds.
-            loading_bar_animation_start_time = time.time()
-            _animate_loading_bar(disp, LOADING_BAR_PIXEL_WIDTH, LOADING_BAR_ANIMATION_DURATION, loading_bar_animation_start_time)
-            log.debug("Loading bar animation complete.")
+            with pending_lock:
+                changes = dict(pending_settings)
+                pending_settings.clear()
+            if changes:
+                apply_settings(changes)
+
+            now = time.monotonic()
+            snapshot = fetcher.latest
+            if snapshot is not view['snapshot']:
+                # A failed refresh keeps the last good data on screen (flagged stale below);
+                # the ERR banner only appears when there is nothing to show at all.
+                previous_data = view['snapshot'].data if view['snapshot'] else None
+                view['snapshot'] = snapshot
+                has_data = snapshot.data is not None
+                for name in ("chart", "totals", "progress"):
+                    compositor.set_visible(name, has_data)
+                showing_restored = restored is not None and not has_data
+                if restored is not None:
+                    compositor.set_visible("restored", showing_restored)
+                compositor.set_visible("banner", not has_data and not showing_restored)
+                if has_data:
+                    if snapshot.data is not previous_data:
+                        compositor.invalidate("chart", "totals")
+                        restart_marquee()
+                        save_pending = True
+                elif not showing_restored:
+                    view['banner'] = ("ERR", (255, 0, 0)) # Keep error short for small displays
+                    compositor.invalidate("banner")
+                # The loading bar fills up towards the next fetch
+                progress = scheduler.get("progress")
+                if progress is None:
+                    scheduler.add("progress", Progress(
+                        animate('segments', "progress"), snapshot.fetched_at, snapshot.next_fetch_at,
+                        LOADING_BAR_PIXEL_WIDTH,
+                    ))
+                else:
+                    progress.retarget(snapshot.fetched_at, snapshot.next_fetch_at)
+
+            # Rotate through the history chart, today by hour and the long-history pages
+            data = snapshot.data if snapshot is not None else None
+            pages = ("history",)
+            if data is not None:
+                pages += (("today",) if data.today_hourly else ()) + _rollup_pages(data)
+            page_seconds = settings['PAGE_SECONDS']
+            page_index = int(now // page_seconds)
+            page = pages[page_index % len(pages)]
+            if len(pages) > 1:
+                deadlines.append((page_index + 1) * page_seconds)
+            if page != view['page']:
+                view['page'] = page
+                compositor.invalidate("chart", "totals")
+                scheduler.add("transition", Tween(animate('growth', "chart"), TRANSITION_SECONDS))
+                restart_marquee()
 
+            clock = datetime.now().strftime("%H:%M")  # or %I:%M%p for 12-hr
+            if clock != view['clock']:
+                view['clock'] = clock
+                compositor.invalidate("clock")
+            deadlines.append(now + 60 - time.time() % 60)  # next minute
+
+            if snapshot is not None:
+                # Stale: the last refresh failed, or the data is over two poll periods old
+                period = max(snapshot.next_fetch_at - snapshot.fetched_at, 1e-3)
+                stale_at = now + 2 * period - snapshot.age(now)
+                stale = snapshot.data is not None and (snapshot.error is not None or stale_at <= now)
+                stale = stale or showing_restored
+                compositor.set_visible("stale", stale)
+                if not stale:
+                    deadlines.append(stale_at)
+
+            scheduler.tick(now)
+            with RENDER_SECONDS.time():
+                changed = compositor.compose()
+            if changed:
+                with push_seconds.time():
+                    disp.push()
+            if save_pending and LAST_FRAME_PATH and view['growth'] >= 1.0:
+                save_frame(LAST_FRAME_PATH, _data_frame(compositor))
+                save_pending = False
         except Exception as e:
-            log.error(f"An error occurred in the main loop: {e}", exc_info=True)
-            _render_error_on_display(disp, "ERR") # Keep error short for small displays
-            # Wait for a bit before trying the whole loop again to avoid spamming APIs on persistent errors
-            time.sleep(10) # Increased sleep on error
+            log.error(f"An error occurred while rendering: {e}", exc_info=True)
+
+        scheduler.wait(*deadlines)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -2,29 +2,56 @@
 Flask mini-app that serves the captive-portal page.
 """
 import os
-from flask import Flask, render_template, request, redirect
-from ..config import ENV_PATH
+from flask import Flask, Response, render_template, request, redirect
+from ..config import ENV_PATH, FRAMEBUFFER_NAME
+from ..config_store import ConfigStore
 
 app = Flask(__name__, template_folder="templates")
 
+PREVIEW_SCALE = 8  # 64x32 panel -> 512x256 image
+_framebuffer = None  # attached lazily; the tracker may start after the portal
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     if request.method == "POST":
-        ssid = request.form.get("ssid")
-        passwd = request.form.get("password")
-        amazon_id = request.form.get("amazon_id")
-        amazon_secret = request.form.get("amazon_secret")
-        refresh = request.form.get("refresh")
+        fields = {
+            "WIFI_SSID": request.form.get("ssid"),
+            "WIFI_PASS": request.form.get("password"),
+            "AMAZON_CLIENT_ID": request.form.get("amazon_id"),
+            "AMAZON_CLIENT_SECRET": request.form.get("amazon_secret"),
+            "AMAZON_REFRESH_TOKEN": request.form.get("refresh"),
+            "REFRESH_INTERVAL": request.form.get("refresh_interval"),
+        }
+        # Update .env in place; blank fields keep their current value
+        ConfigStore(ENV_PATH).update({key: value for key, value in fields.items() if value})
+
+        # TODO: trigger network reconfiguration
+        # The tracker watches .env and applies the new settings without a restart
+        return "Settings saved. The tracker applies them within a few seconds."
 
-        # Save to .env
-        with open(ENV_PATH, "a") as fp:
-            fp.write(f"\nWIFI_SSID={ssid}")
-            fp.write(f"\nWIFI_PASS={passwd}")
-            fp.write(f"\nAMAZON_CLIENT_ID={amazon_id}")
-            fp.write(f"\nAMAZON_CLIENT_SECRET={amazon_secret}")
-            fp.write(f"\nAMAZON_REFRESH_TOKEN={refresh}")
+    return render_template("index.html")
 
-        # TODO: trigger network reconfiguration / reboot
-        return "Credentials saved. Rebooting..."
+@app.route("/preview.png")
+def preview():
+    """Live view of the panel, read from the tracker's shared-memory framebuffer."""
+    global _framebuffer
+    from ..display.shared import SharedFramebuffer
+    from ..display.png import encode_png
 
-    return render_template("index.html")
\ No newline at end of file
+    if _framebuffer is not None and _framebuffer.replaced():
+        # The tracker restarted: the block attached to was unlinked and a new one created
+        _framebuffer.close()
+        _framebuffer = None
+    if _framebuffer is None:
+        try:
+            _framebuffer = SharedFramebuffer.attach(FRAMEBUFFER_NAME)
+        except (FileNotFoundError, ValueError):
+            return "Display driver not running", 404
+    seq, frame = _framebuffer.read()
+    if frame is None:
+        return "No frame yet", 404
+    return Response(
+        encode_png(frame, scale=PREVIEW_SCALE),
+        mimetype="image/png",
+        headers={"Cache-Control": "no-store", "X-Frame-Sequence": str(seq)},
+    )
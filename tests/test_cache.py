@@ -0,0 +1,150 @@
+import time
+import threading
+import pytest
+from led_sales_tracker.api.cache import SWRCache
+from led_sales_tracker.fetcher import BackgroundFetcher
+
+
+class Loader:
+    """Counts calls and returns the call number, or raises while failing is set."""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.failing = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if self.failing:
+            raise RuntimeError("upstream down")
+        return calls
+
+
+def test_refresh_always_loads():
+    cache, loader = SWRCache(ttl=30), Loader()
+    assert cache.get("k", loader).value == 1
+    result = cache.refresh("k", loader)
+    assert (result.value, result.age, result.stale) == (2, 0.0, False)
+    assert cache.get("k", loader).value == 2  # fresh again for get()
+    assert loader.calls == 2
+
+
+def test_refresh_falls_back_to_cached_value_on_error():
+    cache, loader = SWRCache(ttl=30), Loader()
+    cache.get("k", loader)
+    loader.failing = True
+    result = cache.refresh("k", loader)
+    assert result.value == 1
+    assert result.stale and result.error == "upstream down"
+    with pytest.raises(RuntimeError):
+        cache.refresh("other", loader)  # nothing cached to fall back to
+
+
+def test_polls_faster_than_the_ttl_reach_upstream_every_time():
+    # REFRESH_INTERVAL below RESPONSE_CACHE_TTL: every due poll must still call the API, once
+    cache, loader = SWRCache(ttl=30), Loader()
+    published = []
+    fetcher = BackgroundFetcher(lambda: cache.refresh("k", loader), interval=0.05)
+    fetcher.add_listener(published.append)
+    fetcher.start()
+    time.sleep(0.5)
+    fetcher.stop()
+    fetcher.join(1)
+    assert len(published) >= 5
+    assert loader.calls == len(published)  # one upstream call per publish, no double publishes
+    assert [s.data for s in published] == list(range(1, len(published) + 1))
+    assert all(s.data_age == 0.0 and s.error is None for s in published)
+
+
+def _make_stale(cache, key):
+    # Age the entry past the TTL without sleeping
+    cache._entries[key].loaded_at -= cache.ttl + 1
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_miss_loads_and_fresh_hit_does_not():
+    cache, loader = SWRCache(ttl=30), Loader()
+    first = cache.get("k", loader)
+    assert (first.value, first.age, first.stale, first.error) == (1, 0.0, False, None)
+    second = cache.get("k", loader)
+    assert second.value == 1 and not second.stale
+    assert loader.calls == 1
+
+
+def test_miss_errors_are_raised():
+    cache, loader = SWRCache(ttl=30), Loader()
+    loader.failing = True
+    with pytest.raises(RuntimeError):
+        cache.get("k", loader)
+    loader.failing = False
+    assert cache.get("k", loader).value == 2  # nothing was cached, the next get loads again
+
+
+def test_stale_hit_is_served_and_revalidated_once():
+    cache, loader = SWRCache(ttl=30), Loader(delay=0.05)
+    landed = []
+    cache.add_listener(lambda key, value: landed.append((key, value)))
+    cache.get("k", loader)
+    _make_stale(cache, "k")
+    results = [cache.get("k", loader) for _ in range(5)]
+    assert all(r.value == 1 and r.stale for r in results)  # served right away
+    _wait_for(lambda: landed)
+    assert landed == [("k", 2)]
+    assert loader.calls == 2
+    assert cache.get("k", loader).value == 2
+
+
+def test_failed_revalidation_keeps_the_value_and_reports_the_error():
+    cache, loader = SWRCache(ttl=30), Loader()
+    cache.get("k", loader)
+    _make_stale(cache, "k")
+    loader.failing = True
+    cache.get("k", loader)
+    _wait_for(lambda: not cache._inflight)
+    result = cache.get("k", loader)
+    assert result.value == 1
+    assert result.error == "upstream down"
+
+
+def test_concurrent_misses_share_one_load():
+    cache, loader = SWRCache(ttl=30), Loader(delay=0.1)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader).value)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [1] * 8
+    assert loader.calls == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = SWRCache(ttl=30, max_entries=2)
+    loaders = {key: Loader() for key in "abc"}
+    cache.get("a", loaders["a"])
+    cache.get("b", loaders["b"])
+    cache.get("a", loaders["a"])  # a is now the most recently used
+    cache.get("c", loaders["c"])
+    cache.get("a", loaders["a"])
+    cache.get("b", loaders["b"])  # b was evicted, so this loads again
+    assert {key: loader.calls for key, loader in loaders.items()} == {'a': 1, 'b': 2, 'c': 1}
+
+
+def test_invalidate():
+    cache, loader = SWRCache(ttl=30), Loader()
+    cache.get("k", loader)
+    cache.get("other", loader)
+    cache.invalidate("k")
+    assert cache.get("k", loader).value == 3
+    cache.invalidate()
+    assert cache.get("other", loader).value == 4
@@ -0,0 +1,37 @@
+import timeit
+import numpy as np
+from led_sales_tracker.display import chart
+from led_sales_tracker.display.null import NullDisplay
+
+
+def _fastest(fn, number=50):
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number
+
+
+def test_lttb_keeps_the_ends_and_one_point_per_bucket():
+    rng = np.random.default_rng(0)
+    for n, n_out in ((365, 64), (3650, 64), (65, 64), (70, 10), (5, 3)):
+        kept = chart.lttb_indices(rng.integers(0, 60, n), n_out)
+        assert len(kept) == n_out
+        assert kept[0] == 0 and kept[-1] == n - 1
+        assert (np.diff(kept) > 0).all()
+    assert (chart.lttb_indices(np.arange(10), 20) == np.arange(10)).all()
+
+
+def test_lttb_keeps_isolated_peaks_and_dips():
+    values = np.full(365, 30.0)
+    peaks, dips = [40, 150, 290], [90, 220]
+    values[peaks], values[dips] = 500, 0
+    out = chart.downsample(values, 64)
+    assert (out == 500).sum() == len(peaks)
+    assert (out == 0).sum() == len(dips)
+
+
+def test_long_windows_cost_about_as_much_as_short_ones():
+    # Downsampling a year to the panel width must not dominate the frame (it was a Python loop per bucket)
+    disp = NullDisplay(max_frames=1)
+    rng = np.random.default_rng(1)
+    short, year = rng.integers(0, 60, 63), rng.integers(0, 60, 365)
+    draw_short = _fastest(lambda: disp.draw_chart(short, x=0, y=9))
+    assert _fastest(lambda: chart.downsample(year, disp.cols)) < draw_short
+    assert _fastest(lambda: disp.draw_chart(year, x=0, y=9)) < 2.5 * draw_short
@@ -0,0 +1,84 @@
+import os
+import stat
+import pytest
+from led_sales_tracker.config import live_settings
+from led_sales_tracker.config_store import ConfigStore, ConfigWatcher
+
+ENV = """\
+# Amazon credentials
+export AMAZON_CLIENT_ID=old-id   # from Seller Central
+AMAZON_REFRESH_TOKEN='Atzr|old'
+REFRESH_INTERVAL = 10
+REFRESH_INTERVAL=20
+PAGE_SECONDS=10
+"""
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / ".env"
+    path.write_text(ENV)
+    path.chmod(0o640)
+    return ConfigStore(path, base_env={})
+
+
+def test_update_rewrites_keys_in_place(store):
+    store.update({'AMAZON_CLIENT_ID': "new-id", 'REFRESH_INTERVAL': 30, 'HISTORY_DAYS': 365})
+    with open(store.path) as fp:
+        lines = fp.read().splitlines()
+    assert lines == [
+        "# Amazon credentials",
+        "export AMAZON_CLIENT_ID=new-id   # from Seller Central",  # export and comment kept
+        "AMAZON_REFRESH_TOKEN='Atzr|old'",
+        "REFRESH_INTERVAL = 30",
+        # the later duplicate of REFRESH_INTERVAL is dropped
+        "PAGE_SECONDS=10",
+        "HISTORY_DAYS=365",  # new keys are appended
+    ]
+
+
+def test_values_needing_quotes_read_back_unchanged(store):
+    values = {
+        'AMAZON_REFRESH_TOKEN': "Atzr|new token",
+        'AMAZON_CLIENT_SECRET': 'se"cr\\et # not a comment',
+        'AMAZON_MARKETPLACES': "US,CA",
+        'EMPTY': "",
+    }
+    store.update(values)
+    raw = store.read()
+    assert {key: raw[key] for key in values} == values
+    assert "AMAZON_MARKETPLACES=US,CA" in open(store.path).read()  # safe values stay bare
+
+
+def test_update_is_atomic_and_keeps_the_mode(store, tmp_path):
+    before = os.stat(store.path).st_ino
+    store.update({'PAGE_SECONDS': 5})
+    st = os.stat(store.path)
+    assert st.st_ino != before  # renamed over, not rewritten in place
+    assert stat.S_IMODE(st.st_mode) == 0o640
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".env", ".env.lock"]
+
+
+def test_update_creates_a_missing_file(tmp_path):
+    store = ConfigStore(tmp_path / ".env", base_env={})
+    store.update({'PAGE_SECONDS': 7})
+    assert store.read() == {'PAGE_SECONDS': "7"}
+    assert stat.S_IMODE(os.stat(store.path).st_mode) == 0o600  # it may hold credentials
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "nan", "inf", "soon"])
+def test_page_seconds_must_be_positive(value):
+    with pytest.raises(ValueError):
+        live_settings({'PAGE_SECONDS': value})
+
+
+def test_watcher_keeps_settings_when_a_value_is_bad(store):
+    changes = []
+    watcher = ConfigWatcher(store, on_change=changes.append, interval=0)
+    store.update({'PAGE_SECONDS': 0})
+    with pytest.raises(ValueError):
+        watcher.check(force=True)
+    assert watcher.settings['PAGE_SECONDS'] == 10
+    store.update({'PAGE_SECONDS': 4})
+    assert watcher.check(force=True) == {'PAGE_SECONDS': 4.0}
+    assert changes == [{'PAGE_SECONDS': 4.0}]
@@ -0,0 +1,81 @@
+import json
+from dataclasses import replace
+import numpy as np
+from led_sales_tracker.api.order_metrics import OrderMetrics, MarketplaceMetrics
+from led_sales_tracker.fleet import series_delta, apply_series_delta, snapshot_delta, apply_snapshot_delta
+
+
+def _series(start, units, sales=None):
+    units = np.asarray(units, dtype=np.int64)
+    dates = np.datetime64(start) + np.arange(len(units))
+    sales = units * 2.5 if sales is None else np.asarray(sales, dtype=np.float64)
+    return OrderMetrics(dates=dates, units=units, orders=units // 2, sales=sales)
+
+
+def _over_the_wire(delta):
+    return json.loads(json.dumps(delta))
+
+
+def _assert_same_series(a, b):
+    assert a.currency == b.currency
+    assert (a.dates == b.dates).all()
+    assert (a.units == b.units).all()
+    assert (a.orders == b.orders).all()
+    assert np.array_equal(a.sales, b.sales, equal_nan=True)
+
+
+def test_window_starting_earlier_is_sent_in_full():
+    base = _series("2026-01-10", range(10))
+    new = _series("2026-01-05", range(15))
+    delta = _over_the_wire(series_delta(base, new))
+    assert 'full' in delta
+    _assert_same_series(apply_series_delta(base, delta), new)
+
+
+def test_shifted_window_sends_only_changed_tail():
+    base = _series("2026-01-01", range(10))
+    units = list(range(1, 11))
+    units[7] += 5  # a settle day revised by a late order
+    units[9] = 3   # today moved on
+    new = _series("2026-01-02", units + [4])  # the window moved forward by a day
+    delta = _over_the_wire(series_delta(base, new))
+    assert (delta['drop'], delta['keep']) == (1, 7)
+    assert len(delta['tail']['units']) == 4
+    _assert_same_series(apply_series_delta(base, delta), new)
+
+
+def test_unchanged_snapshot_keeps_the_same_object():
+    merged = _series("2026-01-01", range(10))
+    hourly = OrderMetrics.from_columns(["2026-01-10T00", "2026-01-10T01"], [1, 2], [1, 1], [2.0, 4.0], unit="h")
+    first = MarketplaceMetrics(merged=merged, by_marketplace={'US': merged}, errors={}, today_hourly=hourly)
+    client = apply_snapshot_delta(None, _over_the_wire(snapshot_delta(None, first)))
+    _assert_same_series(client.merged, merged)
+    _assert_same_series(client.today_hourly, hourly)
+
+    again = MarketplaceMetrics(merged=_series("2026-01-01", range(10)), by_marketplace={'US': merged}, errors={},
+                               today_hourly=hourly)
+    assert apply_snapshot_delta(client, _over_the_wire(snapshot_delta(first, again))) is client
+
+
+def test_changed_snapshot_is_a_new_object():
+    base = MarketplaceMetrics(merged=_series("2026-01-01", range(10)), by_marketplace={}, errors={})
+    client = apply_snapshot_delta(None, _over_the_wire(snapshot_delta(None, base)))
+    new = MarketplaceMetrics(merged=_series("2026-01-01", list(range(9)) + [20]), by_marketplace={},
+                             errors={'CA': "throttled"})
+    updated = apply_snapshot_delta(client, _over_the_wire(snapshot_delta(base, new)))
+    assert updated is not client
+    assert updated.merged.units[-1] == 20
+    assert updated.errors == {'CA': "throttled"}
+
+
+def test_nan_sales_round_trip():
+    # Marketplaces in different currencies merge to NaN sales with no currency
+    sales = [np.nan] * 5
+    base = replace(_series("2026-01-01", range(5), sales), currency=None)
+    new = replace(_series("2026-01-01", [0, 1, 2, 3, 9], sales), currency=None)
+    delta = _over_the_wire(series_delta(base, new))
+    assert (delta['drop'], delta['keep']) == (0, 4)  # NaN rows compare as unchanged
+    result = apply_series_delta(base, delta)
+    _assert_same_series(result, new)
+    assert result.currency is None
+    assert apply_series_delta(base, _over_the_wire(series_delta(base, base))) is base
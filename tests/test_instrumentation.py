@@ -0,0 +1,27 @@
+from led_sales_tracker.instrumentation import Counter, Histogram, Registry
+
+
+def test_render_format():
+    registry = Registry()
+    retries = registry.register(Counter("retries", "Retried calls.", ("operation",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0)))
+    retries.labels(operation="getOrderMetrics").inc(2)
+    latency.observe(0.5)
+    text = registry.render()
+    assert 'retries_total{operation="getOrderMetrics"} 2' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "latency_seconds_count 1" in text
+
+
+def test_render_while_new_labels_are_added():
+    # A scrape must not fail when a fetcher thread creates a first-seen label combination mid-render
+    class RacingCounter(Counter):
+        def _render_child(self, key, child):
+            self.labels(marketplace=f"{key[0]}-next").inc()  # as if another thread did it now
+            return super()._render_child(key, child)
+
+    counter = RacingCounter("calls", "Calls.", ("marketplace",))
+    counter.labels(marketplace="US").inc()
+    assert counter.render() == ["# HELP calls Calls.", "# TYPE calls counter", 'calls_total{marketplace="US"} 1']
+    assert len(counter.children()) == 2
@@ -0,0 +1,37 @@
+import numpy as np
+from led_sales_tracker.display.last_frame import save_frame, load_frame
+
+SHAPE = (16, 32, 3)
+
+
+def _frame():
+    return np.arange(np.prod(SHAPE), dtype=np.uint8).reshape(SHAPE)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "last_frame.npy"
+    save_frame(path, _frame())
+    assert (load_frame(path, SHAPE) == _frame()).all()
+    assert not (tmp_path / "last_frame.npy.tmp").exists()
+
+
+def test_missing_or_mismatched_frame_is_ignored(tmp_path):
+    path = tmp_path / "last_frame.npy"
+    assert load_frame(path, SHAPE) is None
+    save_frame(path, _frame())
+    assert load_frame(path, (32, 64, 3)) is None
+
+
+def test_empty_file_is_ignored(tmp_path):
+    path = tmp_path / "last_frame.npy"
+    path.write_bytes(b"")
+    assert load_frame(path, SHAPE) is None
+
+
+def test_truncated_file_is_ignored(tmp_path):
+    path = tmp_path / "last_frame.npy"
+    save_frame(path, _frame())
+    data = path.read_bytes()
+    for length in (5, 64, len(data) - 100):
+        path.write_bytes(data[:length])
+        assert load_frame(path, SHAPE) is None
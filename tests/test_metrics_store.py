@@ -0,0 +1,78 @@
+import datetime
+import pytest
+from led_sales_tracker.api.metrics_store import MetricsStore
+
+TODAY = datetime.date(2026, 3, 10)
+
+
+def _entry(day, units, amount=None, currency="USD"):
+    return {
+        'interval': f"{day}T00:00:00-08:00--{day + datetime.timedelta(days=1)}T00:00:00-08:00",
+        'unitCount': units,
+        'orderCount': units // 2,
+        'totalSales': {'amount': units * 2.5 if amount is None else amount, 'currencyCode': currency},
+    }
+
+
+def _days(first, count):
+    return [first + datetime.timedelta(days=i) for i in range(count)]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetricsStore(tmp_path / "metrics.sqlite3")
+    yield store
+    store.close()
+
+
+def test_only_days_before_the_cutoff_are_closed(store):
+    days = _days(TODAY - datetime.timedelta(days=4), 5)
+    assert store.upsert("US", [_entry(day, 3) for day in days], closed_before=TODAY - datetime.timedelta(days=2)) == 5
+    assert store.closed_days("US", days[0], days[-1]) == {day.isoformat() for day in days[:2]}
+    assert store.closed_days("CA", days[0], days[-1]) == set()  # per marketplace
+
+
+def test_upsert_replaces_a_day(store):
+    day = TODAY - datetime.timedelta(days=1)
+    store.upsert("US", [_entry(day, 3)], closed_before=day)
+    assert store.closed_days("US", day, day) == set()  # still settling
+    store.upsert("US", [_entry(day, 7)], closed_before=TODAY)  # a later poll, once it has settled
+    metrics = store.load_metrics("US", day, day)
+    assert metrics.units.tolist() == [7]
+    assert store.closed_days("US", day, day) == {day.isoformat()}
+
+
+def test_entries_without_a_day_are_skipped(store):
+    entries = [{'interval': "2026-03-01--2026-03-02", 'unitCount': 1}, {'unitCount': 2}]
+    assert store.upsert("US", entries, closed_before=TODAY) == 0
+    assert store.load("US", TODAY - datetime.timedelta(days=30), TODAY) == []
+
+
+def test_load_round_trips_the_raw_entries(store):
+    days = _days(TODAY - datetime.timedelta(days=2), 3)
+    entries = [_entry(day, units) for day, units in zip(days, (4, 0, 9))]
+    store.upsert("US", entries, closed_before=TODAY)
+    assert store.load("US", days[0], days[-1]) == entries
+    assert [e['unitCount'] for e in store.load("US", days[1], days[1])] == [0]
+
+
+def test_load_metrics_columns(store):
+    days = _days(TODAY - datetime.timedelta(days=2), 3)
+    store.upsert("CA", [_entry(day, units, currency="CAD") for day, units in zip(days, (4, 1, 9))], TODAY)
+    metrics = store.load_metrics("CA", days[0], days[-1])
+    assert metrics.iso_dates() == [day.isoformat() for day in days]
+    assert metrics.units.tolist() == [4, 1, 9]
+    assert metrics.orders.tolist() == [2, 0, 4]
+    assert metrics.sales.tolist() == [10.0, 2.5, 22.5]
+    assert metrics.currency == "CAD"
+    assert len(store.load_metrics("US", days[0], days[-1])) == 0
+
+
+def test_the_store_persists(tmp_path):
+    path = tmp_path / "metrics.sqlite3"
+    store = MetricsStore(path)
+    store.upsert("US", [_entry(TODAY - datetime.timedelta(days=5), 6)], closed_before=TODAY)
+    store.close()
+    reopened = MetricsStore(path)
+    assert reopened.closed_days("US", TODAY - datetime.timedelta(days=7), TODAY) == {"2026-03-05"}
+    reopened.close()
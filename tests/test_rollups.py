@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from led_sales_tracker.api.order_metrics import OrderMetrics
+from led_sales_tracker.api.rollups import RollupIndex, Rollups, rollup_days
+
+START = np.datetime64("2023-01-01")
+DAYS = 1200
+WINDOW = 63       # one poll's history window
+SETTLE_DAYS = 5   # how far back a poll may still revise a day
+
+
+def _metrics(dates, units):
+    return OrderMetrics(dates=dates, units=units, orders=units // 2, sales=units * 3.5)
+
+
+def _brute_weeks(dates, units, last, count):
+    """Sums of the `count` ISO weeks up to the one holding last, the last one only up to last."""
+    day_numbers = dates.astype(np.int64)
+    mondays = day_numbers - (day_numbers + 3) % 7
+    last_number = int(last.astype(np.int64))
+    last_monday = last_number - (last_number + 3) % 7
+    return np.array([
+        units[(mondays == last_monday - 7 * k) & (day_numbers <= last_number)].sum()
+        for k in range(count - 1, -1, -1)
+    ])
+
+
+def _brute_months(dates, units, last, count):
+    months = dates.astype("datetime64[M]")
+    last_month = last.astype("datetime64[M]")
+    return np.array([
+        units[(months == last_month - k) & (dates <= last)].sum() for k in range(count - 1, -1, -1)
+    ])
+
+
+@pytest.fixture(scope="module")
+def fed_index():
+    """An index seeded with most of the history, then fed sliding windows with late edits to settle days."""
+    rng = np.random.default_rng(2)
+    dates = START + np.arange(DAYS)
+    units = rng.integers(0, 50, DAYS)
+    index = RollupIndex(max_days=rollup_days(52, 24) + 31)
+    index.update(_metrics(dates[:1000], units[:1000]))
+    for end in range(1001, DAYS + 1):
+        if end % 7 == 0:
+            units[end - SETTLE_DAYS] += 7  # a late order revises a day already seen
+        window = slice(max(0, end - WINDOW), end)
+        index.update(_metrics(dates[window], units[window]))
+    return index, dates, units
+
+
+def test_weeks_match_brute_force(fed_index):
+    index, dates, units = fed_index
+    last = dates[-1]
+    assert (index.weeks(52).units == _brute_weeks(dates, units, last, 52)).all()
+    year_ago = last - 364
+    assert (index.weeks(52, year_ago).units == _brute_weeks(dates, units, year_ago, 52)).all()
+    assert index.weeks(52).dates[-1] == np.datetime64("2026-04-13")  # Monday of the last day's week
+
+
+def test_months_match_brute_force(fed_index):
+    index, dates, units = fed_index
+    last = dates[-1]
+    assert (index.months(24).units == _brute_months(dates, units, last, 24)).all()
+    year_ago = np.datetime64("2025-04-14")
+    assert (index.months(24, year_ago).units == _brute_months(dates, units, year_ago, 24)).all()
+
+
+def test_trailing_sums_match_brute_force(fed_index):
+    index, dates, units = fed_index
+    for window in (7, 30):
+        expected = [units[DAYS - window - k:DAYS - k].sum() for k in range(9, -1, -1)]
+        assert index.trailing(window, 10).units.tolist() == expected
+    assert index.trailing_mean(7) == pytest.approx(units[-7:].sum() / 7)
+
+
+def test_rebasing_drops_old_days_and_keeps_sums():
+    rng = np.random.default_rng(3)
+    dates = START + np.arange(DAYS)
+    units = rng.integers(0, 50, DAYS)
+    index = RollupIndex(max_days=120)
+    for end in range(WINDOW, DAYS + 1):
+        window = slice(end - WINDOW, end)
+        index.update(_metrics(dates[window], units[window]))
+    assert len(index) < 2 * index.max_days
+    assert index.origin > START + DAYS - 2 * index.max_days
+    last = dates[-1]
+    assert (index.weeks(12).units == _brute_weeks(dates, units, last, 12)).all()
+    assert (index.months(3).units == _brute_months(dates, units, last, 3)).all()
+    assert index.trailing(30).total_units == units[-30:].sum()
+
+
+def test_matches_index_built_in_one_go(fed_index):
+    index, dates, units = fed_index
+    rebuilt = RollupIndex()
+    rebuilt.update(_metrics(dates, units))
+    for ours, theirs in ((index.weeks(52), rebuilt.weeks(52)), (index.months(24), rebuilt.months(24)),
+                         (index.trailing(30, 40), rebuilt.trailing(30, 40))):
+        assert (ours.dates == theirs.dates).all()
+        assert (ours.units == theirs.units).all()
+        assert (ours.orders == theirs.orders).all()
+        assert np.allclose(ours.sales, theirs.sales)
+
+
+def test_unchanged_window_changes_nothing(fed_index):
+    index, dates, units = fed_index
+    assert index.update(_metrics(dates[-WINDOW:], units[-WINDOW:])) == 0
+
+
+def test_rollups_merge_marketplaces():
+    dates = START + np.arange(800)
+    first, second = RollupIndex(), RollupIndex()
+    first.update(_metrics(dates, np.full(800, 2)))
+    second.update(_metrics(dates[100:], np.full(700, 3)))
+    rollups = Rollups.from_indexes([first, second], weeks=52, months=0)
+    assert rollups.weeks.units[-2] == 7 * 5  # a full week of both marketplaces
+    assert len(rollups.months) == 0  # the months page is off
+    assert Rollups.change(rollups.weeks, rollups.weeks_year_ago) is not None
+    assert Rollups.from_indexes([RollupIndex()], weeks=52, months=24) is None
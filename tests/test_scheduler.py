@@ -0,0 +1,18 @@
+import datetime
+import pytest
+from led_sales_tracker.api.scheduler import PollScheduler
+
+
+def _at(hour):
+    return datetime.datetime(2026, 3, 2, hour, 30)
+
+
+@pytest.mark.parametrize("hours, inside", [
+    ((8, 20), range(8, 20)),
+    ((20, 4), [0, 1, 2, 3, 20, 21, 22, 23]),  # overnight: wraps past midnight
+    ((0, 24), range(24)),
+    ((9, 9), []),
+])
+def test_business_hours(hours, inside):
+    scheduler = PollScheduler(None, business_interval=10, off_hours_interval=60, business_hours=hours)
+    assert [hour for hour in range(24) if scheduler.in_business_hours(_at(hour))] == list(inside)
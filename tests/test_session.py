@@ -0,0 +1,50 @@
+import requests
+from sp_api.base import Marketplaces, Granularity
+from sp_api.base import client as sp_api_client
+from led_sales_tracker.api import session as session_module
+from led_sales_tracker.api.auth import TimedAccessTokenClient
+from led_sales_tracker.api.session import PooledSales
+
+CREDENTIALS = dict(refresh_token="Atzr|test", lwa_app_id="id", lwa_client_secret="secret")
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+    text = content = "{}"
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class RecordingSession:
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, **kwargs):
+        self.calls.append(("POST", url, kwargs))
+        return FakeResponse({'access_token': "Atza|test", 'expires_in': 3600})
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        return FakeResponse({'payload': []})
+
+
+def test_requests_go_through_the_session_with_a_timeout():
+    session = RecordingSession()
+    sales = PooledSales(credentials=CREDENTIALS, marketplace=Marketplaces.US,
+                        auth_token_client_class=TimedAccessTokenClient, session=session)
+    sales.get_order_metrics(marketplaceIds=[Marketplaces.US.marketplace_id], interval="2026-01-01--2026-01-02",
+                            granularity=Granularity.DAY)
+    method, url, _ = session.calls[-1]
+    assert method == "GET" and url.endswith("/sales/v1/orderMetrics")
+    assert all(kwargs['timeout'] == session_module.HTTP_TIMEOUT for _, _, kwargs in session.calls)
+
+
+def test_hook_leaves_other_callers_on_requests():
+    assert sp_api_client.request is session_module._request
+    assert getattr(session_module._local, "session", None) is None  # restored after every call
+    assert requests.request is not session_module._request
@@ -0,0 +1,61 @@
+import os
+import time
+import multiprocessing
+import numpy as np
+import pytest
+from led_sales_tracker.display.shared import SharedFramebuffer
+
+ROWS, COLS = 256, 256  # large frames, so a torn copy would be likely to show
+DURATION = 1.0
+
+
+def _write_frames(name, stop):
+    framebuffer = SharedFramebuffer.attach(name, untrack=False)
+    frame = np.empty(framebuffer.shape, dtype=np.uint8)
+    try:
+        while not stop.is_set():
+            frame.fill((framebuffer.sequence + 1) & 0xFF)  # every byte of frame n is n mod 256
+            framebuffer.write(frame)
+    finally:
+        framebuffer.close()
+
+
+@pytest.fixture
+def framebuffer():
+    framebuffer = SharedFramebuffer.create(f"led-test-{os.getpid()}", ROWS, COLS)
+    yield framebuffer
+    framebuffer.close()
+
+
+def test_write_then_read(framebuffer):
+    assert framebuffer.read() == (None, None)
+    frame = np.full(framebuffer.shape, 7, dtype=np.uint8)
+    assert framebuffer.write(frame) == 1
+    seq, read = framebuffer.read()
+    assert seq == 1 and (read == 7).all()
+    assert framebuffer.read(since=1) == (1, None)
+
+
+def test_concurrent_reader_never_sees_a_torn_frame(framebuffer):
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    writer = context.Process(target=_write_frames, args=(framebuffer.name, stop))
+    writer.start()
+    out = np.empty(framebuffer.shape, dtype=np.uint8)
+    seq, frames = None, 0
+    deadline = time.monotonic() + 30
+    try:
+        while frames == 0 or time.monotonic() < started + DURATION:
+            assert time.monotonic() < deadline, "the writer never published"
+            seq, frame = framebuffer.read(out, since=seq)
+            if frame is None:
+                continue
+            if frames == 0:
+                started = time.monotonic()
+            assert frame.min() == frame.max() == seq & 0xFF, f"torn frame {seq}"
+            frames += 1
+    finally:
+        stop.set()
+        writer.join(10)
+    assert writer.exitcode == 0
+    assert framebuffer.sequence >= seq